@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Logging Assíncrono - Fila em memória com gravação numa thread de fundo
+Registros em JSON com campos de servidor, ticket e interação; arquivo rotacionado por
+tamanho e por tempo, com os antigos compactados em gzip
+"""
+
+import contextvars
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+# Campos de contexto anexados a todo registro emitido dentro de uma interação/timer
+CAMPOS_CONTEXTO = ("tenant", "guild_id", "ticket_id", "interacao_id", "usuario_id")
+
+FORMATO_TEXTO = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_contexto = contextvars.ContextVar("contexto_log", default={})
+
+
+def definir_contexto(**campos):
+    """
+    Acrescenta campos ao contexto de log da tarefa atual (herdado por tasks filhas)
+    Returns:
+        Token para restaurar com restaurar_contexto
+    """
+    atual = _contexto.get()
+    novos = {chave: valor for chave, valor in campos.items() if valor is not None}
+    return _contexto.set({**atual, **novos})
+
+
+def restaurar_contexto(token):
+    _contexto.reset(token)
+
+
+def contexto_atual():
+    """Campos de contexto da tarefa atual (ex.: o tenant dono do código em execução)"""
+    return _contexto.get()
+
+
+class FiltroContexto(logging.Filter):
+    """Copia o contexto para o registro ainda na thread que logou (contextvars não atravessam a fila)"""
+
+    def filter(self, record):
+        for chave, valor in _contexto.get().items():
+            if not hasattr(record, chave):
+                setattr(record, chave, valor)
+        return True
+
+
+class FilaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que só resolve a mensagem na thread de origem;
+    formatação (JSON, traceback) fica toda com a thread de fundo
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro"""
+
+    def format(self, record):
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        for campo in CAMPOS_CONTEXTO:
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        if record.exc_info:
+            dados["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class ArquivoRotativo(logging.handlers.RotatingFileHandler):
+    """Rotaciona ao passar de max_bytes ou de `intervalo` segundos; os antigos viram .gz"""
+
+    def __init__(self, caminho, max_bytes, intervalo, backups):
+        super().__init__(caminho, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self.intervalo = intervalo
+        self.proxima_rotacao = time.time() + intervalo
+        self.namer = lambda nome: f"{nome}.gz"
+        self.rotator = _compactar
+
+    def shouldRollover(self, record):
+        if self.intervalo and time.time() >= self.proxima_rotacao:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.proxima_rotacao = time.time() + self.intervalo
+
+
+def _compactar(origem, destino):
+    with open(origem, "rb") as entrada, gzip.open(destino, "wb") as saida:
+        shutil.copyfileobj(entrada, saida)
+    os.remove(origem)
+
+
+def configurar_logging(deploy=False, diretorio="logs", nivel=logging.INFO,
+                       max_mb=10, rotacao_horas=24, backups=7):
+    """
+    Substitui os handlers do logger raiz por uma fila atendida por uma thread de fundo
+    Em deploy: JSON no stdout. Em desenvolvimento: JSON em arquivo rotacionado + texto no console
+    Returns:
+        O QueueListener (parar com .stop() no encerramento)
+    """
+    destinos = []
+    if deploy:
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(FormatadorJSON())
+        destinos.append(saida)
+    else:
+        os.makedirs(diretorio, exist_ok=True)
+        arquivo = ArquivoRotativo(
+            os.path.join(diretorio, "fenix_bot.log"),
+            max_bytes=int(max_mb * 1024 * 1024),
+            intervalo=rotacao_horas * 3600,
+            backups=backups
+        )
+        arquivo.setFormatter(FormatadorJSON())
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter(FORMATO_TEXTO))
+        destinos.extend((arquivo, console))
+
+    fila = queue.SimpleQueue()
+    handler = FilaHandler(fila)
+    handler.addFilter(FiltroContexto())
+
+    raiz = logging.getLogger()
+    for antigo in list(raiz.handlers):
+        raiz.removeHandler(antigo)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
+
+    ouvinte = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    ouvinte.start()
+    return ouvinte
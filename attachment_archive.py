@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Arquivo de Anexos - Guarda os anexos dos tickets antes do canal ser apagado
+Downloads concorrentes (limite global e por ticket) gravados em blocos direto no disco e
+armazenamento endereçado por hash: o mesmo arquivo enviado várias vezes é gravado uma única vez
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "arquivo_anexos" no config.json)
+LIMITES_PADRAO = {
+    "limite_global": 6,
+    "limite_por_ticket": 3,
+    "tamanho_maximo_mb": 25,
+}
+
+DIRETORIO_PADRAO = "transcripts/anexos"
+
+
+# Bloco lido da resposta por vez (memória por download fica neste tamanho, não no do arquivo)
+TAMANHO_BLOCO = 256 * 1024
+
+
+def _mover(temporario, caminho):
+    """
+    Move o download (já no disco) para o lugar definitivo, se o conteúdo ainda não existir
+    Quem perder a corrida (outro processo) só descarta a própria cópia: conta como duplicado
+    """
+    if os.path.exists(caminho):
+        os.remove(temporario)
+        return False
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    os.replace(temporario, caminho)
+    return True
+
+
+def _descartar(temporario):
+    try:
+        os.remove(temporario)
+    except FileNotFoundError:
+        pass
+
+
+class ArquivoAnexos:
+    """Baixa e deduplica anexos; o semáforo global é compartilhado por todos os tickets"""
+
+    def __init__(self, config=None, diretorio=DIRETORIO_PADRAO):
+        limites = dict(LIMITES_PADRAO, **(config or {}))
+        self.diretorio = diretorio
+        self.limite_por_ticket = limites["limite_por_ticket"]
+        self.tamanho_maximo = int(limites["tamanho_maximo_mb"] * 1024 * 1024)
+        self._global = asyncio.Semaphore(limites["limite_global"])
+        self._sessao = None
+        # caminho -> Future da gravação em andamento (o mesmo arquivo várias vezes no ticket)
+        self._gravando = {}
+        self.contadores = {"gravados": 0, "duplicados": 0, "ignorados": 0, "falhas": 0, "bytes_gravados": 0}
+
+    def caminho(self, digest):
+        """
+        transcripts/anexos/ab/abcdef... (prefixo evita diretório gigante)
+        Só o hash: o mesmo conteúdo como .png, .PNG ou .jpg é um arquivo só; o nome e a
+        extensão originais ficam no transcript
+        """
+        return os.path.join(self.diretorio, digest[:2], digest)
+
+    async def _baixar(self, anexo):
+        """
+        Baixa em blocos direto para um temporário, calculando o hash no caminho
+        Returns:
+            (temporário, digest, bytes)
+        """
+        if self._sessao is None or self._sessao.closed:
+            self._sessao = aiohttp.ClientSession()
+        os.makedirs(self.diretorio, exist_ok=True)
+        arquivo = tempfile.NamedTemporaryFile(dir=self.diretorio, suffix=".tmp", delete=False)
+        hash_conteudo = hashlib.sha256()
+        tamanho = 0
+        try:
+            async with self._sessao.get(anexo.url) as resposta:
+                resposta.raise_for_status()
+                async for bloco in resposta.content.iter_chunked(TAMANHO_BLOCO):
+                    tamanho += len(bloco)
+                    if tamanho > self.tamanho_maximo:
+                        raise ValueError(f"maior que {self.tamanho_maximo} bytes")
+                    hash_conteudo.update(bloco)
+                    await asyncio.to_thread(arquivo.write, bloco)
+            arquivo.close()
+        except BaseException:
+            arquivo.close()
+            _descartar(arquivo.name)
+            raise
+        return arquivo.name, hash_conteudo.hexdigest(), tamanho
+
+    async def _armazenar(self, temporario, digest):
+        """
+        Cópias iguais chegando juntas esperam a primeira gravação em vez de gravar de novo
+        Returns:
+            (caminho, True se este anexo gravou o arquivo)
+        """
+        caminho = self.caminho(digest)
+        pendente = self._gravando.get(caminho)
+        if pendente is not None:
+            try:
+                await asyncio.shield(pendente)
+            finally:
+                await asyncio.to_thread(_descartar, temporario)
+            return caminho, False
+
+        pendente = self._gravando[caminho] = asyncio.get_running_loop().create_future()
+        try:
+            novo = await asyncio.to_thread(_mover, temporario, caminho)
+            pendente.set_result(novo)
+            return caminho, novo
+        except Exception as e:
+            pendente.set_exception(e)
+            # Quem esperava recebe o erro; sem ninguém esperando a exceção não é "nunca lida"
+            pendente.exception()
+            _descartar(temporario)
+            raise
+        except BaseException:
+            pendente.cancel()
+            raise
+        finally:
+            del self._gravando[caminho]
+
+    async def _arquivar(self, anexo, sem_ticket):
+        if anexo.size > self.tamanho_maximo:
+            self.contadores["ignorados"] += 1
+            return None
+        async with sem_ticket, self._global:
+            try:
+                temporario, digest, tamanho = await self._baixar(anexo)
+            except Exception as e:
+                self.contadores["falhas"] += 1
+                logger.error(f"Erro ao baixar anexo {anexo.filename}: {e}")
+                return None
+
+        try:
+            caminho, novo = await self._armazenar(temporario, digest)
+        except OSError as e:
+            self.contadores["falhas"] += 1
+            logger.error(f"Erro ao gravar anexo {anexo.filename}: {e}")
+            return None
+        if novo:
+            self.contadores["gravados"] += 1
+            self.contadores["bytes_gravados"] += tamanho
+        else:
+            self.contadores["duplicados"] += 1
+        return caminho
+
+    def iniciar_ticket(self):
+        """
+        Retorna uma função que agenda o arquivamento de um anexo deste ticket
+        (as tasks começam na hora, enquanto o histórico ainda está sendo lido)
+        """
+        sem_ticket = asyncio.Semaphore(self.limite_por_ticket)
+
+        def agendar(anexo):
+            return asyncio.create_task(self._arquivar(anexo, sem_ticket))
+
+        return agendar
+
+    def estatisticas(self):
+        return dict(self.contadores)
+
+    async def fechar(self):
+        if self._sessao is not None:
+            await self._sessao.close()
+            self._sessao = None
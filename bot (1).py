@@ -10,28 +10,87 @@ from discord.ui import View, Button, Modal, TextInput
 import json
 import os
 import logging
-import asyncio
 from datetime import datetime
 
+from attachment_archive import ArquivoAnexos
+from bulk_close import criar_comando_fechar_tickets
+from close_jobs import FilaFechamento
+from config_reload import RecarregadorConfig
+from event_profiler import PerfilEventos
+from interaction_slo import MonitorPrazos, adiar, prazo_interacao, responder
+from invite_check import VerificadorConvites
+from memory_profile import CacheAutores, opcoes_cliente
+from overflow_categories import CategoriasTransbordo
+from panel_deploy import RegistroPaineis, criar_comando_paineis, hash_painel
+from provisioning_queue import FilaProvisionamento, classificar
+from replay_harness import iniciar_gravacao
+from rest_proxy import usar_proxy
+from ticket_analytics import AnaliseTickets, criar_comando_stats
+from ticket_index import IndiceTickets, barrar_duplicado, categorias_base
+from ticket_registry import RegistroTickets
+from scheduler import Agendador, MonitorInatividade
+from startup_reconcile import ReconciliacaoInicial
+from staff_assignment import DistribuidorAtendimento, avisar_atribuicoes, criar_comando_plantao
+from throttle import LimitadorInteracoes, VerificaLimite
+
 logger = logging.getLogger(__name__)
 
 class FenixBot(commands.Bot):
     """Bot Discord personalizado com funcionalidades de ticket"""
     
     def __init__(self):
+        self.config_file = "config.json"
+        self.config = self.load_config()
+
+        # REST opcionalmente por um proxy local com rate limit compartilhado
+        usar_proxy(self, self.config.get("proxy_rest") or os.getenv("BOT_PROXY_REST"))
+
         # Configuração de intents (sem privileged intents)
-        intents = discord.Intents.default()
         # Não usando message_content para evitar privileged intents
-        
+        # Intents e caches dependem do perfil de memória configurado
         super().__init__(
             command_prefix=os.getenv("BOT_PREFIX", "!"),
-            intents=intents,
-            help_command=None
+            help_command=None,
+            **opcoes_cliente(self.config)
         )
-        
-        self.config_file = "config.json"
-        self.config = self.load_config()
-        
+
+        self.cache_autores = CacheAutores(self.config.get("cache_autores", 500))
+        # Custo de parse por tipo de evento do gateway e descarte dos que ninguém trata
+        self.eventos = PerfilEventos(self, self.config.get("filtro_eventos"))
+        self.registro = RegistroTickets()
+        self.analise = AnaliseTickets()
+        self.analise.carregar()
+        self.indice_tickets = IndiceTickets(self.registro, self.analise)
+        self.transbordo = CategoriasTransbordo()
+        self.indice_tickets.carregar()
+        self.atendimento = DistribuidorAtendimento(self.registro)
+        self.atendimento.carregar()
+        self.paineis = RegistroPaineis()
+        self.paineis.carregar()
+        self.limitador = LimitadorInteracoes(self.config.get("limite_interacoes"))
+        self.prazos = MonitorPrazos(self.config.get("prazo_interacoes"))
+        # Criação de canais por classe de prioridade (fila justa ponderada)
+        self.provisionamento = FilaProvisionamento(self.config.get("prioridades"))
+        # Fechamentos em segundo plano, persistidos etapa a etapa (retomados após restart)
+        self.fechamentos = FilaFechamento(self, etapas_fechamento_duravel(self), config=self.config.get("fila_fechamento"))
+        self.fechamentos.carregar()
+        # Convites de parceria resolvidos (cache) e conferidos antes de gastar um canal
+        self.convites = VerificadorConvites(self, self.config.get("verificacao_parcerias"))
+        self.anexos = ArquivoAnexos(self.config.get("arquivo_anexos"))
+        # config.json é observado e recarregado sem reiniciar o bot
+        self.recarregador = RecarregadorConfig(self.config_file, lambda: self.config, self.aplicar_config)
+        # Etapa única de reparo após (re)iniciar: views, índice, contador e logs pendentes
+        self.reconciliacao = ReconciliacaoInicial(self)
+        # Gravação opcional da sessão (gateway + REST) para reprodução em benchmarks
+        self.gravador = iniciar_gravacao(self, self.config.get("gravacao") or os.getenv("BOT_GRAVACAO"))
+
+        # Timers de inatividade num único heap persistido
+        self.agendador = Agendador()
+        self.agendador.carregar()
+        self.inatividade = MonitorInatividade(self, self.agendador)
+        self.add_listener(self.inatividade.ao_mensagem, "on_message")
+        self.add_listener(self.analise.criar_listener(self), "on_message")
+
     def load_config(self):
         """Carrega configuração do arquivo JSON"""
         try:
@@ -63,12 +122,33 @@ class FenixBot(commands.Bot):
         except Exception as e:
             logger.error(f"Erro ao salvar configuração: {e}")
             
+    def aplicar_config(self, nova, mudancas):
+        """Troca o snapshot da configuração (chamado pelo recarregador)"""
+        self.config = nova
+        if "limite_interacoes" in mudancas:
+            self.limitador = LimitadorInteracoes(nova.get("limite_interacoes"))
+        if "prazo_interacoes" in mudancas:
+            self.prazos.configurar(nova.get("prazo_interacoes"))
+        if "prioridades" in mudancas:
+            self.provisionamento.configurar(nova.get("prioridades"))
+        if "filtro_eventos" in mudancas:
+            self.eventos.configurar(nova.get("filtro_eventos"))
+        if "fila_fechamento" in mudancas:
+            self.fechamentos.configurar(nova.get("fila_fechamento"))
+        if "verificacao_parcerias" in mudancas:
+            self.convites.configurar(nova.get("verificacao_parcerias"))
+
     async def setup_hook(self):
         """Configuração inicial do bot"""
         logger.info("Configurando bot...")
         
         # Adiciona comandos
         await self.setup_commands()
+
+        self.agendador.iniciar(self.inatividade.disparar)
+        self.recarregador.iniciar()
+        self.provisionamento.iniciar()
+        self.fechamentos.iniciar()
         
         # Sincroniza comandos slash
         try:
@@ -89,6 +169,47 @@ class FenixBot(commands.Bot):
         )
         await self.change_presence(activity=activity, status=discord.Status.online)
         logger.info("FenixBot está online e pronto!")
+
+        # Após restart, confere tickets, views e contador contra os canais que realmente existem
+        await self.reconciliacao.executar()
+
+    async def on_guild_channel_delete(self, channel):
+        """Libera o índice quando um canal de ticket é deletado"""
+        self.indice_tickets.remover_canal(channel.id)
+        self.atendimento.liberar(channel.id)
+        self.inatividade.cancelar(channel.id)
+        if channel.category is not None:
+            bases = categorias_base(self.config, channel.guild).values()
+            await self.transbordo.recolher(channel.category, bases)
+
+    async def fechar_ticket(self, canal, fechado_por, motivo=None):
+        """Fecha um ticket com transcript e log (sem interação): vira um job da fila de fechamento"""
+        self.fechamentos.enfileirar(canal, fechado_por, motivo)
+
+    def views_persistentes(self):
+        """Views registradas na inicialização: botões de mensagens antigas continuam funcionando"""
+        return [PainelInicial(), PainelTicket(None, None, self)]
+
+    async def recuperar_ticket(self, canal):
+        """Ticket criado logo antes de um crash, sem boas-vindas: reenvia o painel"""
+        await recuperar_ticket(self, canal)
+
+    async def reenviar_log(self, ticket):
+        """Log de fechamento que não chegou ao canal de logs"""
+        return await reenviar_log(self, ticket)
+
+    async def close(self):
+        """Grava os timers pendentes e o registro antes de desconectar"""
+        self.recarregador.parar()
+        self.provisionamento.parar()
+        self.fechamentos.parar()
+        await self.agendador.parar()
+        self.analise.parar()
+        await self.anexos.fechar()
+        await super().close()
+        if self.gravador:
+            self.gravador.fechar()
+        self.registro.fechar_conexao()
         
     async def on_error(self, event, *args, **kwargs):
         """Tratamento global de erros"""
@@ -102,7 +223,11 @@ class FenixBot(commands.Bot):
             return  # Ignora comandos não encontrados
             
         await ctx.send(f"❌ Ocorreu um erro: {str(error)}")
-        
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        """Guarda o autor da interação no cache limitado de membros"""
+        self.cache_autores.registrar(interaction.user)
+
     async def start(self):
         """Inicia o bot com o token do ambiente"""
         token = os.getenv("DISCORD_TOKEN")
@@ -115,7 +240,7 @@ class FenixBot(commands.Bot):
 # ===========================
 # Modal: Solicitar Produto
 # ===========================
-class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
+class ModalProduto(VerificaLimite, Modal, title="🎨 Solicitar Produto Personalizado"):
     nome_produto = TextInput(
         label="Nome do Produto",
         placeholder="Ex: Logo, Banner, Miniatura...",
@@ -139,10 +264,16 @@ class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
         self.user = user
         self.bot = bot
 
+    @prazo_interacao("modal_produto")
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "produto", reservar=True):
+            return
+
         try:
+            await adiar(interaction, ephemeral=True)
+
             guild = interaction.guild
             categoria_id = self.bot.config["categoria_produtos"]
             categoria = guild.get_channel(categoria_id) if categoria_id else None
@@ -158,11 +289,19 @@ class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
             self.bot.save_config()
 
             # Cria canal do ticket
-            canal = await guild.create_text_channel(
-                name=f"produto-{self.user.name}-{numero}",
-                category=categoria,
-                topic=f"Produto: {self.nome_produto.value} | Prazo: {self.prazo.value}"
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "produto"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"produto-{self.user.name}-{numero}",
+                    topic=f"Produto: {self.nome_produto.value} | Prazo: {self.prazo.value}"
+                )
             )
+            indice.registrar(guild.id, self.user.id, "produto", canal.id, numero=numero, respostas={
+                "produto": self.nome_produto.value,
+                "descricao": self.descricao.value,
+                "prazo": self.prazo.value
+            })
 
             # Configura permissões
             await canal.set_permissions(self.user, read_messages=True, send_messages=True)
@@ -190,6 +329,8 @@ class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
 
             view = PainelTicket(canal, self.user, self.bot)
             await canal.send(embed=embed_boas_vindas, view=view)
+            # Menciona o membro de plantão menos carregado
+            await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
 
             # Log do sistema
             await self._log_ticket(guild, "📦 Novo Pedido de Produto", canal, {
@@ -208,6 +349,8 @@ class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
                 "❌ Erro interno. Tente novamente ou contacte a administração.",
                 ephemeral=True
             )
+        finally:
+            indice.liberar_reserva(interaction.guild.id, self.user.id, "produto")
 
     async def _log_ticket(self, guild, title, canal, details):
         """Envia log do ticket"""
@@ -233,7 +376,7 @@ class ModalProduto(Modal, title="🎨 Solicitar Produto Personalizado"):
 # ===========================
 # Modal: Solicitar Parceria
 # ===========================
-class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
+class ModalParceria(VerificaLimite, Modal, title="🤝 Solicitar Parceria Oficial"):
     link_servidor = TextInput(
         label="Link do Servidor",
         placeholder="Cole aqui o convite do seu servidor...",
@@ -245,10 +388,16 @@ class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
         self.user = user
         self.bot = bot
 
+    @prazo_interacao("modal_parceria")
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "parceria", reservar=True):
+            return
+
         try:
+            await adiar(interaction, ephemeral=True)
+
             guild = interaction.guild
             categoria_id = self.bot.config["categoria_parcerias"]
             categoria = guild.get_channel(categoria_id) if categoria_id else None
@@ -259,15 +408,27 @@ class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
                     ephemeral=True
                 )
 
+            # Requisitos conferidos pelo convite antes de gastar um canal
+            aceito, motivo, convite = await self.bot.convites.verificar(self.link_servidor.value)
+            if not aceito:
+                return await interaction.followup.send(f"❌ Parceria não enviada: {motivo}.", ephemeral=True)
+
             numero = self.bot.config["ticket_counter"]
             self.bot.config["ticket_counter"] += 1
             self.bot.save_config()
 
-            canal = await guild.create_text_channel(
-                name=f"parceria-{self.user.name}-{numero}",
-                category=categoria,
-                topic=f"Parceria solicitada por {self.user}"
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "parceria"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"parceria-{self.user.name}-{numero}",
+                    topic=f"Parceria solicitada por {self.user}"
+                )
             )
+            indice.registrar(guild.id, self.user.id, "parceria", canal.id, numero=numero, respostas={
+                "link_servidor": self.link_servidor.value,
+                "membros": convite["membros"] if convite else None
+            })
 
             # Permissões
             await canal.set_permissions(self.user, read_messages=True, send_messages=True)
@@ -289,12 +450,20 @@ class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
                             "• Ambiente limpo e organizado",
                 color=0x5865F2
             )
+            if convite:
+                embed_boas_vindas.add_field(
+                    name="🔎 Convite verificado",
+                    value=f"**{convite['servidor']}** • ~{convite['membros']} membros",
+                    inline=False
+                )
             embed_boas_vindas.set_author(name="Fênix Bots", icon_url=guild.icon.url if guild.icon else None)
             embed_boas_vindas.set_footer(text="Fênix Bots • Subzin, Akashi & Santana © 2025")
             embed_boas_vindas.timestamp = discord.utils.utcnow()
 
             view = PainelTicket(canal, self.user, self.bot)
             await canal.send(embed=embed_boas_vindas, view=view)
+            # Menciona o membro de plantão menos carregado
+            await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
 
             # Log
             await self._log_parceria(guild, canal)
@@ -310,6 +479,8 @@ class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
                 "❌ Erro interno. Tente novamente ou contacte a administração.",
                 ephemeral=True
             )
+        finally:
+            indice.liberar_reserva(interaction.guild.id, self.user.id, "parceria")
 
     async def _log_parceria(self, guild, canal):
         """Envia log da parceria"""
@@ -333,17 +504,23 @@ class ModalParceria(Modal, title="🤝 Solicitar Parceria Oficial"):
 # ===========================
 # Botões do Painel Inicial
 # ===========================
-class PainelInicial(View):
+class PainelInicial(VerificaLimite, View):
     def __init__(self):
         super().__init__(timeout=None)
 
     @discord.ui.button(label="📦 Produtos", style=discord.ButtonStyle.primary, emoji="🎨", custom_id="produtos_btn")
+    @prazo_interacao("painel_produtos", auto_defer=False)
     async def produtos(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(interaction.client.indice_tickets, interaction, "produto"):
+            return
         modal = ModalProduto(interaction.user, interaction.client)
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="🤝 Parcerias", style=discord.ButtonStyle.success, emoji="💼", custom_id="parcerias_btn")
+    @prazo_interacao("painel_parcerias", auto_defer=False)
     async def parcerias(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(interaction.client.indice_tickets, interaction, "parceria"):
+            return
         modal = ModalParceria(interaction.user, interaction.client)
         await interaction.response.send_modal(modal)
 
@@ -351,7 +528,7 @@ class PainelInicial(View):
 # ===========================
 # Painel do Ticket (Fechar)
 # ===========================
-class PainelTicket(View):
+class PainelTicket(VerificaLimite, View):
     def __init__(self, channel, owner, bot):
         super().__init__(timeout=None)
         self.channel = channel
@@ -359,13 +536,15 @@ class PainelTicket(View):
         self.bot = bot
 
     @discord.ui.button(label="Fechar Ticket", style=discord.ButtonStyle.danger, emoji="❌", custom_id="fechar_ticket_btn")
+    @prazo_interacao("fechar_ticket")
     async def fechar(self, interaction: discord.Interaction, button: Button):
         if not interaction.user.guild_permissions.manage_channels:
             return await interaction.response.send_message(
                 "🚫 Apenas a equipe pode fechar este ticket.", ephemeral=True
             )
 
-        view = ConfirmarFechamento(self.channel, self.owner, self.bot)
+        # A instância persistente (registrada na inicialização) não conhece o canal
+        view = ConfirmarFechamento(self.channel or interaction.channel, self.owner, self.bot)
         await interaction.response.send_message(
             "⚠️ Tem certeza que deseja fechar este ticket?",
             view=view,
@@ -376,7 +555,7 @@ class PainelTicket(View):
 # ===========================
 # Confirmação de Fechamento
 # ===========================
-class ConfirmarFechamento(View):
+class ConfirmarFechamento(VerificaLimite, View):
     def __init__(self, channel, owner, bot):
         super().__init__(timeout=30)
         self.channel = channel
@@ -384,72 +563,156 @@ class ConfirmarFechamento(View):
         self.bot = bot
 
     @discord.ui.button(label="Sim", style=discord.ButtonStyle.danger, emoji="✅", custom_id="confirmar_fechamento")
+    @prazo_interacao("confirmar_fechamento")
     async def confirmar(self, interaction: discord.Interaction, button: Button):
-        try:
-            # Salvar transcript
-            mensagens = []
-            async for msg in self.channel.history(limit=100, oldest_first=True):
-                tempo = msg.created_at.strftime("%H:%M")
-                conteudo = msg.content or "(sem texto)"
-                if msg.attachments:
-                    conteudo += " [arquivo]"
-                mensagens.append(f"[{tempo}] {msg.author}: {conteudo}")
-
-            os.makedirs("transcripts", exist_ok=True)
-            caminho = f"transcripts/transcript-{self.channel.id}.txt"
-            with open(caminho, "w", encoding="utf-8") as f:
-                f.write(f"📁 TRANSCRIPT - {self.channel.name}\n")
-                f.write(f"Fechado por: {interaction.user}\n")
-                f.write(f"Data: {discord.utils.utcnow().strftime('%d/%m/%Y %H:%M')}\n\n")
-                f.write("\n".join(mensagens))
-
-            # Embed de fechamento
-            embed_fechado = discord.Embed(
-                title="🎫 Ticket Fechado",
-                description=f"O ticket foi fechado por {interaction.user.mention}.\n\n"
-                            "Se precisar de mais ajuda, abra um novo ticket!\n\n"
-                            "Agradecemos pela preferência! 🌟",
-                color=0x2ECC71
-            )
-            embed_fechado.set_footer(text="Fênix Bots • Subzin, Akashi & Santana © 2025")
-            embed_fechado.timestamp = discord.utils.utcnow()
-
-            # Enviar log
-            log_channel = interaction.guild.get_channel(self.bot.config["canal_logs"])
-            if log_channel:
-                try:
-                    with open(caminho, "rb") as f:
-                        file = discord.File(f)
-                        await log_channel.send(
-                            embed=discord.Embed(
-                                title="📁 Ticket Fechado",
-                                description=f"Canal: {self.channel.mention}\nFechado por: {interaction.user.mention}",
-                                color=0xFFD700
-                            ).set_footer(text="Fênix Bots • Tickets"),
-                            file=file
-                        )
-                except Exception as e:
-                    logger.error(f"Erro ao enviar transcript: {e}")
-
-            await interaction.response.send_message("✅ Ticket fechado!", ephemeral=True)
-            await self.channel.send(embed=embed_fechado)
-            
-            # Aguarda um pouco antes de deletar
-            await asyncio.sleep(3)
-            await self.channel.delete()
-            
-        except Exception as e:
-            logger.error(f"Erro ao fechar ticket: {e}")
-            await interaction.response.send_message(
-                "❌ Erro ao fechar ticket. Tente novamente.",
-                ephemeral=True
-            )
+        # Responde na hora; transcript, log e exclusão seguem como job (com retentativas)
+        if not self.bot.fechamentos.enfileirar(self.channel, interaction.user):
+            return await responder(interaction, "⏳ Este ticket já está sendo fechado.", ephemeral=True)
+        await responder(interaction, "✅ Fechando o ticket: o transcript será salvo e o canal apagado em instantes.", ephemeral=True)
 
     @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.secondary, emoji="❌", custom_id="cancelar_fechamento")
+    @prazo_interacao("cancelar_fechamento")
     async def cancelar(self, interaction: discord.Interaction, button: Button):
         await interaction.response.send_message("✅ Fechamento cancelado.", ephemeral=True)
 
 
+# ===========================
+# Fechamento de Ticket
+# ===========================
+async def salvar_transcript(canal, fechado_por, anexos=None):
+    """
+    Salva o histórico do canal em transcripts/ e retorna o caminho
+    Com `anexos` (ArquivoAnexos), os arquivos são baixados em paralelo à leitura do histórico
+    e o transcript aponta para as cópias guardadas
+    """
+    agendar = anexos.iniciar_ticket() if anexos else None
+    historico = []
+    async for msg in canal.history(limit=100, oldest_first=True):
+        tarefas = [(a, agendar(a)) for a in msg.attachments] if agendar else []
+        historico.append((msg, tarefas))
+
+    mensagens = []
+    for msg, tarefas in historico:
+        tempo = msg.created_at.strftime("%H:%M")
+        conteudo = msg.content or "(sem texto)"
+        if tarefas:
+            for anexo, tarefa in tarefas:
+                guardado = await tarefa
+                if guardado:
+                    conteudo += f" [arquivo: {anexo.filename} -> {os.path.relpath(guardado, 'transcripts')}]"
+                else:
+                    conteudo += f" [arquivo: {anexo.filename} (não arquivado)]"
+        elif msg.attachments:
+            conteudo += " [arquivo]"
+        mensagens.append(f"[{tempo}] {msg.author}: {conteudo}")
+
+    os.makedirs("transcripts", exist_ok=True)
+    caminho = f"transcripts/transcript-{canal.id}.txt"
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(f"📁 TRANSCRIPT - {canal.name}\n")
+        f.write(f"Fechado por: {fechado_por}\n")
+        f.write(f"Data: {discord.utils.utcnow().strftime('%d/%m/%Y %H:%M')}\n\n")
+        f.write("\n".join(mensagens))
+    return caminho
+
+
+async def publicar_log_fechamento(bot, canal, fechado_por, caminho):
+    """Envia o transcript para o canal de logs (erros sobem para quem chamou)"""
+    log_channel = canal.guild.get_channel(bot.config["canal_logs"])
+    if log_channel:
+        with open(caminho, "rb") as f:
+            file = discord.File(f)
+            await log_channel.send(
+                embed=discord.Embed(
+                    title="📁 Ticket Fechado",
+                    description=f"Canal: {canal.mention}\nFechado por: {fechado_por.mention}",
+                    color=0xFFD700
+                ).set_footer(text="Fênix Bots • Tickets"),
+                file=file
+            )
+        bot.registro.marcar_log(canal.id, caminho)
+
+
+async def recuperar_ticket(bot, canal):
+    """Painel de fechamento para ticket sem estado após reinicialização"""
+    dono = bot.indice_tickets.dono(canal.id)
+    embed = discord.Embed(
+        title="🎫 Ticket Recuperado",
+        description="Este ticket foi aberto pouco antes de uma reinicialização do bot.\n"
+                    "A equipe continuará o atendimento por aqui.",
+        color=0x5865F2
+    )
+    embed.set_footer(text="Fênix Bots • Sistema de Tickets")
+    await canal.send(content=f"<@{dono}>" if dono else None, embed=embed, view=PainelTicket(canal, None, bot))
+
+
+async def reenviar_log(bot, ticket):
+    """
+    Reenvia o log de um ticket fechado cujo envio falhou (o canal já foi apagado)
+    Returns:
+        True se enviado; False se não há transcript salvo (ex.: canal apagado à mão)
+    """
+    caminho = ticket["transcript"] or f"transcripts/transcript-{ticket['channel_id']}.txt"
+    guild = bot.get_guild(ticket["guild_id"])
+    log_channel = guild.get_channel(bot.config["canal_logs"]) if guild else None
+    if log_channel is None or not os.path.exists(caminho):
+        return False
+    fechado_por = f"<@{ticket['fechado_por']}>" if ticket["fechado_por"] else "desconhecido"
+    with open(caminho, "rb") as f:
+        await log_channel.send(
+            embed=discord.Embed(
+                title="📁 Ticket Fechado",
+                description=f"Ticket: {ticket['tipo']} #{ticket['numero'] or ticket['channel_id']}\n"
+                            f"Fechado por: {fechado_por}\n*(log reenviado após reinicialização)*",
+                color=0xFFD700
+            ).set_footer(text="Fênix Bots • Tickets"),
+            file=discord.File(f)
+        )
+    bot.registro.marcar_log(ticket["channel_id"], caminho)
+    return True
+
+
+async def apagar_ticket(bot, canal, fechado_por):
+    """Registra quem fechou e deleta o canal"""
+    bot.registro.fechar(canal.id, fechado_por.id)
+    await canal.delete(reason=f"Ticket fechado por {fechado_por}")
+
+
+async def avisar_fechamento(canal, fechado_por, motivo=None):
+    """Envia o embed de fechamento no canal do ticket"""
+    if motivo:
+        fechado = f"O ticket foi fechado automaticamente por {motivo}."
+    else:
+        fechado = f"O ticket foi fechado por {fechado_por.mention}."
+    embed_fechado = discord.Embed(
+        title="🎫 Ticket Fechado",
+        description=f"{fechado}\n\n"
+                    "Se precisar de mais ajuda, abra um novo ticket!\n\n"
+                    "Agradecemos pela preferência! 🌟",
+        color=0x2ECC71
+    )
+    embed_fechado.set_footer(text="Fênix Bots • Subzin, Akashi & Santana © 2025")
+    embed_fechado.timestamp = discord.utils.utcnow()
+    await canal.send(embed=embed_fechado)
+
+
+def etapas_fechamento_duravel(bot):
+    """Etapas do job de fechamento (close_jobs); o atraso antes de apagar dá tempo de ler o aviso"""
+    async def transcript(canal, fechado_por, job):
+        return {"caminho": await salvar_transcript(canal, fechado_por, bot.anexos)}
+
+    async def log(canal, fechado_por, job):
+        await publicar_log_fechamento(bot, canal, fechado_por, job["dados"]["caminho"])
+
+    async def aviso(canal, fechado_por, job):
+        await avisar_fechamento(canal, fechado_por, job["motivo"])
+
+    async def apagar(canal, fechado_por, job):
+        await apagar_ticket(bot, canal, fechado_por)
+
+    return [("transcript", transcript, 0), ("log", log, 0), ("aviso", aviso, 0), ("apagar", apagar, 3)]
+
+
 # ===========================
 # Comandos de Configuração
 # ===========================
@@ -496,31 +759,40 @@ async def config_bot(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 
+def renderizar_painel(guild):
+    """Embed + view do painel de tickets (usado por !painel e pela implantação)"""
+    embed = discord.Embed(
+        title="🎫 Sistema de Tickets - Fênix Bots",
+        description="Bem-vindo ao nosso sistema de atendimento!\n\n"
+                    "🎨 **Produtos Personalizados**\n"
+                    "Solicite logos, banners, miniaturas e outros designs!\n\n"
+                    "🤝 **Parcerias Oficiais**\n"
+                    "Interesse em fazer parceria conosco?\n\n"
+                    "Clique nos botões abaixo para abrir um ticket:",
+        color=0x5865F2
+    )
+    embed.set_author(name="Fênix Bots", icon_url=guild.icon.url if guild.icon else None)
+    embed.set_thumbnail(url="https://i.imgur.com/KeVqZJX.png")
+    embed.set_footer(text="Fênix Bots • Subzin, Akashi & Santana © 2025")
+    return embed, PainelInicial()
+
+
 # Adiciona comandos ao bot
 async def add_commands(bot):
     """Adiciona comandos ao bot"""
+    bot.tree.add_command(criar_comando_fechar_tickets(bot))
+    bot.tree.add_command(criar_comando_paineis(bot))
+    bot.tree.add_command(criar_comando_stats(bot))
+    bot.tree.add_command(criar_comando_plantao(bot))
     bot.add_command(config_bot)
     
     @bot.command(name="painel")
     @commands.has_permissions(administrator=True)
     async def criar_painel(ctx):
         """Cria o painel de tickets"""
-        embed = discord.Embed(
-            title="🎫 Sistema de Tickets - Fênix Bots",
-            description="Bem-vindo ao nosso sistema de atendimento!\n\n"
-                        "🎨 **Produtos Personalizados**\n"
-                        "Solicite logos, banners, miniaturas e outros designs!\n\n"
-                        "🤝 **Parcerias Oficiais**\n"
-                        "Interesse em fazer parceria conosco?\n\n"
-                        "Clique nos botões abaixo para abrir um ticket:",
-            color=0x5865F2
-        )
-        embed.set_author(name="Fênix Bots", icon_url=ctx.guild.icon.url if ctx.guild.icon else None)
-        embed.set_thumbnail(url="https://i.imgur.com/KeVqZJX.png")
-        embed.set_footer(text="Fênix Bots • Subzin, Akashi & Santana © 2025")
-        
-        view = PainelInicial()
-        await ctx.send(embed=embed, view=view)
+        embed, view = renderizar_painel(ctx.guild)
+        mensagem = await ctx.send(embed=embed, view=view)
+        bot.paineis.registrar(ctx.guild.id, mensagem, hash_painel(embed, view))
         
     # Comandos de configuração
     @bot.command(name="set_categoria_produtos")
@@ -553,3 +825,4 @@ async def add_commands(bot):
 
 # Adiciona método à classe FenixBot
 FenixBot.setup_commands = lambda self: add_commands(self)
+FenixBot.renderizar_painel = lambda self, guild: renderizar_painel(guild)
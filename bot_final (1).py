@@ -11,13 +11,32 @@ import os
 import logging
 import asyncio
 
+from bulk_close import criar_comando_fechar_tickets
+from config_reload import RecarregadorConfig
+from event_profiler import PerfilEventos
+from interaction_slo import MonitorPrazos, adiar, prazo_interacao
+from invite_check import VerificadorConvites
+from memory_profile import CacheAutores, opcoes_cliente
+from overflow_categories import CategoriasTransbordo
+from panel_deploy import RegistroPaineis, criar_comando_paineis, publicar_painel
+from provisioning_queue import FilaProvisionamento, classificar
+from replay_harness import iniciar_gravacao
+from rest_proxy import usar_proxy
+from ticket_analytics import AnaliseTickets, criar_comando_stats
+from ticket_index import IndiceTickets, barrar_duplicado, categorias_base
+from ticket_registry import RegistroTickets
+from scheduler import Agendador, MonitorInatividade
+from startup_reconcile import ReconciliacaoInicial
+from staff_assignment import DistribuidorAtendimento, avisar_atribuicoes, criar_comando_plantao
+from throttle import LimitadorInteracoes, VerificaLimite
+
 logger = logging.getLogger(__name__)
 
 class FenixBotFinal(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.default()
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
-        
+    def __init__(self, diretorio=".", token=None, conector=None):
+        # Diretório de estado do tenant (config, registro, painéis...) e token; padrão = modo de um bot só
+        self.diretorio = diretorio
+        self.token = token
         self.config = {
             "categoria_produtos": None,
             "categoria_parcerias": None,
@@ -25,10 +44,55 @@ class FenixBotFinal(commands.Bot):
         }
         self.load_config()
         
+        # REST opcionalmente por um proxy local com rate limit compartilhado
+        usar_proxy(self, self.config.get("proxy_rest") or os.getenv("BOT_PROXY_REST"))
+
+        # Intents e caches dependem do perfil de memória configurado
+        super().__init__(command_prefix="!", help_command=None, **opcoes_cliente(self.config))
+        if conector is not None:
+            # Pool HTTP compartilhado entre os tenants do processo
+            self.http.connector = conector
+        self.cache_autores = CacheAutores(self.config.get("cache_autores", 500))
+        # Custo de parse por tipo de evento do gateway e descarte dos que ninguém trata
+        self.eventos = PerfilEventos(self, self.config.get("filtro_eventos"))
+        self.registro = RegistroTickets(self.caminho("tickets.db"))
+        self.analise = AnaliseTickets(self.caminho("analise.json"))
+        self.analise.carregar()
+        self.indice_tickets = IndiceTickets(self.registro, self.analise)
+        self.transbordo = CategoriasTransbordo()
+        self.indice_tickets.carregar()
+        self.atendimento = DistribuidorAtendimento(self.registro, self.caminho("plantao.json"))
+        self.atendimento.carregar()
+        self.paineis = RegistroPaineis(self.caminho("paineis.json"))
+        self.paineis.carregar()
+        self.limitador = LimitadorInteracoes(self.config.get("limite_interacoes"))
+        self.prazos = MonitorPrazos(self.config.get("prazo_interacoes"))
+        # Criação de canais por classe de prioridade (fila justa ponderada)
+        self.provisionamento = FilaProvisionamento(self.config.get("prioridades"))
+        # Convites de parceria resolvidos (cache) e conferidos antes de gastar um canal
+        self.convites = VerificadorConvites(self, self.config.get("verificacao_parcerias"))
+        # Etapa única de reparo após (re)iniciar: views, índice e contador
+        self.reconciliacao = ReconciliacaoInicial(self)
+        # config.json é observado e recarregado sem reiniciar o bot
+        self.recarregador = RecarregadorConfig(self.caminho("config.json"), lambda: self.config, self.aplicar_config)
+        # Gravação opcional da sessão (gateway + REST) para reprodução em benchmarks
+        self.gravador = iniciar_gravacao(self, self.config.get("gravacao") or os.getenv("BOT_GRAVACAO"))
+
+        # Timers de inatividade num único heap persistido
+        self.agendador = Agendador(self.caminho("agendador.json"))
+        self.agendador.carregar()
+        self.inatividade = MonitorInatividade(self, self.agendador)
+        self.add_listener(self.inatividade.ao_mensagem, "on_message")
+        self.add_listener(self.analise.criar_listener(self), "on_message")
+        
+    def caminho(self, arquivo):
+        """Arquivo de estado dentro do diretório do tenant"""
+        return os.path.join(self.diretorio, arquivo)
+        
     def load_config(self):
         try:
-            if os.path.exists("config.json"):
-                with open("config.json", "r", encoding="utf-8") as f:
+            if os.path.exists(self.caminho("config.json")):
+                with open(self.caminho("config.json"), "r", encoding="utf-8") as f:
                     self.config = json.load(f)
                     logger.info("Config carregada")
         except:
@@ -36,11 +100,78 @@ class FenixBotFinal(commands.Bot):
         
     def save_config(self):
         try:
-            with open("config.json", "w", encoding="utf-8") as f:
+            with open(self.caminho("config.json"), "w", encoding="utf-8") as f:
                 json.dump(self.config, f, indent=2)
         except:
             pass
             
+    def aplicar_config(self, nova, mudancas):
+        """Troca o snapshot da configuração (chamado pelo recarregador)"""
+        self.config = nova
+        if "limite_interacoes" in mudancas:
+            self.limitador = LimitadorInteracoes(nova.get("limite_interacoes"))
+        if "prazo_interacoes" in mudancas:
+            self.prazos.configurar(nova.get("prazo_interacoes"))
+        if "prioridades" in mudancas:
+            self.provisionamento.configurar(nova.get("prioridades"))
+        if "filtro_eventos" in mudancas:
+            self.eventos.configurar(nova.get("filtro_eventos"))
+        if "verificacao_parcerias" in mudancas:
+            self.convites.configurar(nova.get("verificacao_parcerias"))
+
+    def renderizar_painel(self, guild):
+        """Embed + view do painel de tickets (usado por /painel e pela implantação)"""
+        embed = discord.Embed(
+            title="🌟 FÊNIX BOTS - SISTEMA DE ATENDIMENTO",
+            description="═══════════════════════════════════\n\n"
+                       "**🎯 NOSSOS SERVIÇOS PREMIUM**\n\n"
+                       "🎨 **PRODUTOS PERSONALIZADOS**\n"
+                       "┣ 🖼️ Logos profissionais\n"
+                       "┣ 🎬 Banners para YouTube/Twitch\n"
+                       "┣ 📸 Thumbnails chamativas\n"
+                       "┣ 🎭 Avatars únicos\n"
+                       "┗ 🎪 Designs exclusivos\n\n"
+                       "🤝 **PARCERIAS ESTRATÉGICAS**\n"
+                       "┣ 💼 Parcerias comerciais\n"
+                       "┣ 🌐 Cross-promotion\n"
+                       "┣ 🚀 Colaborações especiais\n"
+                       "┗ 📈 Crescimento mútuo\n\n"
+                       "═══════════════════════════════════\n"
+                       "**📞 PRONTO PARA COMEÇAR?**\n"
+                       "Clique nos botões abaixo para abrir seu atendimento:",
+            color=0x00D4FF
+        )
+        embed.set_author(
+            name="Fênix Bots - Atendimento Premium", 
+            icon_url="https://cdn.discordapp.com/emojis/1234567890123456789.png"
+        )
+        embed.set_thumbnail(url="https://i.imgur.com/KeVqZJX.png")
+        embed.add_field(
+            name="⚡ ATENDIMENTO RÁPIDO", 
+            value="Resposta em até 24h", 
+            inline=True
+        )
+        embed.add_field(
+            name="🎨 QUALIDADE PREMIUM", 
+            value="Designs profissionais", 
+            inline=True
+        )
+        embed.add_field(
+            name="💰 PREÇOS JUSTOS", 
+            value="Valores acessíveis", 
+            inline=True
+        )
+        embed.set_footer(
+            text="Fênix Bots © 2025 • Subzin, Akashi & Santana • Qualidade Garantida ✨",
+            icon_url="https://i.imgur.com/KeVqZJX.png"
+        )
+        embed.timestamp = discord.utils.utcnow()
+        return embed, PainelView(self)
+
+    def views_persistentes(self):
+        """Views registradas na inicialização: botões de painéis antigos continuam funcionando"""
+        return [PainelView(self)]
+
     async def setup_hook(self):
         logger.info("Configurando bot final...")
         
@@ -73,57 +204,19 @@ class FenixBotFinal(commands.Bot):
             if not self.config["categoria_produtos"] or not self.config["categoria_parcerias"]:
                 return await interaction.response.send_message("❌ Configure primeiro com `/setup`!", ephemeral=True)
                 
-            embed = discord.Embed(
-                title="🌟 FÊNIX BOTS - SISTEMA DE ATENDIMENTO",
-                description="═══════════════════════════════════\n\n"
-                           "**🎯 NOSSOS SERVIÇOS PREMIUM**\n\n"
-                           "🎨 **PRODUTOS PERSONALIZADOS**\n"
-                           "┣ 🖼️ Logos profissionais\n"
-                           "┣ 🎬 Banners para YouTube/Twitch\n"
-                           "┣ 📸 Thumbnails chamativas\n"
-                           "┣ 🎭 Avatars únicos\n"
-                           "┗ 🎪 Designs exclusivos\n\n"
-                           "🤝 **PARCERIAS ESTRATÉGICAS**\n"
-                           "┣ 💼 Parcerias comerciais\n"
-                           "┣ 🌐 Cross-promotion\n"
-                           "┣ 🚀 Colaborações especiais\n"
-                           "┗ 📈 Crescimento mútuo\n\n"
-                           "═══════════════════════════════════\n"
-                           "**📞 PRONTO PARA COMEÇAR?**\n"
-                           "Clique nos botões abaixo para abrir seu atendimento:",
-                color=0x00D4FF
-            )
-            embed.set_author(
-                name="Fênix Bots - Atendimento Premium", 
-                icon_url="https://cdn.discordapp.com/emojis/1234567890123456789.png"
-            )
-            embed.set_thumbnail(url="https://i.imgur.com/KeVqZJX.png")
-            embed.add_field(
-                name="⚡ ATENDIMENTO RÁPIDO", 
-                value="Resposta em até 24h", 
-                inline=True
-            )
-            embed.add_field(
-                name="🎨 QUALIDADE PREMIUM", 
-                value="Designs profissionais", 
-                inline=True
-            )
-            embed.add_field(
-                name="💰 PREÇOS JUSTOS", 
-                value="Valores acessíveis", 
-                inline=True
-            )
-            embed.set_footer(
-                text="Fênix Bots © 2025 • Subzin, Akashi & Santana • Qualidade Garantida ✨",
-                icon_url="https://i.imgur.com/KeVqZJX.png"
-            )
-            embed.timestamp = discord.utils.utcnow()
-            
-            view = PainelView(self)
-            await interaction.response.send_message(embed=embed, view=view)
+            embed, view = self.renderizar_painel(interaction.guild)
+            await publicar_painel(self, interaction, embed, view)
             
         self.tree.add_command(setup_cmd)
         self.tree.add_command(painel_cmd)
+        self.tree.add_command(criar_comando_paineis(self))
+        self.tree.add_command(criar_comando_fechar_tickets(self))
+        self.tree.add_command(criar_comando_stats(self))
+        self.tree.add_command(criar_comando_plantao(self))
+        
+        self.agendador.iniciar(self.inatividade.disparar)
+        self.recarregador.iniciar()
+        self.provisionamento.iniciar()
         
         try:
             synced = await self.tree.sync()
@@ -144,14 +237,53 @@ class FenixBotFinal(commands.Bot):
             status=discord.Status.online
         )
         
+        # Após restart, confere tickets, views e contador contra os canais que realmente existem
+        await self.reconciliacao.executar()
+        
+    async def on_guild_channel_delete(self, channel):
+        self.indice_tickets.remover_canal(channel.id)
+        self.atendimento.liberar(channel.id)
+        self.inatividade.cancelar(channel.id)
+        if channel.category is not None:
+            bases = categorias_base(self.config, channel.guild).values()
+            await self.transbordo.recolher(channel.category, bases)
+        
+    async def fechar_ticket(self, canal, fechado_por, motivo=None):
+        """Esta versão não gera transcript: avisa e apaga o canal"""
+        aviso = f"automaticamente por {motivo}" if motivo else f"por {fechado_por.mention}"
+        await canal.send(f"🔒 Ticket fechado {aviso}. Obrigado pelo contato!")
+        await asyncio.sleep(3)
+        await self.apagar_ticket(canal, fechado_por)
+        
+    async def apagar_ticket(self, canal, fechado_por):
+        self.registro.fechar(canal.id, fechado_por.id)
+        await canal.delete(reason=f"Ticket fechado por {fechado_por}")
+        
+    def etapas_fechamento(self, fechado_por):
+        """Sem transcript nesta versão: o fechamento em massa só apaga os canais"""
+        return None, None, lambda canal: self.apagar_ticket(canal, fechado_por)
+        
+    async def close(self):
+        self.recarregador.parar()
+        self.provisionamento.parar()
+        await self.agendador.parar()
+        self.analise.parar()
+        await super().close()
+        if self.gravador:
+            self.gravador.fechar()
+        self.registro.fechar_conexao()
+        
+    async def on_interaction(self, interaction: discord.Interaction):
+        self.cache_autores.registrar(interaction.user)
+        
     async def start(self):
-        token = os.getenv("DISCORD_TOKEN")
+        token = self.token or os.getenv("DISCORD_TOKEN")
         if not token:
             raise ValueError("Token não encontrado")
         await super().start(token, reconnect=True)
 
 
-class PainelView(View):
+class PainelView(VerificaLimite, View):
     def __init__(self, bot):
         super().__init__(timeout=None)
         self.bot = bot
@@ -162,7 +294,10 @@ class PainelView(View):
         custom_id="btn_produtos",
         emoji="🎨"
     )
+    @prazo_interacao("painel_produtos", auto_defer=False)
     async def produtos_btn(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(self.bot.indice_tickets, interaction, "produto"):
+            return
         modal = ProdutoModal(self.bot)
         await interaction.response.send_modal(modal)
 
@@ -172,7 +307,10 @@ class PainelView(View):
         custom_id="btn_parcerias",
         emoji="🤝"
     )
+    @prazo_interacao("painel_parcerias", auto_defer=False)
     async def parcerias_btn(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(self.bot.indice_tickets, interaction, "parceria"):
+            return
         modal = ParceriaModal(self.bot)
         await interaction.response.send_modal(modal)
         
@@ -182,6 +320,7 @@ class PainelView(View):
         custom_id="btn_portfolio",
         emoji="📊"
     )
+    @prazo_interacao("painel_portfolio")
     async def portfolio_btn(self, interaction: discord.Interaction, button: Button):
         embed = discord.Embed(
             title="📊 PORTFÓLIO FÊNIX BOTS",
@@ -201,7 +340,7 @@ class PainelView(View):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
-class ProdutoModal(Modal, title="🎨 Produto Personalizado"):
+class ProdutoModal(VerificaLimite, Modal, title="🎨 Produto Personalizado"):
     produto = TextInput(label="Produto", placeholder="Ex: Logo, Banner, Thumbnail")
     detalhes = TextInput(label="Detalhes", style=discord.TextStyle.long, placeholder="Descreva o que deseja...")
     prazo = TextInput(label="Prazo", placeholder="Ex: 3 dias")
@@ -210,24 +349,41 @@ class ProdutoModal(Modal, title="🎨 Produto Personalizado"):
         super().__init__()
         self.bot = bot
 
+    @prazo_interacao("modal_produto")
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        
-        guild = interaction.guild
-        categoria = guild.get_channel(self.bot.config["categoria_produtos"])
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "produto", reservar=True):
+            return
         
-        if not categoria:
-            return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
+        try:
+            await adiar(interaction, ephemeral=True)
+            
+            guild = interaction.guild
+            categoria = guild.get_channel(self.bot.config["categoria_produtos"])
+            
+            if not categoria:
+                return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
 
-        # Cria ticket
-        numero = self.bot.config["ticket_counter"]
-        self.bot.config["ticket_counter"] += 1
-        self.bot.save_config()
+            # Cria ticket
+            numero = self.bot.config["ticket_counter"]
+            self.bot.config["ticket_counter"] += 1
+            self.bot.save_config()
 
-        canal = await guild.create_text_channel(
-            name=f"produto-{interaction.user.name}-{numero}",
-            category=categoria
-        )
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "produto"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"produto-{interaction.user.name}-{numero}"
+                )
+            )
+            indice.registrar(guild.id, interaction.user.id, "produto", canal.id, numero=numero, respostas={
+                "produto": self.produto.value,
+                "detalhes": self.detalhes.value,
+                "prazo": self.prazo.value
+            })
+        finally:
+            indice.liberar_reserva(interaction.guild.id, interaction.user.id, "produto")
 
         # Permissões
         await canal.set_permissions(interaction.user, read_messages=True, send_messages=True)
@@ -260,19 +416,27 @@ class ProdutoModal(Modal, title="🎨 Produto Personalizado"):
         welcome_msg = f"🎉 **Bem-vindo ao atendimento Premium!** {interaction.user.mention}\n\n💎 **Obrigado por escolher a Fênix Bots!** Nossa equipe especializada já foi notificada e em breve entrará em contato para dar início ao seu projeto exclusivo!"
         
         await canal.send(welcome_msg, embed=embed)
+        # Menciona o membro de plantão menos carregado
+        await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
         await interaction.followup.send(f"✅ Ticket criado: {canal.mention}", ephemeral=True)
 
 
-class ParceriaModal(Modal, title="🤝 Parceria Oficial"):
+class ParceriaModal(VerificaLimite, Modal, title="🤝 Parceria Oficial"):
     servidor = TextInput(label="Link do Servidor", placeholder="Cole o convite do seu servidor")
 
     def __init__(self, bot):
         super().__init__()
         self.bot = bot
 
+    @prazo_interacao("modal_parceria")
     async def on_submit(self, interaction: discord.Interaction):
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "parceria", reservar=True):
+            return
+            
         try:
-            await interaction.response.defer(ephemeral=True)
+            await adiar(interaction, ephemeral=True)
             
             guild = interaction.guild
             categoria = guild.get_channel(self.bot.config["categoria_parcerias"])
@@ -280,15 +444,27 @@ class ParceriaModal(Modal, title="🤝 Parceria Oficial"):
             if not categoria:
                 return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
 
+            # Requisitos conferidos pelo convite antes de gastar um canal
+            aceito, motivo, convite = await self.bot.convites.verificar(self.servidor.value)
+            if not aceito:
+                return await interaction.followup.send(f"❌ Parceria não enviada: {motivo}.", ephemeral=True)
+
             # Cria ticket
             numero = self.bot.config["ticket_counter"]
             self.bot.config["ticket_counter"] += 1
             self.bot.save_config()
 
-            canal = await guild.create_text_channel(
-                name=f"parceria-{interaction.user.name}-{numero}",
-                category=categoria
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "parceria"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"parceria-{interaction.user.name}-{numero}"
+                )
             )
+            indice.registrar(guild.id, interaction.user.id, "parceria", canal.id, numero=numero, respostas={
+                "servidor": self.servidor.value,
+                "membros": convite["membros"] if convite else None
+            })
 
             # Permissões
             await canal.set_permissions(interaction.user, read_messages=True, send_messages=True)
@@ -317,6 +493,12 @@ class ParceriaModal(Modal, title="🤝 Parceria Oficial"):
             )
             embed.set_author(name="Departamento de Parcerias - Fênix Bots", icon_url="https://i.imgur.com/KeVqZJX.png")
             embed.set_thumbnail(url=interaction.user.display_avatar.url)
+            if convite:
+                embed.add_field(
+                    name="🔎 CONVITE VERIFICADO",
+                    value=f"**{convite['servidor']}** • ~{convite['membros']} membros",
+                    inline=False
+                )
             embed.add_field(
                 name="🚀 BENEFÍCIOS DA PARCERIA", 
                 value="• Cross-promotion nos servidores\n• Divulgação mútua de conteúdo\n• Eventos colaborativos\n• Crescimento conjunto da comunidade", 
@@ -328,8 +510,12 @@ class ParceriaModal(Modal, title="🤝 Parceria Oficial"):
             welcome_msg = f"🤝 **Solicitação de Parceria Recebida!** {interaction.user.mention}\n\n🌟 **Agradecemos seu interesse em fazer parceria conosco!** Nossa equipe de parcerias analisará seu servidor e entrará em contato em breve com feedback detalhado."
             
             await canal.send(welcome_msg, embed=embed)
+            # Menciona o membro de plantão menos carregado
+            await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
             await interaction.followup.send(f"✅ Ticket criado: {canal.mention}", ephemeral=True)
             
         except Exception as e:
             logger.error(f"Erro ao criar ticket de parceria: {e}")
-            await interaction.followup.send("❌ Erro ao criar ticket. Tente novamente!", ephemeral=True)
\ No newline at end of file
+            await interaction.followup.send("❌ Erro ao criar ticket. Tente novamente!", ephemeral=True)
+        finally:
+            indice.liberar_reserva(interaction.guild.id, interaction.user.id, "parceria")
\ No newline at end of file
@@ -13,24 +13,62 @@ import logging
 import asyncio
 from datetime import datetime
 
+from config_reload import RecarregadorConfig
+from event_profiler import PerfilEventos
+from interaction_slo import MonitorPrazos, adiar, prazo_interacao
+from invite_check import VerificadorConvites
+from memory_profile import CacheAutores, opcoes_cliente
+from overflow_categories import CategoriasTransbordo
+from panel_deploy import RegistroPaineis, criar_comando_paineis, publicar_painel
+from provisioning_queue import FilaProvisionamento, classificar
+from rest_proxy import usar_proxy
+from startup_reconcile import ReconciliacaoInicial
+from ticket_index import IndiceTickets, barrar_duplicado, categorias_base
+from ticket_registry import RegistroTickets
+from staff_assignment import DistribuidorAtendimento, avisar_atribuicoes, criar_comando_plantao
+from throttle import LimitadorInteracoes, VerificaLimite
+
 logger = logging.getLogger(__name__)
 
 class FenixBotSimples(commands.Bot):
     """Bot Discord simplificado"""
     
     def __init__(self):
-        # Intents básicos apenas
-        intents = discord.Intents.default()
-        
+        self.config_file = "config.json"
+        self.config = self.load_config()
+
+        # REST opcionalmente por um proxy local com rate limit compartilhado
+        usar_proxy(self, self.config.get("proxy_rest") or os.getenv("BOT_PROXY_REST"))
+
+        # Intents básicos apenas (ou reduzidos no perfil de memória "baixo")
         super().__init__(
             command_prefix="$",  # Prefix diferente para evitar conflitos
-            intents=intents,
-            help_command=None
+            help_command=None,
+            **opcoes_cliente(self.config)
         )
-        
-        self.config_file = "config.json"
-        self.config = self.load_config()
-        
+
+        self.cache_autores = CacheAutores(self.config.get("cache_autores", 500))
+        # Custo de parse por tipo de evento do gateway e descarte dos que ninguém trata
+        self.eventos = PerfilEventos(self, self.config.get("filtro_eventos"))
+        self.registro = RegistroTickets()
+        self.indice_tickets = IndiceTickets(self.registro)
+        self.transbordo = CategoriasTransbordo()
+        self.indice_tickets.carregar()
+        self.atendimento = DistribuidorAtendimento(self.registro)
+        self.atendimento.carregar()
+        self.paineis = RegistroPaineis()
+        self.paineis.carregar()
+        self.limitador = LimitadorInteracoes(self.config.get("limite_interacoes"))
+        self.prazos = MonitorPrazos(self.config.get("prazo_interacoes"))
+        # Criação de canais por classe de prioridade (fila justa ponderada)
+        self.provisionamento = FilaProvisionamento(self.config.get("prioridades"))
+        # Convites de parceria resolvidos (cache) e conferidos antes de gastar um canal
+        self.convites = VerificadorConvites(self, self.config.get("verificacao_parcerias"))
+        # Etapa única de reparo após (re)iniciar: views, índice e contador
+        self.reconciliacao = ReconciliacaoInicial(self)
+        # config.json é observado e recarregado sem reiniciar o bot
+        self.recarregador = RecarregadorConfig(self.config_file, lambda: self.config, self.aplicar_config)
+
     def load_config(self):
         """Carrega configuração do arquivo JSON"""
         try:
@@ -62,6 +100,39 @@ class FenixBotSimples(commands.Bot):
         except Exception as e:
             logger.error(f"Erro ao salvar configuração: {e}")
             
+    def aplicar_config(self, nova, mudancas):
+        """Troca o snapshot da configuração (chamado pelo recarregador)"""
+        self.config = nova
+        if "limite_interacoes" in mudancas:
+            self.limitador = LimitadorInteracoes(nova.get("limite_interacoes"))
+        if "prazo_interacoes" in mudancas:
+            self.prazos.configurar(nova.get("prazo_interacoes"))
+        if "prioridades" in mudancas:
+            self.provisionamento.configurar(nova.get("prioridades"))
+        if "filtro_eventos" in mudancas:
+            self.eventos.configurar(nova.get("filtro_eventos"))
+        if "verificacao_parcerias" in mudancas:
+            self.convites.configurar(nova.get("verificacao_parcerias"))
+
+    def renderizar_painel(self, guild):
+        """Embed + view do painel de tickets (usado por /painel e pela implantação)"""
+        embed = discord.Embed(
+            title="🎫 Sistema de Tickets - Fênix Bots",
+            description="Bem-vindo ao sistema de atendimento!\n\n"
+                       "🎨 **Produtos Personalizados**\n"
+                       "Logos, banners, miniaturas e designs!\n\n"
+                       "🤝 **Parcerias Oficiais**\n"
+                       "Parcerias com nosso servidor!\n\n"
+                       "Clique nos botões para abrir ticket:",
+            color=0x5865F2
+        )
+        embed.set_footer(text="Fênix Bots • 2025")
+        return embed, PainelTickets(self)
+
+    def views_persistentes(self):
+        """Views registradas na inicialização: botões de painéis antigos continuam funcionando"""
+        return [PainelTickets(self)]
+
     async def setup_hook(self):
         """Configuração inicial do bot"""
         logger.info("Configurando bot simples...")
@@ -117,20 +188,8 @@ class FenixBotSimples(commands.Bot):
         @discord.app_commands.command(name="painel", description="Cria painel de tickets")
         @discord.app_commands.default_permissions(administrator=True)
         async def painel_cmd(interaction: discord.Interaction):
-            embed = discord.Embed(
-                title="🎫 Sistema de Tickets - Fênix Bots",
-                description="Bem-vindo ao sistema de atendimento!\n\n"
-                           "🎨 **Produtos Personalizados**\n"
-                           "Logos, banners, miniaturas e designs!\n\n"
-                           "🤝 **Parcerias Oficiais**\n"
-                           "Parcerias com nosso servidor!\n\n"
-                           "Clique nos botões para abrir ticket:",
-                color=0x5865F2
-            )
-            embed.set_footer(text="Fênix Bots • 2025")
-            
-            view = PainelTickets(self)
-            await interaction.response.send_message(embed=embed, view=view)
+            embed, view = self.renderizar_painel(interaction.guild)
+            await publicar_painel(self, interaction, embed, view)
         
         # Adiciona comandos à árvore
         self.tree.add_command(config_cmd)
@@ -138,6 +197,11 @@ class FenixBotSimples(commands.Bot):
         self.tree.add_command(set_parcerias)
         self.tree.add_command(set_logs)
         self.tree.add_command(painel_cmd)
+        self.tree.add_command(criar_comando_paineis(self))
+        self.tree.add_command(criar_comando_plantao(self))
+
+        self.recarregador.iniciar()
+        self.provisionamento.iniciar()
         
         # Sincroniza comandos
         try:
@@ -157,7 +221,29 @@ class FenixBotSimples(commands.Bot):
         )
         await self.change_presence(activity=activity, status=discord.Status.online)
         logger.info("FenixBot simples está online!")
-        
+
+        # Após restart, confere tickets, views e contador contra os canais que realmente existem
+        await self.reconciliacao.executar()
+
+    async def on_guild_channel_delete(self, channel):
+        """Libera o índice quando um canal de ticket é deletado"""
+        self.indice_tickets.remover_canal(channel.id)
+        self.atendimento.liberar(channel.id)
+        if channel.category is not None:
+            bases = categorias_base(self.config, channel.guild).values()
+            await self.transbordo.recolher(channel.category, bases)
+
+    async def close(self):
+        """Fecha o registro de tickets após desconectar"""
+        self.recarregador.parar()
+        self.provisionamento.parar()
+        await super().close()
+        self.registro.fechar_conexao()
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        """Guarda o autor da interação no cache limitado de membros"""
+        self.cache_autores.registrar(interaction.user)
+
     async def start(self):
         """Inicia o bot"""
         token = os.getenv("DISCORD_TOKEN")
@@ -168,23 +254,29 @@ class FenixBotSimples(commands.Bot):
 
 
 # Views e Modals
-class PainelTickets(View):
+class PainelTickets(VerificaLimite, View):
     def __init__(self, bot):
         super().__init__(timeout=None)
         self.bot = bot
 
     @discord.ui.button(label="📦 Produtos", style=discord.ButtonStyle.primary, custom_id="produtos_btn")
+    @prazo_interacao("painel_produtos", auto_defer=False)
     async def produtos(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(self.bot.indice_tickets, interaction, "produto"):
+            return
         modal = ModalProdutoSimples(interaction.user, self.bot)
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label="🤝 Parcerias", style=discord.ButtonStyle.success, custom_id="parcerias_btn")
+    @prazo_interacao("painel_parcerias", auto_defer=False)
     async def parcerias(self, interaction: discord.Interaction, button: Button):
+        if await barrar_duplicado(self.bot.indice_tickets, interaction, "parceria"):
+            return
         modal = ModalParceriaSimples(interaction.user, self.bot)
         await interaction.response.send_modal(modal)
 
 
-class ModalProdutoSimples(Modal, title="🎨 Solicitar Produto"):
+class ModalProdutoSimples(VerificaLimite, Modal, title="🎨 Solicitar Produto"):
     nome = TextInput(label="Nome do Produto", placeholder="Ex: Logo, Banner...", required=True)
     descricao = TextInput(label="Descrição", style=discord.TextStyle.long, required=True)
     prazo = TextInput(label="Prazo", placeholder="Ex: 3 dias", required=True)
@@ -194,28 +286,45 @@ class ModalProdutoSimples(Modal, title="🎨 Solicitar Produto"):
         self.user = user
         self.bot = bot
 
+    @prazo_interacao("modal_produto")
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        
-        guild = interaction.guild
-        categoria_id = self.bot.config["categoria_produtos"]
-        
-        if not categoria_id:
-            return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "produto", reservar=True):
+            return
+
+        try:
+            await adiar(interaction, ephemeral=True)
             
-        categoria = guild.get_channel(categoria_id)
-        if not categoria:
-            return await interaction.followup.send("❌ Categoria inválida!", ephemeral=True)
-
-        numero = self.bot.config["ticket_counter"]
-        self.bot.config["ticket_counter"] += 1
-        self.bot.save_config()
-
-        # Cria canal
-        canal = await guild.create_text_channel(
-            name=f"produto-{self.user.name}-{numero}",
-            category=categoria
-        )
+            guild = interaction.guild
+            categoria_id = self.bot.config["categoria_produtos"]
+            
+            if not categoria_id:
+                return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
+                
+            categoria = guild.get_channel(categoria_id)
+            if not categoria:
+                return await interaction.followup.send("❌ Categoria inválida!", ephemeral=True)
+
+            numero = self.bot.config["ticket_counter"]
+            self.bot.config["ticket_counter"] += 1
+            self.bot.save_config()
+
+            # Cria canal
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "produto"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"produto-{self.user.name}-{numero}"
+                )
+            )
+            indice.registrar(guild.id, self.user.id, "produto", canal.id, numero=numero, respostas={
+                "produto": self.nome.value,
+                "descricao": self.descricao.value,
+                "prazo": self.prazo.value
+            })
+        finally:
+            indice.liberar_reserva(interaction.guild.id, self.user.id, "produto")
 
         # Permissões
         await canal.set_permissions(self.user, read_messages=True, send_messages=True)
@@ -231,10 +340,12 @@ class ModalProdutoSimples(Modal, title="🎨 Solicitar Produto"):
             color=0xFF5733
         )
         await canal.send(embed=embed)
+        # Menciona o membro de plantão menos carregado
+        await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
         await interaction.followup.send(f"✅ Ticket criado: {canal.mention}", ephemeral=True)
 
 
-class ModalParceriaSimples(Modal, title="🤝 Solicitar Parceria"):
+class ModalParceriaSimples(VerificaLimite, Modal, title="🤝 Solicitar Parceria"):
     servidor = TextInput(label="Link do Servidor", required=True)
 
     def __init__(self, user, bot):
@@ -242,28 +353,49 @@ class ModalParceriaSimples(Modal, title="🤝 Solicitar Parceria"):
         self.user = user
         self.bot = bot
 
+    @prazo_interacao("modal_parceria")
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-        
-        guild = interaction.guild
-        categoria_id = self.bot.config["categoria_parcerias"]
-        
-        if not categoria_id:
-            return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
+        # Duplicado é barrado antes de qualquer chamada REST
+        indice = self.bot.indice_tickets
+        if await barrar_duplicado(indice, interaction, "parceria", reservar=True):
+            return
+
+        try:
+            await adiar(interaction, ephemeral=True)
             
-        categoria = guild.get_channel(categoria_id)
-        if not categoria:
-            return await interaction.followup.send("❌ Categoria inválida!", ephemeral=True)
-
-        numero = self.bot.config["ticket_counter"]
-        self.bot.config["ticket_counter"] += 1
-        self.bot.save_config()
-
-        # Cria canal
-        canal = await guild.create_text_channel(
-            name=f"parceria-{self.user.name}-{numero}",
-            category=categoria
-        )
+            guild = interaction.guild
+            categoria_id = self.bot.config["categoria_parcerias"]
+            
+            if not categoria_id:
+                return await interaction.followup.send("❌ Categoria não configurada!", ephemeral=True)
+                
+            categoria = guild.get_channel(categoria_id)
+            if not categoria:
+                return await interaction.followup.send("❌ Categoria inválida!", ephemeral=True)
+
+            # Requisitos conferidos pelo convite antes de gastar um canal
+            aceito, motivo, convite = await self.bot.convites.verificar(self.servidor.value)
+            if not aceito:
+                return await interaction.followup.send(f"❌ Parceria não enviada: {motivo}.", ephemeral=True)
+
+            numero = self.bot.config["ticket_counter"]
+            self.bot.config["ticket_counter"] += 1
+            self.bot.save_config()
+
+            # Cria canal
+            canal = await self.bot.provisionamento.executar(
+                classificar(self.bot.config, interaction.user, "parceria"),
+                lambda: self.bot.transbordo.criar_canal(
+                    categoria,
+                    name=f"parceria-{self.user.name}-{numero}"
+                )
+            )
+            indice.registrar(guild.id, self.user.id, "parceria", canal.id, numero=numero, respostas={
+                "servidor": self.servidor.value,
+                "membros": convite["membros"] if convite else None
+            })
+        finally:
+            indice.liberar_reserva(interaction.guild.id, self.user.id, "parceria")
 
         # Permissões
         await canal.set_permissions(self.user, read_messages=True, send_messages=True)
@@ -277,5 +409,9 @@ class ModalParceriaSimples(Modal, title="🤝 Solicitar Parceria"):
                        "Aguarde análise da equipe!",
             color=0x5865F2
         )
+        if convite:
+            embed.add_field(name="Convite verificado", value=f"{convite['servidor']} • ~{convite['membros']} membros")
         await canal.send(embed=embed)
+        # Menciona o membro de plantão menos carregado
+        await avisar_atribuicoes(guild, [(canal.id, self.bot.atendimento.atribuir(guild.id, canal.id))])
         await interaction.followup.send(f"✅ Ticket criado: {canal.mention}", ephemeral=True)
\ No newline at end of file
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Fechamento em Massa - Comando de staff para fechar vários tickets de uma vez
+Bots com fila de fechamento (close_jobs) recebem os canais como jobs duráveis; nos demais
+transcript, upload do log e exclusão rodam como pipeline com concorrência limitada
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+import discord
+
+from overflow_categories import categorias_relacionadas
+
+logger = logging.getLogger(__name__)
+
+# Concorrência máxima por etapa (o discord.py já espera os buckets de rate limit;
+# estes limites evitam disparar centenas de requisições ao mesmo tempo)
+LIMITES_PADRAO = {"transcript": 3, "log": 2, "apagar": 2}
+
+# Intervalo mínimo entre atualizações da mensagem de progresso
+INTERVALO_PROGRESSO = 2
+
+
+class PipelineFechamento:
+    """
+    Fecha canais em três etapas com semáforos independentes
+    Args:
+        exportar: coroutine(canal) -> caminho do transcript (ou None para pular)
+        enviar_log: coroutine(canal, caminho) que levanta se o upload falhar (ou None para pular)
+        apagar: coroutine(canal)
+    """
+
+    def __init__(self, exportar, enviar_log, apagar, limites=None):
+        self.exportar = exportar
+        self.enviar_log = enviar_log
+        self.apagar = apagar
+        limites = dict(LIMITES_PADRAO, **(limites or {}))
+        self._sem_transcript = asyncio.Semaphore(limites["transcript"])
+        self._sem_log = asyncio.Semaphore(limites["log"])
+        self._sem_apagar = asyncio.Semaphore(limites["apagar"])
+        self._trabalhadores = sum(limites.values())
+        self.progresso = {"total": 0, "transcritos": 0, "logados": 0, "apagados": 0, "falhas": 0}
+
+    async def _processar(self, canal):
+        caminho = None
+        if self.exportar:
+            async with self._sem_transcript:
+                caminho = await self.exportar(canal)
+            self.progresso["transcritos"] += 1
+        if self.enviar_log:
+            async with self._sem_log:
+                await self.enviar_log(canal, caminho)
+            self.progresso["logados"] += 1
+        async with self._sem_apagar:
+            await self.apagar(canal)
+        self.progresso["apagados"] += 1
+
+    async def executar(self, canais, ao_progresso=None):
+        """
+        Processa todos os canais; falhas não apagam o canal (transcript preservado)
+        As etapas precisam levantar o erro: uma etapa que só registra a falha deixaria apagar
+        """
+        fila = asyncio.Queue()
+        for canal in canais:
+            fila.put_nowait(canal)
+        self.progresso["total"] = fila.qsize()
+
+        async def trabalhador():
+            while not fila.empty():
+                canal = fila.get_nowait()
+                try:
+                    await self._processar(canal)
+                except Exception as e:
+                    self.progresso["falhas"] += 1
+                    logger.error(f"Erro ao fechar {canal.name} em massa: {e}")
+                if ao_progresso:
+                    await ao_progresso(dict(self.progresso))
+
+        await asyncio.gather(*(trabalhador() for _ in range(min(self._trabalhadores, fila.qsize()))))
+        return self.progresso
+
+
+def filtrar_tickets(bot, guild, categoria=None, idade_horas=None, dono=None, inativo_horas=None):
+    """Seleciona os tickets abertos do servidor que casam com todos os filtros (sem REST)"""
+    agora = discord.utils.utcnow()
+    # A categoria base vale também para as de transbordo ("Produtos 2", "Produtos 3"...)
+    categorias = {c.id for c in categorias_relacionadas(guild, categoria)} if categoria else None
+    selecionados = []
+    for channel_id in bot.indice_tickets.canais():
+        canal = guild.get_channel(channel_id)
+        if canal is None:
+            continue
+        if categorias and canal.category_id not in categorias:
+            continue
+        if idade_horas and agora - canal.created_at < timedelta(hours=idade_horas):
+            continue
+        if dono and bot.indice_tickets.dono(channel_id) != dono.id:
+            continue
+        if inativo_horas:
+            ultima = discord.utils.snowflake_time(canal.last_message_id) if canal.last_message_id else canal.created_at
+            if agora - ultima < timedelta(hours=inativo_horas):
+                continue
+        selecionados.append(canal)
+    return selecionados
+
+
+def _texto_progresso(progresso, concluido=False):
+    titulo = "✅ Fechamento em massa concluído" if concluido else "⏳ Fechando tickets..."
+    return (f"{titulo}\n"
+            f"Total: **{progresso['total']}** • Transcripts: **{progresso['transcritos']}** • "
+            f"Logs: **{progresso['logados']}** • Apagados: **{progresso['apagados']}** • "
+            f"Falhas: **{progresso['falhas']}**")
+
+
+def criar_comando_fechar_tickets(bot):
+    """Cria o slash command /fechar_tickets usando as etapas de fechamento do bot"""
+
+    @discord.app_commands.command(name="fechar_tickets", description="Fecha em massa os tickets que casam com os filtros")
+    @discord.app_commands.default_permissions(manage_channels=True)
+    @discord.app_commands.describe(
+        categoria="Só tickets desta categoria (e das de transbordo dela)",
+        idade_horas="Abertos há pelo menos N horas",
+        dono="Só tickets deste usuário",
+        inativo_horas="Sem mensagens há pelo menos N horas"
+    )
+    async def fechar_tickets(
+        interaction: discord.Interaction,
+        categoria: discord.CategoryChannel = None,
+        idade_horas: int = None,
+        dono: discord.User = None,
+        inativo_horas: int = None
+    ):
+        if not any((categoria, idade_horas, dono, inativo_horas)):
+            return await interaction.response.send_message(
+                "❌ Informe pelo menos um filtro (categoria, idade, dono ou inatividade).", ephemeral=True
+            )
+
+        canais = filtrar_tickets(bot, interaction.guild, categoria, idade_horas, dono, inativo_horas)
+        if not canais:
+            return await interaction.response.send_message("ℹ️ Nenhum ticket encontrado com esses filtros.", ephemeral=True)
+
+        fila = getattr(bot, "fechamentos", None)
+        if fila is not None:
+            # Mesmo caminho do botão fechar: retentativas, retomada após restart e um job por canal
+            novos = fila.enfileirar_lote(canais, interaction.user)
+            logger.info(f"{interaction.user} enfileirou {novos} de {len(canais)} ticket(s) para fechamento em massa")
+            ja_pendentes = len(canais) - novos
+            return await interaction.response.send_message(
+                f"✅ {novos} ticket(s) na fila de fechamento"
+                + (f" ({ja_pendentes} já estavam sendo fechados)" if ja_pendentes else "")
+                + ". O progresso aparece em `fechamentos` no /status.",
+                ephemeral=True
+            )
+
+        await interaction.response.send_message(f"⏳ Fechando {len(canais)} ticket(s)...", ephemeral=True)
+        logger.info(f"{interaction.user} iniciou fechamento em massa de {len(canais)} ticket(s)")
+
+        ultima_atualizacao = 0
+
+        async def ao_progresso(progresso):
+            nonlocal ultima_atualizacao
+            if time.monotonic() - ultima_atualizacao < INTERVALO_PROGRESSO:
+                return
+            ultima_atualizacao = time.monotonic()
+            try:
+                await interaction.edit_original_response(content=_texto_progresso(progresso))
+            except discord.HTTPException:
+                pass
+
+        exportar, enviar_log, apagar = bot.etapas_fechamento(interaction.user)
+        pipeline = PipelineFechamento(exportar, enviar_log, apagar, bot.config.get("limites_fechamento_massa"))
+        progresso = await pipeline.executar(canais, ao_progresso)
+        try:
+            await interaction.edit_original_response(content=_texto_progresso(progresso, concluido=True))
+        except discord.HTTPException:
+            # Token da interação expira em 15 minutos; o resultado fica no log
+            logger.info(_texto_progresso(progresso, concluido=True))
+
+    return fechar_tickets
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Fila de Fechamento - Fechamentos de ticket como jobs persistidos e executados em segundo plano
+Cada job percorre as etapas do bot (transcript, log, aviso, exclusão) gravando o progresso
+a cada etapa concluída: falhas são repetidas com backoff e um restart retoma de onde parou
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+
+import discord
+
+from ticket_index import salvar_json_atomico
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "fila_fechamento" no config.json)
+FILA_FECHAMENTO_PADRAO = {
+    "concorrencia": 3,          # jobs executando ao mesmo tempo
+    "tentativas": 6,            # por etapa, antes de o job ser marcado como falho
+    "espera_base_s": 5,         # backoff exponencial: base * 2^(tentativa-1), com jitter
+    "espera_max_s": 300,
+    "retencao_falhos_s": 86400,  # job falho fica listado no status por esse tempo e depois é descartado
+}
+
+# Latências guardadas para os percentis do status
+AMOSTRAS_LATENCIA = 200
+
+
+class FilaFechamento:
+    """
+    Jobs persistidos em JSON (canal -> job); um job por canal
+    Args:
+        etapas: lista ordenada de (nome, coroutine(canal, fechado_por, job), atraso_s);
+                o dict retornado pela etapa é guardado em job["dados"] e o atraso é
+                esperado antes da etapa, fora dos slots de concorrência
+    """
+
+    def __init__(self, bot, etapas, arquivo="fechamentos.json", config=None):
+        self.bot = bot
+        self.etapas = etapas
+        self.arquivo = arquivo
+        self._jobs = {}
+        self._fila = None
+        self._task = None
+        self._esperas = {}
+        self._executando = set()
+        self.concluidos = 0
+        self.retentativas = 0
+        self._latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.configurar(config)
+
+    def configurar(self, config=None):
+        """Aplica as opções (a concorrência nova vale a partir do próximo início)"""
+        self.opcoes = dict(FILA_FECHAMENTO_PADRAO, **(config or {}))
+
+    def carregar(self):
+        """Carrega jobs pendentes (sobrevivem a restarts do BotManager)"""
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    self._jobs = {int(canal): job for canal, job in json.load(f).items()}
+                self._podar()
+                pendentes = sum(1 for job in self._jobs.values() if job["estado"] == "pendente")
+                logger.info(f"Fila de fechamento carregada: {pendentes} job(s) pendente(s)")
+        except Exception as e:
+            logger.error(f"Erro ao carregar fila de fechamento: {e}")
+
+    def _podar(self):
+        """Descarta jobs falhos fora da retenção (o arquivo não cresce para sempre)"""
+        limite = time.time() - self.opcoes["retencao_falhos_s"]
+        vencidos = [canal for canal, job in self._jobs.items()
+                    if job["estado"] == "falhou" and job.get("falhou_em", job["criado_em"]) < limite]
+        for canal in vencidos:
+            del self._jobs[canal]
+        if vencidos:
+            logger.info(f"{len(vencidos)} fechamento(s) falho(s) descartado(s) após a retenção")
+
+    def salvar(self):
+        self._podar()
+        try:
+            salvar_json_atomico(self.arquivo, {str(canal): job for canal, job in self._jobs.items()})
+        except Exception as e:
+            logger.error(f"Erro ao salvar fila de fechamento: {e}")
+
+    def pendente(self, channel_id):
+        job = self._jobs.get(channel_id)
+        return job is not None and job["estado"] == "pendente"
+
+    def enfileirar(self, canal, fechado_por, motivo=None, salvar=True):
+        """
+        Grava o job e o coloca na fila (retorno imediato)
+        Args:
+            salvar: False quando quem chama grava uma vez só no fim (ex.: enfileirar_lote)
+        Returns:
+            False se o canal já tem um fechamento pendente
+        """
+        if self.pendente(canal.id):
+            return False
+        agora = time.time()
+        self._jobs[canal.id] = {
+            "canal": canal.id,
+            "guild": canal.guild.id,
+            "fechado_por": fechado_por.id,
+            "motivo": motivo,
+            "etapa": 0,
+            "tentativas": 0,
+            "estado": "pendente",
+            "criado_em": agora,
+            "proxima_em": agora,
+            "erro": None,
+            "dados": {},
+        }
+        if salvar:
+            self.salvar()
+        if self._fila is not None:
+            self._fila.put_nowait(canal.id)
+        return True
+
+    def enfileirar_lote(self, canais, fechado_por, motivo=None):
+        """
+        Vários canais de uma vez (fechamento em massa) com uma única gravação do arquivo
+        Returns:
+            Quantos jobs novos entraram (canais já pendentes são ignorados)
+        """
+        novos = sum(1 for canal in canais if self.enfileirar(canal, fechado_por, motivo, salvar=False))
+        if novos:
+            self.salvar()
+        return novos
+
+    def iniciar(self):
+        """Inicia os trabalhadores (esperam o cache do bot ficar pronto)"""
+        self._fila = asyncio.Queue()
+        self._task = asyncio.create_task(self._executar())
+
+    def parar(self):
+        for espera in self._esperas.values():
+            espera.cancel()
+        self._esperas.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.salvar()
+
+    async def _executar(self):
+        # Antes do READY get_channel devolve None e o job pareceria de um canal apagado
+        await self.bot.wait_until_ready()
+        for channel_id, job in self._jobs.items():
+            if job["estado"] == "pendente":
+                self._agendar(channel_id, job["proxima_em"])
+        trabalhadores = [asyncio.create_task(self._trabalhador()) for _ in range(self.opcoes["concorrencia"])]
+        try:
+            await asyncio.gather(*trabalhadores)
+        finally:
+            for trabalhador in trabalhadores:
+                trabalhador.cancel()
+
+    def _agendar(self, channel_id, quando):
+        if channel_id in self._esperas:
+            return
+        espera = quando - time.time()
+        if espera <= 0:
+            self._fila.put_nowait(channel_id)
+            return
+
+        def liberar():
+            self._esperas.pop(channel_id, None)
+            self._fila.put_nowait(channel_id)
+
+        self._esperas[channel_id] = asyncio.get_running_loop().call_later(espera, liberar)
+
+    async def _trabalhador(self):
+        while True:
+            channel_id = await self._fila.get()
+            job = self._jobs.get(channel_id)
+            # Entradas repetidas na fila (enfileirado antes do READY, retentativa agendada) são ignoradas
+            if (job is None or job["estado"] != "pendente" or channel_id in self._executando
+                    or job["proxima_em"] > time.time()):
+                continue
+            self._executando.add(channel_id)
+            try:
+                await self._processar(job)
+            except Exception as e:
+                logger.error(f"Erro inesperado no job de fechamento {channel_id}: {e}")
+            finally:
+                self._executando.discard(channel_id)
+
+    async def _usuario(self, guild, user_id):
+        usuario = (guild.get_member(user_id) if guild else None) or self.bot.get_user(user_id)
+        if usuario is None:
+            try:
+                usuario = await self.bot.fetch_user(user_id)
+            except discord.NotFound:
+                # Conta apagada: o fechamento segue em nome do próprio bot
+                usuario = self.bot.user
+        return usuario
+
+    async def _processar(self, job):
+        canal = self.bot.get_channel(job["canal"])
+        if canal is None:
+            # Apagado por fora enquanto o job esperava: nada mais a fazer
+            logger.info(f"Canal {job['canal']} já não existe; fechamento encerrado")
+            return self._concluir(job)
+
+        while job["etapa"] < len(self.etapas):
+            nome, etapa, _ = self.etapas[job["etapa"]]
+            try:
+                fechado_por = await self._usuario(canal.guild, job["fechado_por"])
+                dados = await etapa(canal, fechado_por, job)
+            except discord.NotFound as e:
+                # 404 de outro recurso (ex.: canal de logs) não encerra o job: só o canal do ticket sumindo
+                if nome == "apagar" or self.bot.get_channel(job["canal"]) is None:
+                    logger.info(f"Canal {job['canal']} apagado durante a etapa '{nome}'; fechamento encerrado")
+                    return self._concluir(job)
+                return self._falhar(job, nome, e)
+            except Exception as e:
+                return self._falhar(job, nome, e)
+
+            job["dados"].update(dados or {})
+            job["etapa"] += 1
+            job["tentativas"] = 0
+            job["erro"] = None
+            # Atraso da próxima etapa (ex.: tempo para ler o aviso antes de apagar) sem ocupar o trabalhador
+            atraso = self.etapas[job["etapa"]][2] if job["etapa"] < len(self.etapas) else 0
+            if atraso:
+                job["proxima_em"] = time.time() + atraso
+                self.salvar()
+                return self._agendar(job["canal"], job["proxima_em"])
+            self.salvar()
+
+        self._concluir(job)
+
+    def _falhar(self, job, nome, erro):
+        job["tentativas"] += 1
+        job["erro"] = f"{nome}: {erro}"
+        if job["tentativas"] >= self.opcoes["tentativas"]:
+            job["estado"] = "falhou"
+            job["falhou_em"] = time.time()
+            self.salvar()
+            logger.error(f"Fechamento do canal {job['canal']} falhou na etapa '{nome}' "
+                         f"após {job['tentativas']} tentativa(s): {erro}")
+            return
+        espera = min(self.opcoes["espera_max_s"], self.opcoes["espera_base_s"] * 2 ** (job["tentativas"] - 1))
+        espera *= random.uniform(0.8, 1.2)
+        job["proxima_em"] = time.time() + espera
+        self.retentativas += 1
+        self.salvar()
+        logger.warning(f"Etapa '{nome}' do fechamento do canal {job['canal']} falhou ({erro}); "
+                       f"tentativa {job['tentativas'] + 1} em {espera:.0f}s")
+        self._agendar(job["canal"], job["proxima_em"])
+
+    def _concluir(self, job):
+        self._jobs.pop(job["canal"], None)
+        self.concluidos += 1
+        self._latencias.append(time.time() - job["criado_em"])
+        self.salvar()
+
+    def estatisticas(self):
+        jobs = list(self._jobs.values())
+        pendentes = [job for job in jobs if job["estado"] == "pendente"]
+        ordenadas = sorted(self._latencias)
+
+        def percentil(fracao):
+            if not ordenadas:
+                return None
+            return round(ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))], 1)
+
+        return {
+            "pendentes": len(pendentes),
+            "em_execucao": len(self._executando),
+            "aguardando_retentativa": sum(1 for job in pendentes if job["tentativas"]),
+            "falhos": [{"canal": job["canal"], "erro": job["erro"]} for job in jobs if job["estado"] == "falhou"][:10],
+            "concluidos": self.concluidos,
+            "retentativas": self.retentativas,
+            "mais_antigo_s": round(time.time() - min(job["criado_em"] for job in pendentes)) if pendentes else 0,
+            "latencia_p50_s": percentil(0.5),
+            "latencia_p95_s": percentil(0.95),
+        }
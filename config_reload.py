@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Recarga da Configuração - Observa o config.json e aplica mudanças sem reiniciar
+Usa inotify quando disponível (Linux) e cai para polling; a leitura e a validação
+rodam fora do loop e o snapshot novo substitui o antigo numa única atribuição
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+# Chaves de ID que precisam ser inteiro ou null
+CHAVES_ID = ("categoria_produtos", "categoria_parcerias", "canal_logs", "cargo_staff")
+
+# Seções que precisam ser objetos
+CHAVES_SECAO = ("limite_interacoes", "auto_fechamento", "limites_fechamento_massa", "prazo_interacoes",
+                "prioridades", "implantacao_paineis", "reconciliacao",
+                "filtro_eventos", "verificacao_parcerias", "fila_fechamento")
+
+# Chaves lidas só na inicialização: mudar exige reinício
+CHAVES_REINICIO = ("perfil_memoria", "cache_autores", "proxy_rest", "gravacao", "saude")
+
+# Contadores mantidos pelo próprio bot: nunca voltam atrás por causa de um arquivo antigo
+CHAVES_CRESCENTES = ("ticket_counter",)
+
+# Intervalo do polling (sem inotify) e espera para agrupar eventos seguidos
+INTERVALO_POLLING = 2
+ESPERA_EVENTOS = 0.2
+
+# Constantes do inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_EVENTO = struct.Struct("iIII")
+
+
+def validar_config(dados):
+    """Retorna a lista de erros (vazia se a configuração for válida)"""
+    if not isinstance(dados, dict):
+        return ["a configuração precisa ser um objeto JSON"]
+    erros = []
+    for chave in CHAVES_ID:
+        valor = dados.get(chave)
+        if valor is not None and (not isinstance(valor, int) or isinstance(valor, bool)):
+            erros.append(f"{chave} precisa ser um ID numérico ou null")
+    contador = dados.get("ticket_counter", 1)
+    if not isinstance(contador, int) or contador < 1:
+        erros.append("ticket_counter precisa ser um inteiro positivo")
+    for chave in CHAVES_SECAO:
+        if dados.get(chave) is not None and not isinstance(dados[chave], dict):
+            erros.append(f"{chave} precisa ser um objeto")
+    return erros
+
+
+def diff_config(antiga, nova):
+    """{chave: (antes, depois)} das chaves de primeiro nível que mudaram"""
+    chaves = set(antiga) | set(nova)
+    return {c: (antiga.get(c), nova.get(c)) for c in sorted(chaves) if antiga.get(c) != nova.get(c)}
+
+
+def _ler(caminho):
+    """Leitura + parse + validação (roda numa thread)"""
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    erros = validar_config(dados)
+    if erros:
+        raise ValueError("; ".join(erros))
+    return dados
+
+
+def _iniciar_inotify(diretorio):
+    """Descritor inotify observando o diretório (pega também substituições atômicas por rename)"""
+    nome_libc = ctypes.util.find_library("c")
+    if not nome_libc:
+        return None
+    libc = ctypes.CDLL(nome_libc, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(diretorio), IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _nomes_eventos(dados):
+    posicao = 0
+    while posicao + _EVENTO.size <= len(dados):
+        _, _, _, tamanho = _EVENTO.unpack_from(dados, posicao)
+        posicao += _EVENTO.size
+        yield dados[posicao:posicao + tamanho].rstrip(b"\0").decode(errors="replace")
+        posicao += tamanho
+
+
+class RecarregadorConfig:
+    """
+    Observa o arquivo de configuração e chama aplicar(nova, mudancas) a cada alteração válida
+    Args:
+        caminho: Arquivo JSON observado
+        atual: Função que retorna o snapshot em uso (para o diff)
+        aplicar: Função chamada no loop com o snapshot novo já validado
+    """
+
+    def __init__(self, caminho, atual, aplicar, intervalo=INTERVALO_POLLING):
+        self.caminho = os.path.abspath(caminho)
+        self.atual = atual
+        self.aplicar = aplicar
+        self.intervalo = intervalo
+        self._fd = None
+        self._task = None
+        self._pendente = None
+        self._assinatura = self._assinatura_arquivo()
+        self.modo = None
+        self.recargas = 0
+        self.rejeitadas = 0
+
+    def _assinatura_arquivo(self):
+        try:
+            info = os.stat(self.caminho)
+            return info.st_mtime_ns, info.st_size
+        except OSError:
+            return None
+
+    def iniciar(self):
+        loop = asyncio.get_running_loop()
+        try:
+            self._fd = _iniciar_inotify(os.path.dirname(self.caminho))
+        except OSError:
+            self._fd = None
+        if self._fd is not None:
+            loop.add_reader(self._fd, self._ao_evento)
+            self.modo = "inotify"
+        else:
+            self._task = asyncio.create_task(self._polling())
+            self.modo = "polling"
+        logger.info(f"Observando {os.path.basename(self.caminho)} via {self.modo}")
+
+    def parar(self):
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _ao_evento(self):
+        try:
+            dados = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        if os.path.basename(self.caminho) not in _nomes_eventos(dados):
+            return
+        # Editores costumam gerar vários eventos seguidos: agrupa numa única recarga
+        if self._pendente is None or self._pendente.done():
+            self._pendente = asyncio.create_task(self._recarregar_depois())
+
+    async def _recarregar_depois(self):
+        await asyncio.sleep(ESPERA_EVENTOS)
+        await self.recarregar()
+
+    async def _polling(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            if self._assinatura_arquivo() != self._assinatura:
+                await self.recarregar()
+
+    async def recarregar(self):
+        """Relê, valida e aplica; configuração inválida mantém o snapshot atual"""
+        assinatura = self._assinatura_arquivo()
+        try:
+            nova = await asyncio.to_thread(_ler, self.caminho)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error(f"Erro ao ler {os.path.basename(self.caminho)}: {e}")
+            return False
+        except ValueError as e:
+            # json.JSONDecodeError é ValueError; a próxima gravação do arquivo gera nova tentativa
+            self._assinatura = assinatura
+            self.rejeitadas += 1
+            logger.error(f"Configuração inválida ignorada ({os.path.basename(self.caminho)}): {e}")
+            return False
+        self._assinatura = assinatura
+
+        antiga = self.atual()
+        for chave in CHAVES_CRESCENTES:
+            if isinstance(antiga.get(chave), int) and antiga[chave] > nova.get(chave, 0):
+                nova[chave] = antiga[chave]
+
+        mudancas = diff_config(antiga, nova)
+        if not mudancas:
+            return False
+
+        self.aplicar(nova, mudancas)
+        self.recargas += 1
+        for chave, (antes, depois) in mudancas.items():
+            logger.info(f"Config alterada: {chave}: {antes!r} -> {depois!r}")
+        reinicio = [c for c in mudancas if c in CHAVES_REINICIO]
+        if reinicio:
+            logger.warning(f"Alterações que só valem após reiniciar: {', '.join(reinicio)}")
+        return True
+
+    def estatisticas(self):
+        return {"modo": self.modo, "recargas": self.recargas, "rejeitadas": self.rejeitadas}
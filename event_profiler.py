@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Perfil de Eventos - Conta e cronometra o parse e o despacho de cada tipo de evento do gateway
+Mostra o que o bot paga (CPU de parse) contra o que ele usa (eventos com handler) e, via
+config, deixa de processar tipos de evento que nenhum código de ticket trata
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "filtro_eventos" no config.json)
+FILTRO_EVENTOS_PADRAO = {
+    "perfilar": False,          # cronometra parse, despacho e handlers (custo pequeno por evento)
+    "ignorar": [],              # eventos a descartar, ou "auto" = descartáveis sem handler no momento
+}
+
+# Eventos cujo parse só alimenta handlers (ou caches que o fluxo de tickets não lê):
+# evento do gateway -> (eventos despachados, intent que evita recebê-lo)
+# Só estes podem ser descartados; os demais mantêm o estado do cliente (guilds, canais, mensagens)
+EVENTOS_DESCARTAVEIS = {
+    "TYPING_START": (("typing", "raw_typing"), "guild_typing"),
+    "PRESENCE_UPDATE": (("presence_update",), "presences"),
+    "VOICE_STATE_UPDATE": (("voice_state_update",), "voice_states"),
+    "MESSAGE_REACTION_ADD": (("reaction_add", "raw_reaction_add"), "guild_reactions"),
+    "MESSAGE_REACTION_REMOVE": (("reaction_remove", "raw_reaction_remove"), "guild_reactions"),
+    "MESSAGE_REACTION_REMOVE_ALL": (("reaction_clear", "raw_reaction_clear"), "guild_reactions"),
+    "MESSAGE_REACTION_REMOVE_EMOJI": (("reaction_clear_emoji", "raw_reaction_clear_emoji"), "guild_reactions"),
+    "INVITE_CREATE": (("invite_create",), "invites"),
+    "INVITE_DELETE": (("invite_delete",), "invites"),
+    "WEBHOOKS_UPDATE": (("webhooks_update",), "webhooks"),
+    "GUILD_INTEGRATIONS_UPDATE": (("guild_integrations_update",), "integrations"),
+    "INTEGRATION_CREATE": (("integration_create",), "integrations"),
+    "INTEGRATION_UPDATE": (("integration_update",), "integrations"),
+    "INTEGRATION_DELETE": (("raw_integration_delete",), "integrations"),
+    "GUILD_SCHEDULED_EVENT_CREATE": (("scheduled_event_create",), "guild_scheduled_events"),
+    "GUILD_SCHEDULED_EVENT_UPDATE": (("scheduled_event_update",), "guild_scheduled_events"),
+    "GUILD_SCHEDULED_EVENT_DELETE": (("scheduled_event_delete",), "guild_scheduled_events"),
+    "GUILD_SCHEDULED_EVENT_USER_ADD": (("scheduled_event_user_add", "raw_scheduled_event_user_add"), "guild_scheduled_events"),
+    "GUILD_SCHEDULED_EVENT_USER_REMOVE": (("scheduled_event_user_remove", "raw_scheduled_event_user_remove"), "guild_scheduled_events"),
+    "AUTO_MODERATION_RULE_CREATE": (("automod_rule_create",), "auto_moderation_configuration"),
+    "AUTO_MODERATION_RULE_UPDATE": (("automod_rule_update",), "auto_moderation_configuration"),
+    "AUTO_MODERATION_RULE_DELETE": (("automod_rule_delete",), "auto_moderation_configuration"),
+    "AUTO_MODERATION_ACTION_EXECUTION": (("automod_action",), "auto_moderation_execution"),
+    "GUILD_AUDIT_LOG_ENTRY_CREATE": (("audit_log_entry_create", "raw_audit_log_entry_create"), "moderation"),
+}
+
+
+class _Medida:
+    __slots__ = ("recebidos", "descartados", "cpu_ns", "parede_ns")
+
+    def __init__(self):
+        self.recebidos = 0
+        self.descartados = 0
+        self.cpu_ns = 0
+        self.parede_ns = 0
+
+
+class PerfilEventos:
+    """
+    Envolve os parsers do ConnectionState (mesmo dict usado pelo websocket) e, com
+    perfilar ligado, também o dispatch e a execução dos handlers
+    Desligado e sem filtro, não deixa nenhum wrapper instalado
+    """
+
+    def __init__(self, bot, config=None):
+        self.bot = bot
+        self._parsers_originais = dict(bot._connection.parsers)
+        self._dispatch_original = bot._connection.dispatch
+        self._run_event_original = bot._run_event
+        self.opcoes = {}
+        self.ignorados = set()
+        self.auto = False
+        self.zerar()
+        self.configurar(config)
+
+    def configurar(self, config=None):
+        """(Re)instala os wrappers conforme as opções; chamado também pelo recarregador"""
+        self.opcoes = dict(FILTRO_EVENTOS_PADRAO, **(config or {}))
+        ignorar = self.opcoes["ignorar"] or []
+        self.auto = ignorar == "auto"
+        pedidos = set(EVENTOS_DESCARTAVEIS) if self.auto else {str(e).upper() for e in ignorar}
+        inseguros = pedidos - set(EVENTOS_DESCARTAVEIS)
+        if inseguros:
+            logger.warning(f"Eventos mantidos no filtro (o estado do cliente depende deles): {sorted(inseguros)}")
+        self.ignorados = pedidos & set(EVENTOS_DESCARTAVEIS)
+
+        parsers = self.bot._connection.parsers
+        perfilar = self.opcoes["perfilar"]
+        for evento, parser in self._parsers_originais.items():
+            if evento in self.ignorados:
+                parsers[evento] = self._descartavel(evento, parser, perfilar)
+            elif perfilar:
+                parsers[evento] = self._medido(evento, parser)
+            else:
+                parsers[evento] = parser
+
+        if perfilar:
+            self.bot._connection.dispatch = self._despachar
+            self.bot._run_event = self._executar_handler
+        else:
+            self.bot._connection.dispatch = self._dispatch_original
+            self.bot._run_event = self._run_event_original
+
+        if perfilar or self.ignorados:
+            modo = "auto" if self.auto else f"{len(self.ignorados)} tipo(s)"
+            logger.info(f"Perfil de eventos: perfilar={perfilar}, descartando {modo}")
+
+    def zerar(self):
+        self._eventos = {}
+        self._despachos = {}
+        self._handlers = {}
+        self.desde = time.time()
+
+    def _medida(self, evento):
+        medida = self._eventos.get(evento)
+        if medida is None:
+            medida = self._eventos[evento] = _Medida()
+        return medida
+
+    def _medido(self, evento, parser):
+        def medido(dados):
+            cpu, parede = time.thread_time_ns(), time.perf_counter_ns()
+            try:
+                return parser(dados)
+            finally:
+                medida = self._medida(evento)
+                medida.recebidos += 1
+                medida.cpu_ns += time.thread_time_ns() - cpu
+                medida.parede_ns += time.perf_counter_ns() - parede
+        return medido
+
+    def _descartavel(self, evento, parser, perfilar):
+        nomes = EVENTOS_DESCARTAVEIS[evento][0]
+        seguir = self._medido(evento, parser) if perfilar else parser
+
+        def descartavel(dados):
+            # No modo auto, um handler registrado depois (ex.: wait_for) volta a receber o evento
+            if self.auto and any(self._tem_handler(nome) for nome in nomes):
+                return seguir(dados)
+            medida = self._medida(evento)
+            medida.recebidos += 1
+            medida.descartados += 1
+        return descartavel
+
+    def _tem_handler(self, nome):
+        bot = self.bot
+        metodo = "on_" + nome
+        return hasattr(bot, metodo) or bool(getattr(bot, "extra_events", {}).get(metodo)) or nome in bot._listeners
+
+    def _despachar(self, evento, *args, **kwargs):
+        contagem = self._despachos.get(evento)
+        if contagem is None:
+            contagem = self._despachos[evento] = [0, 0]
+        contagem[0] += 1
+        if not self._tem_handler(evento):
+            contagem[1] += 1
+        return self._dispatch_original(evento, *args, **kwargs)
+
+    async def _executar_handler(self, coro, nome_evento, *args, **kwargs):
+        # Tempo de parede: inclui as esperas de I/O do handler, não só CPU
+        inicio = time.perf_counter_ns()
+        try:
+            await self._run_event_original(coro, nome_evento, *args, **kwargs)
+        finally:
+            tempo = self._handlers.get(nome_evento)
+            if tempo is None:
+                tempo = self._handlers[nome_evento] = [0, 0]
+            tempo[0] += 1
+            tempo[1] += time.perf_counter_ns() - inicio
+
+    def relatorio(self, limite=None):
+        """
+        Custo por tipo de evento, do mais caro ao mais barato (chamável de outra thread)
+        Returns:
+            dict com eventos [{evento, uso, recebidos, descartados, cpu_ms, ...}], despachos,
+            handlers e o total de CPU gasto em eventos sem uso
+        """
+        eventos = list(self._eventos.items())
+        despachos = list(self._despachos.items())
+        handlers = list(self._handlers.items())
+        com_handler = {nome for nome, (total, sem_handler) in despachos if total > sem_handler}
+
+        linhas = []
+        cpu_total = cpu_sem_uso = 0
+        for evento, medida in eventos:
+            nomes, intent = EVENTOS_DESCARTAVEIS.get(evento, ((), None))
+            if evento not in EVENTOS_DESCARTAVEIS:
+                uso = "estado"
+            elif any(nome in com_handler or self._tem_handler(nome) for nome in nomes):
+                uso = "handler"
+            else:
+                uso = "sem_uso"
+            processados = medida.recebidos - medida.descartados
+            linha = {
+                "evento": evento,
+                "uso": uso,
+                "recebidos": medida.recebidos,
+                "descartados": medida.descartados,
+                "cpu_ms": round(medida.cpu_ns / 1e6, 2),
+                "parede_ms": round(medida.parede_ns / 1e6, 2),
+                "cpu_us_medio": round(medida.cpu_ns / processados / 1e3, 1) if processados else 0,
+            }
+            if uso == "sem_uso":
+                linha["intent"] = intent
+                cpu_sem_uso += medida.cpu_ns
+            cpu_total += medida.cpu_ns
+            linhas.append(linha)
+        linhas.sort(key=lambda linha: (-linha["cpu_ms"], -linha["recebidos"]))
+
+        return {
+            "perfilar": self.opcoes["perfilar"],
+            "ignorados": "auto" if self.auto else sorted(self.ignorados),
+            "desde": self.desde,
+            "cpu_ms_total": round(cpu_total / 1e6, 2),
+            "cpu_ms_sem_uso": round(cpu_sem_uso / 1e6, 2),
+            "eventos": linhas[:limite] if limite else linhas,
+            "despachos": {nome: {"total": total, "sem_handler": sem_handler}
+                          for nome, (total, sem_handler) in sorted(despachos, key=lambda item: -item[1][0])},
+            "handlers": {nome: {"chamadas": chamadas, "parede_ms": round(ns / 1e6, 2)}
+                         for nome, (chamadas, ns) in sorted(handlers, key=lambda item: -item[1][1])},
+        }
+
+    def estatisticas(self):
+        relatorio = self.relatorio()
+        sem_uso = [linha for linha in relatorio["eventos"] if linha["uso"] == "sem_uso"]
+        return {
+            "perfilar": relatorio["perfilar"],
+            "ignorados": relatorio["ignorados"],
+            "recebidos": sum(linha["recebidos"] for linha in relatorio["eventos"]),
+            "descartados": sum(linha["descartados"] for linha in relatorio["eventos"]),
+            "cpu_ms_total": relatorio["cpu_ms_total"],
+            "cpu_ms_sem_uso": relatorio["cpu_ms_sem_uso"],
+            "sem_uso": [linha["evento"] for linha in sem_uso[:5]],
+        }
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Sondas de Saúde - Liveness (o event loop dos bots está girando) e readiness (cada cliente
+conectado e respondendo) a partir do pulso do loop, da latência e da última mensagem do gateway
+O supervisor roda numa thread própria: reinicia só o cliente que não fica pronto e, se o loop
+travar, sobe os bots num loop novo depois que o antigo fecha os clientes dele (ou encerra o
+processo para a plataforma reiniciar, se o loop antigo não parar)
+"""
+
+import asyncio
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "saude" no config.json do primeiro tenant)
+SAUDE_PADRAO = {
+    "intervalo_pulso_s": 1,
+    "limite_loop_s": 30,            # sem pulso há mais que isso: loop travado (liveness falha)
+    "limite_atraso_loop_s": 2,      # pulso atrasado acima disso: não pronto
+    "limite_latencia_s": 5,         # latência HEARTBEAT -> ACK do gateway
+    "limite_gateway_s": 90,         # nada recebido do gateway nesse tempo
+    "reiniciar_nao_pronto_s": 300,  # cliente não pronto por esse tempo: reinicia só o cliente
+    "reiniciar_travado_s": 60,      # loop travado por esse tempo: novo loop para os bots
+    "espera_parada_s": 15,          # prazo para o loop antigo fechar os clientes; senão o processo sai
+    "max_reinicios_loop": 3,        # depois disso a liveness fica falhando e a plataforma reinicia o processo
+    "intervalo_supervisor_s": 5,
+}
+
+
+class MonitorSaude:
+    """Pulso do loop (gravado no loop) lido pelas sondas HTTP e pelo supervisor (outras threads)"""
+
+    def __init__(self, config=None):
+        self.configurar(config)
+        self.ultimo_pulso = time.monotonic()
+        self.atraso_loop = 0.0
+        self.pico_atraso_loop = 0.0
+
+    def configurar(self, config=None):
+        self.opcoes = dict(SAUDE_PADRAO, **(config or {}))
+
+    def novo_loop(self):
+        """Loop novo (início ou recuperação): o prazo da liveness conta a partir de agora"""
+        self.ultimo_pulso = time.monotonic()
+        self.atraso_loop = 0.0
+
+    async def pulsar(self):
+        """Task do loop: registra o pulso e quanto o sleep atrasou (callbacks bloqueando o loop)"""
+        self.novo_loop()
+        while True:
+            intervalo = self.opcoes["intervalo_pulso_s"]
+            inicio = time.monotonic()
+            await asyncio.sleep(intervalo)
+            agora = time.monotonic()
+            self.atraso_loop = max(0.0, agora - inicio - intervalo)
+            self.pico_atraso_loop = max(self.pico_atraso_loop, self.atraso_loop)
+            self.ultimo_pulso = agora
+
+    def idade_pulso(self):
+        return time.monotonic() - self.ultimo_pulso
+
+    def vivo(self):
+        idade = self.idade_pulso()
+        return idade < self.opcoes["limite_loop_s"], {"pulso_s": round(idade, 1)}
+
+    def pronto(self, bot):
+        """
+        Checagens de um cliente
+        Returns:
+            (pronto, lista de motivos, detalhes)
+        """
+        motivos = []
+        idade = self.idade_pulso()
+        detalhes = {"pulso_s": round(idade, 1), "atraso_loop_ms": round(self.atraso_loop * 1000)}
+        if idade >= self.opcoes["limite_loop_s"]:
+            motivos.append("loop travado")
+        elif self.atraso_loop > self.opcoes["limite_atraso_loop_s"]:
+            motivos.append("loop atrasado")
+
+        if bot is None or bot.is_closed():
+            motivos.append("cliente parado")
+            return False, motivos, detalhes
+        if not bot.is_ready():
+            motivos.append("gateway não pronto")
+
+        latencia = bot.latency
+        if math.isfinite(latencia):
+            detalhes["latencia_ms"] = round(latencia * 1000)
+            if latencia > self.opcoes["limite_latencia_s"]:
+                motivos.append("latência alta")
+
+        manter_vivo = getattr(bot.ws, "_keep_alive", None) if bot.ws else None
+        if manter_vivo is not None:
+            silencio = time.perf_counter() - manter_vivo._last_recv
+            detalhes["gateway_silencio_s"] = round(silencio, 1)
+            if silencio > self.opcoes["limite_gateway_s"]:
+                motivos.append("gateway parado")
+        return not motivos, motivos, detalhes
+
+    def estatisticas(self):
+        return {
+            "pulso_s": round(self.idade_pulso(), 1),
+            "atraso_loop_ms": round(self.atraso_loop * 1000),
+            "pico_atraso_loop_ms": round(self.pico_atraso_loop * 1000),
+        }
+
+
+class Supervisor:
+    """
+    Thread que observa o monitor e age sobre o gerenciador:
+    manager.reiniciar_bot(nome, motivo) (coroutine, no loop) e manager.reiniciar_loop() (de qualquer thread)
+    """
+
+    def __init__(self, manager, monitor):
+        self.manager = manager
+        self.monitor = monitor
+        self._parar = threading.Event()
+        self._nao_pronto_desde = {}
+        self.reinicios_cliente = 0
+        self.reinicios_loop = 0
+        self.ultima_acao = None
+
+    def iniciar(self):
+        threading.Thread(target=self._executar, name="supervisor", daemon=True).start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.wait(self.monitor.opcoes["intervalo_supervisor_s"]):
+            try:
+                self.verificar()
+            except Exception as e:
+                logger.error(f"Erro no supervisor: {e}")
+
+    def verificar(self):
+        opcoes = self.monitor.opcoes
+        if not self.manager.running:
+            return
+
+        idade = self.monitor.idade_pulso()
+        if idade > opcoes["reiniciar_travado_s"]:
+            if self.reinicios_loop >= opcoes["max_reinicios_loop"]:
+                return
+            self.reinicios_loop += 1
+            self._registrar(f"loop travado há {idade:.0f}s: parando o loop antigo para reiniciar os bots "
+                            f"({self.reinicios_loop}/{opcoes['max_reinicios_loop']})")
+            self._despejar_pilha()
+            self._nao_pronto_desde.clear()
+            self.manager.reiniciar_loop()
+            return
+
+        agora = time.monotonic()
+        loop = self.manager.loop
+        for nome, bot in list(self.manager.bots.items()):
+            pronto, motivos, _ = self.monitor.pronto(bot)
+            if pronto or "loop travado" in motivos:
+                self._nao_pronto_desde.pop(nome, None)
+                continue
+            desde = self._nao_pronto_desde.setdefault(nome, agora)
+            if agora - desde < opcoes["reiniciar_nao_pronto_s"] or loop is None:
+                continue
+            # Conta de novo a partir do reinício (o cliente novo precisa de tempo para conectar)
+            self._nao_pronto_desde[nome] = agora
+            self.reinicios_cliente += 1
+            motivo = ", ".join(motivos)
+            self._registrar(f"cliente {nome} sem ficar pronto há {agora - desde:.0f}s ({motivo}): reiniciando só o cliente")
+            asyncio.run_coroutine_threadsafe(self.manager.reiniciar_bot(nome, motivo), loop)
+
+    def _registrar(self, acao):
+        logger.critical(f"Supervisor: {acao}")
+        self.ultima_acao = {"acao": acao, "quando": time.time()}
+
+    def _despejar_pilha(self):
+        """Pilha da thread do loop travado no log (mostra onde o código bloqueou)"""
+        thread = self.manager.thread
+        quadro = sys._current_frames().get(thread.ident) if thread is not None else None
+        if quadro is not None:
+            pilha = "".join(traceback.format_stack(quadro)[-15:])
+            logger.critical(f"Pilha da thread do loop travado:\n{pilha}")
+
+    def estatisticas(self):
+        return {
+            "reinicios_cliente": self.reinicios_cliente,
+            "reinicios_loop": self.reinicios_loop,
+            "ultima_acao": self.ultima_acao,
+        }
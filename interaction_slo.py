@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Prazo de Interações - Mede o tempo até a primeira resposta de cada handler
+Adia (defer) automaticamente quando o handler corre o risco de passar dos 3 segundos do Discord
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import deque
+
+import discord
+
+from async_logging import definir_contexto, restaurar_contexto
+
+logger = logging.getLogger(__name__)
+
+# O Discord invalida a interação se a primeira resposta não chegar neste prazo
+PRAZO_ACK = 3.0
+
+# Folga usada pelo defer automático (rede + latência da própria requisição de defer)
+MARGEM_PADRAO = 0.8
+
+# Atraso até o handler medido pelo relógio local contra o snowflake: limitado para que
+# relógio adiantado ou lag do gateway não zerem o prazo e o defer automático dispare na hora
+ATRASO_MAXIMO = 1.0
+
+# Objetivo do relatório: fração das interações respondidas dentro do prazo
+OBJETIVO_PADRAO = 0.99
+
+# Amostras guardadas por handler para os percentis
+AMOSTRAS_POR_HANDLER = 512
+
+# Erro do Discord para interação expirada / já respondida
+ERRO_INTERACAO_DESCONHECIDA = 10062
+ERRO_JA_RESPONDIDA = 40060
+
+
+class _Atendimento:
+    """Estado de uma interação em andamento (compartilhado via contextvar)"""
+    __slots__ = ("interaction", "inicio", "ack", "lock")
+
+    def __init__(self, interaction, inicio):
+        self.interaction = interaction
+        self.inicio = inicio
+        self.ack = None
+        self.lock = asyncio.Lock()
+
+    def marcar_ack(self):
+        if self.ack is None:
+            self.ack = time.monotonic()
+
+
+_atual = contextvars.ContextVar("atendimento_interacao", default=None)
+
+
+class EstatisticaHandler:
+    __slots__ = ("total", "no_prazo", "auto_defer", "expiradas", "erros", "amostras")
+
+    def __init__(self):
+        self.total = 0
+        self.no_prazo = 0
+        self.auto_defer = 0
+        self.expiradas = 0
+        self.erros = 0
+        self.amostras = deque(maxlen=AMOSTRAS_POR_HANDLER)
+
+
+class MonitorPrazos:
+    """Agrega os tempos até a primeira resposta por handler e gera o relatório de SLO"""
+
+    def __init__(self, config=None):
+        self._handlers = {}
+        self.configurar(config)
+
+    def configurar(self, config=None):
+        """Aplica margem/objetivo (também na recarga da configuração, sem perder as amostras)"""
+        config = config or {}
+        self.margem = config.get("margem_segundos", MARGEM_PADRAO)
+        self.objetivo = config.get("objetivo", OBJETIVO_PADRAO)
+
+    def registrar(self, nome, tempo_ack, auto_defer=False, expirou=False, erro=False):
+        estatistica = self._handlers.setdefault(nome, EstatisticaHandler())
+        estatistica.total += 1
+        if tempo_ack is not None:
+            estatistica.amostras.append(tempo_ack)
+        if expirou:
+            estatistica.expiradas += 1
+        elif tempo_ack is not None:
+            estatistica.no_prazo += 1
+        if auto_defer:
+            estatistica.auto_defer += 1
+        if erro:
+            estatistica.erros += 1
+
+    def relatorio(self):
+        """Relatório de SLO por handler (chamável de outra thread, ex.: Flask)"""
+        handlers = {}
+        total = no_prazo = 0
+        for nome, estatistica in list(self._handlers.items()):
+            amostras = sorted(estatistica.amostras)
+            handlers[nome] = {
+                "total": estatistica.total,
+                "no_prazo": estatistica.no_prazo,
+                "auto_defer": estatistica.auto_defer,
+                "expiradas": estatistica.expiradas,
+                "erros": estatistica.erros,
+                "p50_ms": _percentil_ms(amostras, 0.50),
+                "p95_ms": _percentil_ms(amostras, 0.95),
+                "p99_ms": _percentil_ms(amostras, 0.99),
+                "max_ms": round(amostras[-1] * 1000) if amostras else None,
+            }
+            total += estatistica.total
+            no_prazo += estatistica.no_prazo
+
+        conformidade = no_prazo / total if total else 1.0
+        return {
+            "prazo_segundos": PRAZO_ACK,
+            "objetivo": self.objetivo,
+            "conformidade": round(conformidade, 4),
+            "dentro_do_objetivo": conformidade >= self.objetivo,
+            "handlers": handlers,
+        }
+
+
+def _percentil_ms(ordenadas, fracao):
+    if not ordenadas:
+        return None
+    indice = min(len(ordenadas) - 1, int(fracao * len(ordenadas)))
+    return round(ordenadas[indice] * 1000)
+
+
+def _expirada(erro):
+    return isinstance(erro, discord.NotFound) and erro.code == ERRO_INTERACAO_DESCONHECIDA
+
+
+async def responder(interaction, content=None, **kwargs):
+    """
+    Envia a resposta pelo caminho certo: response se ainda não houve ack, followup se
+    o handler já foi adiado (inclusive pelo defer automático)
+    """
+    atendimento = _atual.get()
+    if atendimento is None or atendimento.interaction is not interaction:
+        if interaction.response.is_done():
+            return await interaction.followup.send(content, **kwargs)
+        return await interaction.response.send_message(content, **kwargs)
+
+    async with atendimento.lock:
+        if not interaction.response.is_done():
+            await interaction.response.send_message(content, **kwargs)
+            atendimento.marcar_ack()
+            return None
+    return await interaction.followup.send(content, **kwargs)
+
+
+async def adiar(interaction, **kwargs):
+    """
+    Primeiro ack (defer) do handler pelo mesmo lock do defer automático: os dois nunca
+    disputam a resposta da interação
+    Returns:
+        False se a interação já tinha sido respondida/adiada
+    """
+    atendimento = _atual.get()
+    if atendimento is None or atendimento.interaction is not interaction:
+        if interaction.response.is_done():
+            return False
+        await interaction.response.defer(**kwargs)
+        return True
+
+    async with atendimento.lock:
+        if interaction.response.is_done():
+            return False
+        await interaction.response.defer(**kwargs)
+        atendimento.marcar_ack()
+        return True
+
+
+async def _adiar(atendimento, ephemeral):
+    """Defer automático; ignora se o handler respondeu no meio do caminho"""
+    interaction = atendimento.interaction
+    async with atendimento.lock:
+        if interaction.response.is_done():
+            return False
+        try:
+            await interaction.response.defer(ephemeral=ephemeral, thinking=True)
+        except discord.InteractionResponded:
+            return False
+        except discord.HTTPException as e:
+            if e.code != ERRO_JA_RESPONDIDA:
+                raise
+            return False
+        atendimento.marcar_ack()
+        return True
+
+
+def prazo_interacao(nome, auto_defer=True, ephemeral=True):
+    """
+    Decorator para callbacks de botões e on_submit de modais
+    Args:
+        nome: Nome do handler no relatório
+        auto_defer: Adia sozinho se o handler ainda não respondeu perto do prazo
+                    (use False em handlers que respondem com send_modal)
+        ephemeral: Visibilidade do defer automático
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = next((a for a in args if isinstance(a, discord.Interaction)), None)
+            monitor = getattr(interaction.client, "prazos", None) if interaction else None
+            if monitor is None:
+                return await func(*args, **kwargs)
+
+            inicio = time.monotonic()
+            # Tempo que a interação já gastou entre o Discord e o handler
+            atraso = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+            atraso = min(max(0.0, atraso), ATRASO_MAXIMO)
+            atendimento = _Atendimento(interaction, inicio)
+            token = _atual.set(atendimento)
+            # A task do handler herda o contexto de log (servidor, ticket, interação)
+            indice = getattr(interaction.client, "indice_tickets", None)
+            ticket = interaction.channel_id if indice and indice.dono(interaction.channel_id) else None
+            token_log = definir_contexto(
+                guild_id=interaction.guild_id,
+                ticket_id=ticket,
+                interacao_id=interaction.id,
+                usuario_id=interaction.user.id
+            )
+            try:
+                tarefa = asyncio.ensure_future(func(*args, **kwargs))
+            finally:
+                restaurar_contexto(token_log)
+                _atual.reset(token)
+
+            adiado = False
+            limite = max(0.0, PRAZO_ACK - monitor.margem - atraso)
+            feito, _ = await asyncio.wait({tarefa}, timeout=limite)
+            if not feito and auto_defer:
+                try:
+                    adiado = await _adiar(atendimento, ephemeral)
+                except discord.HTTPException as e:
+                    logger.error(f"Erro no defer automático de {nome}: {e}")
+                if adiado:
+                    logger.info(f"Handler {nome} adiado automaticamente após {time.monotonic() - inicio:.2f}s")
+
+            erro = None
+            try:
+                return await tarefa
+            except Exception as e:
+                erro = e
+                raise
+            finally:
+                # Sem ack explícito: o handler respondeu direto pelo response (fim do handler é o limite superior)
+                if atendimento.ack is None and interaction.response.is_done():
+                    atendimento.marcar_ack()
+                tempo_ack = atraso + atendimento.ack - inicio if atendimento.ack is not None else None
+                expirou = _expirada(erro) or (tempo_ack is not None and tempo_ack > PRAZO_ACK)
+                if expirou:
+                    logger.warning(f"Handler {nome} perdeu o prazo de {PRAZO_ACK}s da interação")
+                monitor.registrar(nome, tempo_ack, adiado, expirou, erro is not None and not _expirada(erro))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Verificação de Convites - Resolve o convite informado na parceria e confere o requisito de membros
+antes de criar o canal; resultados ficam num cache TTL/LRU e consultas iguais em andamento
+são agrupadas, então convites repetidos ou populares não custam chamadas à API
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "verificacao_parcerias" no config.json)
+VERIFICACAO_PADRAO = {
+    "ativo": True,
+    "min_membros": 200,
+    "ttl_s": 3600,              # convite válido (contagem aproximada muda devagar)
+    "ttl_invalido_s": 300,      # convite inexistente/expirado
+    "capacidade": 1000,         # convites guardados no cache
+    "concorrencia": 4,          # consultas simultâneas à API
+    "timeout_s": 5,
+}
+
+# discord.gg/codigo, discord.com/invite/codigo, discordapp.com/invite/codigo ou só o código
+_CONVITE = re.compile(
+    r"^(?:(?:https?://)?(?:www\.)?(?:discord\.gg|discord(?:app)?\.com/invite)/)?([A-Za-z0-9-]{2,32})/?(?:\?\S*)?$"
+)
+
+
+def codigo_convite(texto):
+    """Extrai o código do convite (None se o texto não parecer um convite)"""
+    encontrado = _CONVITE.match((texto or "").strip())
+    return encontrado.group(1) if encontrado else None
+
+
+class VerificadorConvites:
+    """Cache TTL/LRU de convites resolvidos + limite de consultas simultâneas"""
+
+    def __init__(self, bot, config=None):
+        self.bot = bot
+        self._cache = OrderedDict()     # codigo -> (expira_em, resultado)
+        self._em_andamento = {}         # codigo -> Future compartilhado
+        self.acertos = 0
+        self.consultas_api = 0
+        self.erros = 0
+        self.rejeitados = 0
+        self.configurar(config)
+
+    def configurar(self, config=None):
+        """Aplica as opções (também na recarga da configuração, sem perder o cache)"""
+        self.opcoes = dict(VERIFICACAO_PADRAO, **(config or {}))
+        self._semaforo = asyncio.Semaphore(self.opcoes["concorrencia"])
+        while len(self._cache) > self.opcoes["capacidade"]:
+            self._cache.popitem(last=False)
+
+    def _do_cache(self, codigo):
+        item = self._cache.get(codigo)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del self._cache[codigo]
+            return None
+        self._cache.move_to_end(codigo)
+        return item[1]
+
+    def _guardar(self, codigo, resultado, ttl):
+        self._cache[codigo] = (time.monotonic() + ttl, resultado)
+        self._cache.move_to_end(codigo)
+        while len(self._cache) > self.opcoes["capacidade"]:
+            self._cache.popitem(last=False)
+
+    async def resolver(self, codigo):
+        """
+        Resolve um código de convite (cache -> consulta em andamento -> API)
+        Returns:
+            {"valido", "membros", "servidor", "guild_id"}, ou None se a API não respondeu
+        """
+        resultado = self._do_cache(codigo)
+        if resultado is not None:
+            self.acertos += 1
+            return resultado
+
+        # Mesmo convite enviado por várias pessoas ao mesmo tempo: uma consulta só
+        pendente = self._em_andamento.get(codigo)
+        if pendente is not None:
+            self.acertos += 1
+            return await asyncio.shield(pendente)
+
+        pendente = self._em_andamento[codigo] = asyncio.get_running_loop().create_future()
+        try:
+            resultado = await self._consultar(codigo)
+            pendente.set_result(resultado)
+            return resultado
+        except BaseException:
+            pendente.set_result(None)
+            raise
+        finally:
+            del self._em_andamento[codigo]
+
+    async def _consultar(self, codigo):
+        async with self._semaforo:
+            self.consultas_api += 1
+            try:
+                async with asyncio.timeout(self.opcoes["timeout_s"]):
+                    convite = await self.bot.fetch_invite(codigo, with_counts=True, with_expiration=True)
+            except discord.NotFound:
+                resultado = {"valido": False, "membros": None, "servidor": None, "guild_id": None}
+                self._guardar(codigo, resultado, self.opcoes["ttl_invalido_s"])
+                return resultado
+            except (discord.HTTPException, TimeoutError) as e:
+                self.erros += 1
+                logger.warning(f"Não foi possível resolver o convite {codigo}: {e!r}")
+                return None
+
+        guild = convite.guild
+        resultado = {
+            "valido": True,
+            "membros": convite.approximate_member_count,
+            "servidor": getattr(guild, "name", None),
+            "guild_id": getattr(guild, "id", None),
+        }
+        # Convite temporário: não fica no cache além da própria expiração
+        ttl = self.opcoes["ttl_s"]
+        if convite.expires_at is not None:
+            ttl = min(ttl, (convite.expires_at - discord.utils.utcnow()).total_seconds())
+        if ttl > 0:
+            self._guardar(codigo, resultado, ttl)
+        return resultado
+
+    async def verificar(self, texto):
+        """
+        Confere o convite contra os requisitos de parceria
+        Returns:
+            (aceito, motivo da recusa ou None, resultado da resolução ou None)
+        Falha da API não bloqueia o pedido: a equipe confere à mão como antes
+        """
+        if not self.opcoes["ativo"]:
+            return True, None, None
+
+        codigo = codigo_convite(texto)
+        if codigo is None:
+            self.rejeitados += 1
+            return False, "o link informado não é um convite do Discord (ex.: discord.gg/seuservidor)", None
+
+        resultado = await self.resolver(codigo)
+        if resultado is None:
+            return True, None, None
+        if not resultado["valido"]:
+            self.rejeitados += 1
+            return False, "o convite é inválido ou expirou", resultado
+
+        minimo = self.opcoes["min_membros"]
+        membros = resultado["membros"]
+        if membros is not None and membros < minimo:
+            self.rejeitados += 1
+            return False, f"o servidor tem cerca de {membros} membros (mínimo {minimo})", resultado
+        return True, None, resultado
+
+    def estatisticas(self):
+        return {
+            "em_cache": len(self._cache),
+            "acertos": self.acertos,
+            "consultas_api": self.consultas_api,
+            "erros": self.erros,
+            "rejeitados": self.rejeitados,
+        }
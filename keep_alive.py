@@ -4,12 +4,18 @@ Keep Alive Service - Mantém o bot ativo no Replit
 Servidor web simples que responde a requests para evitar que o Replit durma
 """
 
+import asyncio
+import hmac
+import os
 import threading
 import time
 from datetime import datetime
-from flask import Flask, render_template, jsonify
+from functools import wraps
+from flask import Flask, Response, render_template, jsonify, request
 import logging
 
+from memory_debug import AGRUPAMENTOS, DepuradorMemoria, censo_no_loop
+
 # Configuração de logging para Flask
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.WARNING)
@@ -19,37 +25,202 @@ app = Flask(__name__)
 # Referência para o gerenciador do bot
 bot_manager = None
 
+# Endpoints de depuração só existem com BOT_DEBUG_TOKEN definido
+depurador = DepuradorMemoria()
+
+# Espera máxima pelo loop dos bots nas rotas que leem ou mudam estado deles
+TIMEOUT_LOOP_S = 5
+
+def apenas_admin(funcao):
+    """Exige Authorization: Bearer <BOT_DEBUG_TOKEN>; sem token configurado a rota não existe"""
+    @wraps(funcao)
+    def verificar(*args, **kwargs):
+        token = os.getenv('BOT_DEBUG_TOKEN')
+        if not token:
+            return jsonify({'error': 'Not found'}), 404
+        enviado = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(enviado.encode(), token.encode()):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return funcao(*args, **kwargs)
+    return verificar
+
+def _no_loop(funcao):
+    """
+    Executa funcao() no loop dos bots e devolve o resultado: estado de bots e perfis só é
+    tocado lá, nunca nas threads do Flask. RuntimeError sem loop, TimeoutError se não responder
+    """
+    loop = bot_manager.loop if bot_manager else None
+    if loop is None or not loop.is_running():
+        raise RuntimeError("loop dos bots não está rodando")
+
+    async def executar():
+        return funcao()
+
+    futuro = asyncio.run_coroutine_threadsafe(executar(), loop)
+    try:
+        return futuro.result(TIMEOUT_LOOP_S)
+    except TimeoutError:
+        futuro.cancel()
+        raise
+
+def _snapshot():
+    """Último status publicado pelo loop do bot (None se ainda não houver)"""
+    return bot_manager.snapshot.atual() if bot_manager else None
+
 @app.route('/')
 def home():
-    """Página principal com status do bot"""
+    """Painel com status ao vivo (atualizado via /eventos)"""
     return render_template('index.html')
 
 @app.route('/status')
 def status():
-    """API endpoint com status detalhado do bot"""
-    if bot_manager:
-        status_data = bot_manager.get_status()
-        status_data['timestamp'] = datetime.now().isoformat()
-        return jsonify(status_data)
-    else:
-        return jsonify({
-            'running': False,
-            'uptime': '0:00:00',
-            'restart_count': 0,
-            'bot_ready': False,
-            'guild_count': 0,
-            'timestamp': datetime.now().isoformat(),
-            'error': 'Bot manager not initialized'
-        })
+    """API endpoint com status detalhado do bot (snapshot com ETag)"""
+    versao = _snapshot()
+    if versao:
+        if request.if_none_match.contains(versao.etag):
+            resposta = Response(status=304)
+        else:
+            resposta = Response(versao.corpo, mimetype='application/json')
+        resposta.set_etag(versao.etag)
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
+    return jsonify({
+        'running': False,
+        'uptime': '0:00:00',
+        'restart_count': 0,
+        'bot_ready': False,
+        'guild_count': 0,
+        'timestamp': datetime.now().isoformat(),
+        'error': 'Bot manager not initialized' if not bot_manager else 'Status not published yet'
+    })
+
+@app.route('/eventos')
+def eventos():
+    """Stream SSE: cada snapshot novo é empurrado para os painéis abertos"""
+    if not bot_manager:
+        return jsonify({'error': 'Bot manager not initialized'}), 503
+    return Response(
+        bot_manager.snapshot.eventos(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/slo')
+def slo():
+    """Relatório de SLO do tempo até a primeira resposta das interações"""
+    versao = _snapshot()
+    if versao and versao.dados.get('interacoes'):
+        return jsonify(dict(versao.dados['interacoes'], timestamp=versao.dados['timestamp']))
+    return jsonify({'error': 'Bot not running', 'timestamp': datetime.now().isoformat()}), 503
+
+@app.route('/debug/memoria')
+@apenas_admin
+def debug_memoria():
+    """Estado do tracemalloc + censo de Views, Modals, Tasks e mensagens vivos (?tenant=nome)"""
+    bot = bot_manager.obter_bot(request.args.get('tenant')) if bot_manager else None
+    try:
+        censo = censo_no_loop(bot)
+    except Exception as e:
+        logging.error(f"Erro no censo de objetos: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'tracemalloc': depurador.estado(), 'censo': censo, 'timestamp': datetime.now().isoformat()})
+
+@app.route('/debug/memoria/tracemalloc', methods=['POST', 'DELETE'])
+@apenas_admin
+def debug_tracemalloc():
+    """POST inicia (?quadros=N), DELETE para e libera os snapshots"""
+    if request.method == 'DELETE':
+        return jsonify(depurador.parar())
+    quadros = request.args.get('quadros', 10, type=int)
+    return jsonify(depurador.iniciar(max(1, min(quadros, 50))))
+
+@app.route('/debug/memoria/diferencas')
+@apenas_admin
+def debug_diferencas():
+    """Maiores crescimentos de alocação desde a consulta anterior (?limite=20&agrupar=lineno)"""
+    agrupar = request.args.get('agrupar', 'lineno')
+    if agrupar not in AGRUPAMENTOS:
+        return jsonify({'error': f"agrupar deve ser um de {', '.join(AGRUPAMENTOS)}"}), 400
+    diferencas = depurador.diferencas(request.args.get('limite', 20, type=int), agrupar)
+    if diferencas is None:
+        return jsonify({'error': 'tracemalloc parado: POST /debug/memoria/tracemalloc'}), 409
+    return jsonify({'diferencas': diferencas, 'tracemalloc': depurador.estado()})
+
+@app.route('/debug/eventos', methods=['GET', 'DELETE'])
+@apenas_admin
+def debug_eventos():
+    """Custo de parse/despacho por tipo de evento do gateway (?limite=N&tenant=nome); DELETE zera os contadores"""
+    tenant = request.args.get('tenant')
+    limite = request.args.get('limite', type=int)
+    zerar = request.method == 'DELETE'
+
+    def consultar():
+        bot = bot_manager.obter_bot(tenant)
+        if bot is None:
+            return None
+        if zerar:
+            bot.eventos.zerar()
+        return bot.eventos.relatorio(limite)
+
+    try:
+        relatorio = _no_loop(consultar)
+    except (RuntimeError, TimeoutError) as e:
+        return jsonify({'error': f'Bot not running: {e}'}), 503
+    if relatorio is None:
+        return jsonify({'error': 'Bot not running'}), 503
+    return jsonify(relatorio)
+
+def _vivo():
+    """Liveness: o loop dos bots está girando (sem gerenciador ainda, só o processo conta)"""
+    if bot_manager is None:
+        return True, {}
+    return bot_manager.saude.vivo()
 
 @app.route('/health')
 def health():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
+    """Health check endpoint (503 se o loop dos bots travou)"""
+    vivo, detalhes = _vivo()
+    return jsonify(dict(detalhes, **{
+        'status': 'healthy' if vivo else 'unhealthy',
         'timestamp': datetime.now().isoformat(),
         'service': 'FenixBot Keep Alive'
-    })
+    })), 200 if vivo else 503
+
+@app.route('/health/live')
+def health_live():
+    """Liveness probe: 503 só quando o processo precisa ser reiniciado (loop travado)"""
+    vivo, detalhes = _vivo()
+    return jsonify(dict(detalhes, status='ok' if vivo else 'travado')), 200 if vivo else 503
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness probe: cada cliente conectado ao gateway e respondendo (?tenant=nome para um só)"""
+    if bot_manager is None:
+        return jsonify({'status': 'iniciando'}), 503
+    # Loop travado: responde daqui mesmo, sem agendar nada nele
+    vivo, detalhes = _vivo()
+    if not vivo:
+        return jsonify(dict(detalhes, status='nao_pronto', motivos=['loop travado'])), 503
+    nome = request.args.get('tenant')
+    
+    def checar():
+        bots = {nome: bot_manager.bots.get(nome)} if nome else dict(bot_manager.bots)
+        clientes = {}
+        for tenant, bot in bots.items():
+            pronto, motivos, detalhes = bot_manager.saude.pronto(bot)
+            clientes[tenant] = dict(detalhes, pronto=pronto, motivos=motivos)
+        return clientes
+    
+    try:
+        clientes = _no_loop(checar)
+    except RuntimeError:
+        return jsonify({'status': 'iniciando'}), 503
+    except TimeoutError:
+        return jsonify({'status': 'nao_pronto', 'motivos': ['loop sem resposta']}), 503
+    if not clientes:
+        return jsonify({'status': 'iniciando'}), 503
+    todos = all(cliente['pronto'] for cliente in clientes.values())
+    return jsonify({'status': 'pronto' if todos else 'nao_pronto', 'clientes': clientes}), 200 if todos else 503
 
 @app.route('/ping')
 def ping():
@@ -83,8 +254,9 @@ def start_monitoring():
         while True:
             try:
                 time.sleep(300)  # 5 minutos
-                if bot_manager:
-                    status = bot_manager.get_status()
+                versao = _snapshot()
+                if versao:
+                    status = versao.dados
                     logging.info(f"Monitor: Bot running={status['running']}, "
                                f"ready={status['bot_ready']}, "
                                f"guilds={status['guild_count']}")
@@ -5,115 +5,281 @@ Aplicação principal que executa o bot Discord e o serviço keep-alive
 """
 
 import asyncio
+import atexit
 import logging
 import os
 import sys
 import threading
 import time
+import weakref
 from datetime import datetime
 
+from async_logging import configurar_logging, definir_contexto
 from bot_final import FenixBotFinal
+from health_probes import MonitorSaude, Supervisor
 from keep_alive import run_keep_alive
+from memory_profile import relatorio_caches
+from multi_tenant import ConectorCompartilhado, carregar_tenants
+from status_snapshot import SnapshotStatus, publicar_status
 
 # Configuração de logging otimizada para deploy
 is_deployed = os.getenv('REPLIT_DEPLOYMENT') == '1'
 
-if is_deployed:
-    # Em deploy: apenas console, sem arquivos de log
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler(sys.stdout)]
-    )
-else:
-    # Em desenvolvimento: logs em arquivo e console
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('logs/fenix_bot.log', encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+# Logs passam por uma fila e são gravados numa thread de fundo:
+# em deploy JSON no console; em desenvolvimento JSON em arquivo rotacionado/compactado + console
+ouvinte_logs = configurar_logging(deploy=is_deployed)
+atexit.register(ouvinte_logs.stop)
 
 logger = logging.getLogger(__name__)
 
+# O relatório de caches percorre todos os membros e canais: não precisa ir a cada publicação
+INTERVALO_MEMORIA = 60
+
 class BotManager:
-    """Gerenciador principal do bot com auto-restart e monitoramento"""
+    """Gerenciador dos bots (um por tenant, no mesmo event loop) com auto-restart e monitoramento"""
     
-    def __init__(self):
-        self.bot = None
+    def __init__(self, tenants=None):
+        self.tenants = tenants or carregar_tenants()
+        self.bots = {}
+        self.restarts = {tenant["nome"]: 0 for tenant in self.tenants}
         self.running = False
-        self.restart_count = 0
         self.start_time = datetime.now()
+        self.conector = None
+        # Status publicado pelo loop do bot; o Flask só lê o snapshot
+        self.snapshot = SnapshotStatus()
+        # bot -> (quando, relatório de caches); some junto com o bot de um restart
+        self.memoria = weakref.WeakKeyDictionary()
+        # Pulso do loop para as sondas de saúde; o supervisor age quando algo trava
+        self.saude = MonitorSaude()
+        self.supervisor = Supervisor(self, self.saude)
+        self.loop = None
+        self.thread = None
+        self.execucao = None
+        # Cada loop novo (após travamento) é uma geração; a antiga para ao acordar
+        self.geracao = 0
+        self.reiniciar = set()
+        
+    @property
+    def bot(self):
+        """Bot do primeiro tenant (compatibilidade com o modo de um bot só)"""
+        return self.bots.get(self.tenants[0]["nome"])
+        
+    @property
+    def restart_count(self):
+        return sum(self.restarts.values())
+        
+    def obter_bot(self, nome=None):
+        """Bot de um tenant pelo nome (None = primeiro tenant)"""
+        return self.bots.get(nome) if nome else self.bot
         
-    async def start_bot(self):
-        """Inicia o bot Discord com tratamento de erros"""
+    async def start_bot(self, tenant):
+        """Inicia o bot Discord de um tenant com tratamento de erros"""
+        nome = tenant["nome"]
         try:
-            logger.info("Iniciando FenixBot...")
-            self.bot = FenixBotFinal()
-            await self.bot.start()
+            logger.info(f"Iniciando FenixBot ({nome})...")
+            os.makedirs(tenant["diretorio"], exist_ok=True)
+            self.bots[nome] = FenixBotFinal(tenant["diretorio"], os.getenv(tenant["token_env"]), self.conector)
+            if tenant is self.tenants[0]:
+                self.saude.configurar(self.bots[nome].config.get("saude"))
+            await self.bots[nome].start()
         except Exception as e:
-            logger.error(f"Erro ao iniciar o bot: {e}")
+            logger.error(f"Erro ao iniciar o bot ({nome}): {e}")
             raise
             
-    async def run_with_restart(self):
-        """Executa o bot com restart automático em caso de falha"""
-        self.running = True
+    async def run_tenant(self, tenant):
+        """Executa o bot de um tenant com restart automático; a falha de um não derruba os outros"""
+        nome = tenant["nome"]
+        geracao = self.geracao
+        # Todo log emitido pelas tasks deste tenant leva o nome dele
+        definir_contexto(tenant=nome)
         
-        while self.running:
+        while self.running and geracao == self.geracao:
             try:
-                await self.start_bot()
+                await self.start_bot(tenant)
             except Exception as e:
-                self.restart_count += 1
-                logger.error(f"Bot crashou (restart #{self.restart_count}): {e}")
+                if nome in self.reiniciar:
+                    # start() falhou por causa do close() pedido pelo supervisor: sobe o cliente novo já
+                    self.reiniciar.discard(nome)
+                    self.bots.pop(nome, None)
+                    continue
+                self.restarts[nome] += 1
+                logger.error(f"Bot {nome} crashou (restart #{self.restarts[nome]}): {e}")
                 
-                if self.restart_count > 10:
-                    logger.critical("Muitos restarts consecutivos. Parando o bot.")
+                if self.restarts[nome] > 10:
+                    logger.critical(f"Muitos restarts consecutivos. Parando o bot {nome}.")
                     break
                     
                 logger.info(f"Reiniciando em 30 segundos...")
                 await asyncio.sleep(30)
                 
+                if geracao != self.geracao:
+                    # Loop substituído pelo supervisor enquanto esperava: self.bots já é do loop novo
+                    break
                 # Limpa o bot anterior
-                if self.bot:
+                bot = self.bots.pop(nome, None)
+                if bot:
                     try:
-                        await self.bot.close()
+                        await bot.close()
                     except:
                         pass
-                    self.bot = None
             else:
+                if nome in self.reiniciar:
+                    # Fechado pelo supervisor: sobe um cliente novo na hora
+                    self.reiniciar.discard(nome)
+                    self.bots.pop(nome, None)
+                    continue
                 # Bot parou normalmente
-                logger.info("Bot parou normalmente.")
+                logger.info(f"Bot {nome} parou normalmente.")
                 break
+            
+    async def reiniciar_bot(self, nome, motivo):
+        """Fecha só o cliente de um tenant; run_tenant cria outro em seguida"""
+        bot = self.bots.get(nome)
+        # Já fechado (ex.: na espera entre restarts): o próprio run_tenant vai recriá-lo
+        if bot is None or bot.is_closed() or nome in self.reiniciar:
+            return
+        logger.warning(f"Reiniciando o cliente {nome}: {motivo}")
+        self.reiniciar.add(nome)
+        try:
+            await bot.close()
+        except Exception as e:
+            # Cliente não fechou: start() segue rodando e o pedido não pode ficar pendurado
+            self.reiniciar.discard(nome)
+            logger.error(f"Erro ao fechar o cliente {nome}: {e}")
+            
+    def reiniciar_loop(self):
+        """
+        Loop travado (chamado pelo supervisor, de outra thread): os bots sobem num loop novo
+        Só depois que o loop antigo fecha os clientes dele e termina: dois clientes com o mesmo
+        token, registro e arquivos de estado nunca rodam juntos. Thread travada não pode ser
+        morta; se ela não parar no prazo, o processo sai e a plataforma o reinicia
+        """
+        loop_antigo, thread_antiga, execucao = self.loop, self.thread, self.execucao
+        antigos = list(self.bots.values())
+        self.geracao += 1
+        
+        async def parar_antigos():
+            # Fecha os clientes e cancela os tenants (inclusive os na espera entre restarts)
+            await asyncio.gather(*(bot.close() for bot in antigos), return_exceptions=True)
+            if execucao is not None:
+                execucao.cancel()
+                
+        if loop_antigo is not None:
+            asyncio.run_coroutine_threadsafe(parar_antigos(), loop_antigo)
+        if thread_antiga is not None:
+            thread_antiga.join(self.saude.opcoes["espera_parada_s"])
+            if thread_antiga.is_alive():
+                logger.critical("Loop travado não parou: encerrando o processo para a plataforma reiniciar")
+                ouvinte_logs.stop()
+                os._exit(1)
+        self.bots = {}
+        self.reiniciar.clear()
+        self.iniciar_thread()
+            
+    def iniciar_thread(self):
+        """Sobe o loop dos bots numa thread própria"""
+        self.saude.novo_loop()
+        self.thread = threading.Thread(target=run_bot, args=(self,), name=f"bots-{self.geracao}", daemon=True)
+        self.thread.start()
+            
+    async def run_with_restart(self):
+        """Executa todos os tenants no mesmo loop, com um pool HTTP compartilhado"""
+        self.running = True
+        self.loop = asyncio.get_running_loop()
+        conector = self.conector = ConectorCompartilhado()
+        publicador = asyncio.create_task(publicar_status(self.snapshot, self.get_status))
+        pulso = asyncio.create_task(self.saude.pulsar())
+        
+        self.execucao = asyncio.gather(*(self.run_tenant(tenant) for tenant in self.tenants))
+        try:
+            await self.execucao
+        except asyncio.CancelledError:
+            logger.warning("Loop antigo encerrado pelo supervisor; os bots seguem num loop novo")
+        finally:
+            publicador.cancel()
+            pulso.cancel()
+            await conector.fechar()
                 
     def stop(self):
-        """Para o bot graciosamente"""
+        """Para os bots graciosamente"""
         logger.info("Parando FenixBot...")
         self.running = False
-        if self.bot:
-            asyncio.create_task(self.bot.close())
+        self.supervisor.parar()
+        # Parada deliberada nunca é tratada como reinício pedido pelo supervisor
+        self.reiniciar.clear()
+        for bot in list(self.bots.values()):
+            asyncio.create_task(bot.close())
             
-    def get_status(self):
-        """Retorna status atual do bot"""
-        uptime = datetime.now() - self.start_time
+    def memoria_bot(self, bot):
+        """Relatório de caches (percorre todos os membros/canais): refeito a cada INTERVALO_MEMORIA"""
+        agora = time.monotonic()
+        anterior = self.memoria.get(bot)
+        if anterior is None or agora - anterior[0] >= INTERVALO_MEMORIA:
+            anterior = self.memoria[bot] = (agora, relatorio_caches(bot))
+        return anterior[1]
+        
+    async def resumo_registro(self, bot):
+        try:
+            async with asyncio.timeout(2):
+                return await bot.registro.resumo()
+        except Exception as e:
+            logger.warning(f"Resumo do registro indisponível: {e!r}")
+            return {}
+            
+    async def status_bot(self, bot):
+        """Métricas de um bot (isoladas por tenant)"""
         return {
+            'bot_ready': bot.is_ready() if bot else False,
+            'guild_count': len(bot.guilds) if bot and bot.is_ready() else 0,
+            'memoria': self.memoria_bot(bot) if bot and bot.is_ready() else {},
+            'tickets': bot.indice_tickets.estatisticas() if bot else {},
+            'analise': bot.analise.ultimo_resumo if bot and hasattr(bot, 'analise') else {},
+            'atendimento': bot.atendimento.estatisticas() if bot else {},
+            'provisionamento': bot.provisionamento.estatisticas() if bot else {},
+            'transbordo': bot.transbordo.estatisticas() if bot else {},
+            'paineis': bot.paineis.estatisticas() if bot else {},
+            'reconciliacao': bot.reconciliacao.estatisticas() if bot else {},
+            'eventos': bot.eventos.estatisticas() if bot else {},
+            'convites': bot.convites.estatisticas() if bot else {},
+            'fechamentos': bot.fechamentos.estatisticas() if bot and hasattr(bot, 'fechamentos') else {},
+            'registro': await self.resumo_registro(bot) if bot else {},
+            'limitador': bot.limitador.estatisticas() if bot else {},
+            'interacoes': bot.prazos.relatorio() if bot else {},
+            'config': bot.recarregador.estatisticas() if bot else {},
+            'anexos': bot.anexos.estatisticas() if bot and hasattr(bot, 'anexos') else {},
+            'agendador': bot.agendador.estatisticas() if bot else {}
+        }
+            
+    async def get_status(self):
+        """Retorna status atual (chamar no loop do bot; outras threads leem self.snapshot)"""
+        uptime = datetime.now() - self.start_time
+        # Seções detalhadas do primeiro tenant no topo (formato do modo de um bot só)
+        status = await self.status_bot(self.bot)
+        status.update({
             'running': self.running,
+            'iniciado_em': self.start_time.astimezone().isoformat(),
             'uptime': str(uptime).split('.')[0],  # Remove microsegundos
             'restart_count': self.restart_count,
-            'bot_ready': self.bot.is_ready() if self.bot else False,
-            'guild_count': len(self.bot.guilds) if self.bot and self.bot.is_ready() else 0
-        }
+            'saude': dict(self.saude.estatisticas(), **self.supervisor.estatisticas()),
+        })
+        if len(self.tenants) > 1:
+            tenants = {tenant["nome"]: dict(await self.status_bot(self.bots.get(tenant["nome"])),
+                                            restart_count=self.restarts[tenant["nome"]])
+                       for tenant in self.tenants}
+            status['tenants'] = tenants
+            status['bot_ready'] = all(t['bot_ready'] for t in tenants.values())
+            status['guild_count'] = sum(t['guild_count'] for t in tenants.values())
+        return status
 
 # Instância global do gerenciador
 bot_manager = BotManager()
 
-def run_bot():
+def run_bot(manager):
     """Executa o bot em uma thread separada"""
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        loop.run_until_complete(bot_manager.run_with_restart())
+        loop.run_until_complete(manager.run_with_restart())
     except Exception as e:
         logger.error(f"Erro crítico no bot: {e}")
     finally:
@@ -126,10 +292,10 @@ def main():
     logger.info("Iniciando aplicação...")
     logger.info("=" * 50)
     
-    # Verifica se o token está configurado
-    token = os.getenv("DISCORD_TOKEN")
-    if not token:
-        logger.error("DISCORD_TOKEN não encontrado nas variáveis de ambiente!")
+    # Verifica se o token de cada tenant está configurado
+    faltando = [tenant["token_env"] for tenant in bot_manager.tenants if not os.getenv(tenant["token_env"])]
+    if faltando:
+        logger.error(f"{', '.join(faltando)} não encontrado(s) nas variáveis de ambiente!")
         logger.error("Configure o token do bot antes de continuar.")
         sys.exit(1)
     
@@ -151,9 +317,8 @@ def main():
         
         # Inicia o bot Discord em thread separada
         logger.info("Iniciando bot Discord...")
-        bot_thread = threading.Thread(target=run_bot)
-        bot_thread.daemon = True
-        bot_thread.start()
+        bot_manager.iniciar_thread()
+        bot_manager.supervisor.iniciar()
         
         if is_deployed:
             logger.info("🚀 FenixBot DEPLOYED - Rodando 24/7 no servidor!")
@@ -168,7 +333,10 @@ def main():
                 time.sleep(60)  # Verifica a cada minuto
                 
                 # Log de status periodico
-                status = bot_manager.get_status()
+                versao = bot_manager.snapshot.atual()
+                if versao is None:
+                    continue
+                status = versao.dados
                 logger.info(f"Status: Running={status['running']}, "
                            f"Uptime={status['uptime']}, "
                            f"Restarts={status['restart_count']}, "
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Depuração de Memória - tracemalloc sob demanda e censo de objetos vivos
+Nada roda enquanto desligado: o tracemalloc só é iniciado por pedido explícito
+e o censo percorre o gc apenas quando consultado
+"""
+
+import asyncio
+import gc
+import linecache
+import threading
+import tracemalloc
+
+import discord
+
+# Quadros de pilha guardados por alocação (mais quadros = mais memória do próprio tracemalloc)
+QUADROS_PADRAO = 10
+
+# Alocações do próprio tracemalloc e do import system poluem o diff
+_FILTROS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+AGRUPAMENTOS = ("lineno", "filename", "traceback")
+
+
+class DepuradorMemoria:
+    """Controla o tracemalloc e guarda o snapshot base para os diffs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._anterior = None
+
+    def estado(self):
+        if not tracemalloc.is_tracing():
+            return {"tracemalloc": False}
+        atual, pico = tracemalloc.get_traced_memory()
+        return {
+            "tracemalloc": True,
+            "quadros": tracemalloc.get_traceback_limit(),
+            "rastreado_kb": atual // 1024,
+            "pico_kb": pico // 1024,
+            "overhead_kb": tracemalloc.get_tracemalloc_memory() // 1024,
+        }
+
+    def iniciar(self, quadros=QUADROS_PADRAO):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(quadros)
+                self._anterior = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+        return self.estado()
+
+    def parar(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._anterior = None
+        return self.estado()
+
+    def diferencas(self, limite=20, agrupar="lineno"):
+        """
+        Maiores crescimentos desde o snapshot anterior (o atual vira a nova base)
+        Returns:
+            Lista de {local, diff_kb, total_kb, diff_blocos}, ou None se o tracemalloc estiver parado
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                return None
+            atual = tracemalloc.take_snapshot().filter_traces(_FILTROS)
+            estatisticas = atual.compare_to(self._anterior, agrupar)
+            self._anterior = atual
+
+        resultado = []
+        for estatistica in estatisticas[:limite]:
+            quadro = estatistica.traceback[0]
+            item = {
+                "local": f"{quadro.filename}:{quadro.lineno}",
+                "codigo": linecache.getline(quadro.filename, quadro.lineno).strip(),
+                "diff_kb": round(estatistica.size_diff / 1024, 1),
+                "total_kb": round(estatistica.size / 1024, 1),
+                "diff_blocos": estatistica.count_diff,
+            }
+            if agrupar == "traceback":
+                item["pilha"] = [f"{q.filename}:{q.lineno}" for q in estatistica.traceback]
+            resultado.append(item)
+        return resultado
+
+
+def censo_objetos(bot=None):
+    """
+    Contagem de Views, Modals, Tasks e mensagens vivos (por classe)
+    Deve rodar no loop do bot (ver censo_no_loop) para ler caches e tasks com segurança
+    """
+    views, modals, mensagens = {}, {}, 0
+    for obj in gc.get_objects():
+        if isinstance(obj, discord.ui.Modal):
+            nome = type(obj).__name__
+            modals[nome] = modals.get(nome, 0) + 1
+        elif isinstance(obj, discord.ui.View):
+            nome = type(obj).__name__
+            views[nome] = views.get(nome, 0) + 1
+        elif isinstance(obj, discord.Message):
+            mensagens += 1
+
+    censo = {
+        "views": dict(sorted(views.items(), key=lambda item: -item[1])),
+        "modals": dict(sorted(modals.items(), key=lambda item: -item[1])),
+        "mensagens": mensagens,
+        "gc": {"objetos": len(gc.get_objects()), "geracoes": gc.get_count()},
+    }
+
+    try:
+        tarefas = asyncio.all_tasks()
+    except RuntimeError:
+        tarefas = set()
+    por_corrotina = {}
+    for tarefa in tarefas:
+        corrotina = tarefa.get_coro()
+        nome = getattr(corrotina, "__qualname__", type(corrotina).__name__)
+        por_corrotina[nome] = por_corrotina.get(nome, 0) + 1
+    censo["tasks"] = {"total": len(tarefas), "por_corrotina": dict(sorted(por_corrotina.items(), key=lambda item: -item[1])[:20])}
+
+    if bot is not None:
+        view_store = bot._connection._view_store
+        censo["view_store"] = {
+            "persistentes": len(view_store.persistent_views),
+            "por_mensagem": len(view_store._synced_message_views),
+            "modals": len(view_store._modals),
+        }
+        censo["mensagens_em_cache"] = len(bot.cached_messages)
+    return censo
+
+
+def censo_no_loop(bot, timeout=10):
+    """Executa o censo no loop do bot a partir de outra thread (ex.: Flask)"""
+    loop = getattr(bot, "loop", None) if bot is not None else None
+    if loop is None or not isinstance(loop, asyncio.AbstractEventLoop) or not loop.is_running():
+        return censo_objetos(None)
+
+    async def executar():
+        return censo_objetos(bot)
+
+    return asyncio.run_coroutine_threadsafe(executar(), loop).result(timeout)
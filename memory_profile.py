@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Perfil de Memória - Modo de baixo consumo para o cliente do gateway
+Reduz intents e caches do discord.py para hospedar muitos servidores em pouca RAM
+"""
+
+import logging
+import os
+import sys
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Perfis suportados: "padrao" usa os caches do discord.py, "baixo" corta tudo
+# que o fluxo de tickets não usa (guilds, canais, cargos e interações bastam)
+PERFIS_VALIDOS = ("padrao", "baixo")
+
+# Quantos itens de cada cache são medidos para estimar o tamanho total
+AMOSTRA_PADRAO = 20
+
+
+def obter_perfil(config):
+    """Retorna o perfil de memória configurado (config.json ou BOT_PERFIL_MEMORIA)"""
+    perfil = (config or {}).get("perfil_memoria") or os.getenv("BOT_PERFIL_MEMORIA", "padrao")
+    perfil = str(perfil).lower()
+    if perfil not in PERFIS_VALIDOS:
+        logger.warning(f"Perfil de memória desconhecido '{perfil}', usando 'padrao'")
+        return "padrao"
+    return perfil
+
+
+def opcoes_cliente(config):
+    """
+    Monta os argumentos de intents e cache para o construtor do bot
+    Args:
+        config: Configuração carregada do bot
+    Returns:
+        dict com intents, max_messages, member_cache_flags e chunk_guilds_at_startup
+    """
+    if obter_perfil(config) != "baixo":
+        return {"intents": discord.Intents.default()}
+
+    # Apenas o necessário: estrutura das guilds e mensagens dos canais de ticket
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+
+    logger.info("Perfil de memória 'baixo' ativo: intents reduzidos e cache de mensagens desativado")
+    return {
+        "intents": intents,
+        "max_messages": None,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+    }
+
+
+class CacheAutores:
+    """Cache LRU limitado com os membros que interagiram com o bot"""
+
+    def __init__(self, capacidade=500):
+        self.capacidade = max(0, int(capacidade))
+        self._membros = OrderedDict()
+
+    def registrar(self, membro):
+        """Guarda (ou renova) o autor de uma interação"""
+        if self.capacidade == 0 or not isinstance(membro, discord.Member):
+            return
+        chave = (membro.guild.id, membro.id)
+        self._membros[chave] = membro
+        self._membros.move_to_end(chave)
+        while len(self._membros) > self.capacidade:
+            self._membros.popitem(last=False)
+
+    def obter(self, guild_id, user_id):
+        """Busca um autor recente sem chamar a API"""
+        membro = self._membros.get((guild_id, user_id))
+        if membro is not None:
+            self._membros.move_to_end((guild_id, user_id))
+        return membro
+
+    def __len__(self):
+        return len(self._membros)
+
+    def valores(self):
+        return list(self._membros.values())
+
+
+def _tamanho_objeto(obj):
+    """Tamanho raso do objeto mais seus atributos simples (sem seguir outros modelos)"""
+    total = sys.getsizeof(obj)
+    atributos = []
+    if hasattr(obj, "__dict__"):
+        atributos.extend(vars(obj).values())
+    for slot in getattr(type(obj), "__slots__", ()):
+        valor = getattr(obj, slot, None)
+        if valor is not None:
+            atributos.append(valor)
+    for valor in atributos:
+        if isinstance(valor, (str, bytes, int, float, tuple, list, dict, set)):
+            total += sys.getsizeof(valor)
+    return total
+
+
+def _estimar(itens, amostra=AMOSTRA_PADRAO):
+    """Estima o uso de memória de uma coleção medindo apenas uma amostra"""
+    itens = list(itens)
+    if not itens:
+        return {"itens": 0, "bytes_estimados": 0}
+    medidos = itens[:amostra]
+    media = sum(_tamanho_objeto(item) for item in medidos) / len(medidos)
+    return {"itens": len(itens), "bytes_estimados": int(media * len(itens))}
+
+
+def relatorio_caches(bot):
+    """
+    Relatório de uso estimado de memória por cache do cliente
+    Args:
+        bot: Instância do bot (commands.Bot)
+    Returns:
+        dict com o perfil ativo e itens/bytes estimados de cada cache
+    """
+    if bot is None:
+        return {}
+
+    state = bot._connection
+    guilds = list(state._guilds.values())
+    canais = [canal for guild in guilds for canal in guild.channels]
+    cargos = [cargo for guild in guilds for cargo in guild.roles]
+    membros = [membro for guild in guilds for membro in guild._members.values()]
+    view_store = state._view_store
+
+    caches = {
+        "guilds": _estimar(guilds),
+        "canais": _estimar(canais),
+        "cargos": _estimar(cargos),
+        "membros": _estimar(membros),
+        "usuarios": _estimar(state._users.values()),
+        "emojis": _estimar(state._emojis.values()),
+        "stickers": _estimar(state._stickers.values()),
+        "mensagens": _estimar(state._messages or ()),
+        "views": _estimar(list(view_store.persistent_views) + list(view_store._synced_message_views.values())),
+    }
+    autores = getattr(bot, "cache_autores", None)
+    if autores is not None:
+        caches["autores_interacao"] = _estimar(autores.valores())
+
+    return {
+        "perfil": obter_perfil(getattr(bot, "config", None)),
+        "max_messages": state.max_messages,
+        "caches": caches,
+        "bytes_estimados_total": sum(c["bytes_estimados"] for c in caches.values()),
+    }
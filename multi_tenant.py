@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Multi-Tenant - Vários bots (tokens) no mesmo processo e event loop
+Cada tenant tem diretório próprio (config.json, tickets.db e demais arquivos de estado);
+todos compartilham o pool de conexões HTTP, o Flask e o pipeline de logs
+"""
+
+import json
+import logging
+import os
+import socket
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Sem arquivo de tenants: um único bot no diretório atual com DISCORD_TOKEN (modo antigo)
+TENANT_PADRAO = {
+    "nome": "principal",
+    "token_env": "DISCORD_TOKEN",   # nome da variável de ambiente com o token (nunca o token no arquivo)
+    "diretorio": ".",
+}
+
+
+def carregar_tenants(caminho=None):
+    """
+    Lê a lista de tenants (tenants.json ou BOT_TENANTS)
+    Formato: [{"nome": "parceiro", "token_env": "TOKEN_PARCEIRO", "diretorio": "tenants/parceiro"}, ...]
+    Returns:
+        Lista de tenants completos; [TENANT_PADRAO] se o arquivo não existir
+    """
+    caminho = caminho or os.getenv("BOT_TENANTS", "tenants.json")
+    if not os.path.exists(caminho):
+        return [dict(TENANT_PADRAO)]
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        lista = json.load(f)
+    if not isinstance(lista, list) or not lista:
+        raise ValueError(f"{caminho}: esperada uma lista não vazia de tenants")
+
+    tenants, nomes, diretorios = [], set(), set()
+    for item in lista:
+        tenant = dict(TENANT_PADRAO, **item)
+        if "nome" not in item or "token_env" not in item:
+            raise ValueError(f"{caminho}: todo tenant precisa de 'nome' e 'token_env'")
+        if "diretorio" not in item:
+            tenant["diretorio"] = os.path.join("tenants", tenant["nome"])
+        diretorio = os.path.normpath(tenant["diretorio"])
+        if tenant["nome"] in nomes or diretorio in diretorios:
+            raise ValueError(f"{caminho}: nome ou diretório repetido ({tenant['nome']})")
+        nomes.add(tenant["nome"])
+        diretorios.add(diretorio)
+        tenants.append(tenant)
+    logger.info(f"{len(tenants)} tenant(s) carregado(s) de {caminho}")
+    return tenants
+
+
+class ConectorCompartilhado(aiohttp.TCPConnector):
+    """
+    Pool HTTP único para todos os bots do processo
+    A ClientSession de cada bot fecha o conector ao encerrar; aqui isso é ignorado
+    e o pool só fecha de verdade em fechar(), quando o gerenciador termina
+    """
+
+    def __init__(self):
+        # Mesmos parâmetros do conector padrão do discord.py (o Discord não usa IPv6)
+        super().__init__(limit=0, family=socket.AF_INET)
+
+    async def close(self, **kwargs):
+        return None
+
+    async def fechar(self):
+        await super().close()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Categorias de Transbordo - Contorna o limite de 50 canais por categoria
+Cria/reaproveita "Produtos 2", "Produtos 3"... com as mesmas permissões e recolhe as vazias
+"""
+
+import asyncio
+import logging
+import re
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Limite do Discord de canais por categoria
+LIMITE_CATEGORIA = 50
+
+
+def categorias_relacionadas(guild, base):
+    """Categoria base seguida das de transbordo ("<nome> 2", "<nome> 3"...) em ordem"""
+    padrao = re.compile(rf"^{re.escape(base.name)} (\d+)$")
+    extras = []
+    for categoria in guild.categories:
+        encontrado = padrao.match(categoria.name)
+        if encontrado and categoria.id != base.id:
+            extras.append((int(encontrado.group(1)), categoria))
+    return [base] + [categoria for _, categoria in sorted(extras, key=lambda item: item[0])]
+
+
+class CategoriasTransbordo:
+    """Escolhe a categoria com vaga e reserva a vaga até o canal existir"""
+
+    def __init__(self, limite=LIMITE_CATEGORIA):
+        self.limite = limite
+        self._pendentes = {}
+        self._locks = {}
+        self.categorias_criadas = 0
+        self.categorias_recolhidas = 0
+
+    def _ocupacao(self, categoria):
+        return len(categoria.channels) + self._pendentes.get(categoria.id, 0)
+
+    async def _escolher(self, base):
+        """Primeira categoria (base ou transbordo) com vaga; cria uma nova se todas estiverem cheias"""
+        lock = self._locks.setdefault(base.id, asyncio.Lock())
+        async with lock:
+            relacionadas = categorias_relacionadas(base.guild, base)
+            for categoria in relacionadas:
+                if self._ocupacao(categoria) < self.limite:
+                    break
+            else:
+                # Reaproveita números livres (ex.: "Produtos 2" já recolhida)
+                nomes = {c.name for c in relacionadas}
+                numero = 2
+                while f"{base.name} {numero}" in nomes:
+                    numero += 1
+                categoria = await base.guild.create_category(
+                    name=f"{base.name} {numero}",
+                    overwrites=base.overwrites,
+                    reason="Categoria de tickets cheia"
+                )
+                self.categorias_criadas += 1
+                logger.info(f"Categoria de transbordo criada: {categoria.name}")
+            self._pendentes[categoria.id] = self._pendentes.get(categoria.id, 0) + 1
+            return categoria
+
+    def _liberar(self, categoria):
+        restantes = self._pendentes.get(categoria.id, 0) - 1
+        if restantes > 0:
+            self._pendentes[categoria.id] = restantes
+        else:
+            self._pendentes.pop(categoria.id, None)
+
+    async def criar_canal(self, base, **kwargs):
+        """Cria o canal de ticket na primeira categoria com vaga a partir da base"""
+        categoria = await self._escolher(base)
+        try:
+            return await base.guild.create_text_channel(category=categoria, **kwargs)
+        finally:
+            self._liberar(categoria)
+
+    async def recolher(self, categoria, bases):
+        """
+        Apaga uma categoria de transbordo que ficou vazia (chamado no delete de canal)
+        Args:
+            categoria: Categoria do canal apagado
+            bases: Categorias de ticket configuradas (nunca são apagadas)
+        """
+        if not isinstance(categoria, discord.CategoryChannel):
+            return
+        base = next((b for b in bases if categoria in categorias_relacionadas(b.guild, b)[1:]), None)
+        if base is None:
+            return
+
+        # Mesmo lock da escolha: a categoria não some enquanto recebe um canal
+        async with self._locks.setdefault(base.id, asyncio.Lock()):
+            if categoria.channels or self._pendentes.get(categoria.id):
+                return
+            try:
+                await categoria.delete(reason="Categoria de transbordo vazia")
+                self.categorias_recolhidas += 1
+                logger.info(f"Categoria de transbordo recolhida: {categoria.name}")
+            except discord.HTTPException as e:
+                logger.error(f"Erro ao recolher categoria {categoria.name}: {e}")
+
+    def ocupacao(self, guild, base):
+        """Ocupação por categoria, para status/diagnóstico"""
+        return {c.name: self._ocupacao(c) for c in categorias_relacionadas(guild, base)}
+
+    def estatisticas(self):
+        return {
+            "criadas": self.categorias_criadas,
+            "recolhidas": self.categorias_recolhidas,
+            "vagas_reservadas": sum(self._pendentes.values()),
+        }
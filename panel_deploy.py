@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Implantação de Painéis - Lembra a mensagem do painel de cada servidor e o hash do conteúdo
+renderizado; /paineis edita no lugar só os painéis cujo hash mudou, com concorrência
+limitada entre servidores e espera em caso de rate limit
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+import discord
+
+from ticket_index import salvar_json_atomico
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "implantacao_paineis" no config.json)
+IMPLANTACAO_PADRAO = {
+    "concorrencia": 3,
+    "tentativas": 3,
+}
+
+
+def hash_painel(embed, view):
+    """Hash do payload renderizado (sem o timestamp do embed, que muda a cada render)"""
+    dados = embed.to_dict()
+    dados.pop("timestamp", None)
+    payload = {"embed": dados, "componentes": view.to_components()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class RegistroPaineis:
+    """guild_id -> {canal, mensagem, hash} do painel publicado (persistido em JSON)"""
+
+    def __init__(self, arquivo="paineis.json"):
+        self.arquivo = arquivo
+        self._paineis = {}
+        self.ultima_implantacao = {}
+
+    def registrar(self, guild_id, mensagem, hash_atual):
+        self._paineis[guild_id] = {"canal": mensagem.channel.id, "mensagem": mensagem.id, "hash": hash_atual}
+        self.salvar()
+
+    def remover(self, guild_id):
+        if self._paineis.pop(guild_id, None) is not None:
+            self.salvar()
+
+    def itens(self):
+        return list(self._paineis.items())
+
+    def salvar(self):
+        try:
+            salvar_json_atomico(self.arquivo, {str(g): p for g, p in self._paineis.items()})
+        except Exception as e:
+            logger.error(f"Erro ao salvar painéis: {e}")
+
+    def carregar(self):
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    self._paineis = {int(g): p for g, p in json.load(f).items()}
+                logger.info(f"Painéis carregados: {len(self._paineis)}")
+        except Exception as e:
+            logger.error(f"Erro ao carregar painéis: {e}")
+
+    def estatisticas(self):
+        return {"registrados": len(self._paineis), "ultima_implantacao": self.ultima_implantacao}
+
+
+async def publicar_painel(bot, interaction, embed, view):
+    """Responde a /painel com o painel e lembra a mensagem para implantações futuras"""
+    await interaction.response.send_message(embed=embed, view=view)
+    mensagem = await interaction.original_response()
+    bot.paineis.registrar(interaction.guild.id, mensagem, hash_painel(embed, view))
+
+
+async def _editar(mensagem, embed, view, tentativas):
+    """Edita respeitando 429 que escapem do controle de buckets do discord.py / proxy"""
+    for tentativa in range(tentativas):
+        try:
+            return await mensagem.edit(embed=embed, view=view)
+        except discord.HTTPException as e:
+            if e.status != 429 or tentativa == tentativas - 1:
+                raise
+            espera = float(e.response.headers.get("Retry-After", 1))
+            logger.warning(f"Rate limit ao editar painel: aguardando {espera:.1f}s")
+            await asyncio.sleep(espera)
+
+
+async def implantar_paineis(bot, simular=False):
+    """
+    Re-renderiza o painel de cada servidor registrado e edita só os que mudaram
+    Args:
+        simular: Só conta o que seria editado, sem chamadas à API
+    Returns:
+        {"atualizados", "iguais", "ausentes", "falhas"}
+    """
+    opcoes = dict(IMPLANTACAO_PADRAO, **(bot.config.get("implantacao_paineis") or {}))
+    semaforo = asyncio.Semaphore(opcoes["concorrencia"])
+    resultado = dict.fromkeys(("atualizados", "iguais", "ausentes", "falhas"), 0)
+
+    async def implantar(guild_id, painel):
+        guild = bot.get_guild(guild_id)
+        canal = guild.get_channel(painel["canal"]) if guild else None
+        if canal is None:
+            resultado["ausentes"] += 1
+            return
+        embed, view = bot.renderizar_painel(guild)
+        novo_hash = hash_painel(embed, view)
+        if novo_hash == painel["hash"]:
+            resultado["iguais"] += 1
+            return
+        if simular:
+            resultado["atualizados"] += 1
+            return
+        async with semaforo:
+            try:
+                await _editar(canal.get_partial_message(painel["mensagem"]), embed, view, opcoes["tentativas"])
+            except discord.NotFound:
+                # Painel apagado à mão: esquece (o próximo /painel registra de novo)
+                bot.paineis.remover(guild_id)
+                resultado["ausentes"] += 1
+                return
+            except discord.HTTPException as e:
+                resultado["falhas"] += 1
+                logger.error(f"Erro ao atualizar painel em {guild.name}: {e}")
+                return
+        painel["hash"] = novo_hash
+        resultado["atualizados"] += 1
+
+    await asyncio.gather(*(implantar(g, p) for g, p in bot.paineis.itens()))
+    if not simular:
+        bot.paineis.salvar()
+        bot.paineis.ultima_implantacao = resultado
+    logger.info(f"Implantação de painéis{' (simulação)' if simular else ''}: {resultado}")
+    return resultado
+
+
+def criar_comando_paineis(bot):
+    """Cria o slash command /paineis (dono do bot: atualiza os painéis de todos os servidores)"""
+
+    @discord.app_commands.command(name="paineis", description="Atualiza no lugar os painéis que mudaram em todos os servidores")
+    @discord.app_commands.default_permissions(administrator=True)
+    @discord.app_commands.describe(simular="Só mostra quantos painéis seriam editados")
+    async def paineis(interaction: discord.Interaction, simular: bool = False):
+        if not await bot.is_owner(interaction.user):
+            return await interaction.response.send_message("🚫 Apenas o dono do bot pode implantar painéis.", ephemeral=True)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        resultado = await implantar_paineis(bot, simular)
+        titulo = "🔎 Simulação da implantação" if simular else "🚀 Painéis implantados"
+        await interaction.followup.send(
+            f"**{titulo}**\n"
+            f"✏️ {'A atualizar' if simular else 'Atualizados'}: {resultado['atualizados']}\n"
+            f"✅ Sem mudança: {resultado['iguais']}\n"
+            f"👻 Ausentes: {resultado['ausentes']}\n"
+            f"❌ Falhas: {resultado['falhas']}",
+            ephemeral=True
+        )
+
+    return paineis
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Fila de Provisionamento - Criação de canais de ticket por classes de prioridade
+Enfileiramento justo ponderado (start-time fair queueing): classes com peso maior recebem
+canais primeiro, mas toda classe avança na proporção do seu peso (sem inanição)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "prioridades" no config.json)
+PRIORIDADES_PADRAO = {
+    "classes": {"alta": 4, "normal": 2, "baixa": 1},
+    "padrao": "normal",
+    "cargos": {},          # {"<id do cargo>": "alta"}
+    "tipos": {},           # {"parceria": "baixa"}
+    "concorrencia": 2,
+}
+
+
+def classificar(config, membro, tipo):
+    """
+    Classe de prioridade do pedido: a mais alta entre os cargos do membro;
+    sem cargo mapeado, a do tipo de ticket; senão a padrão
+    """
+    prioridades = dict(PRIORIDADES_PADRAO, **(config.get("prioridades") or {}))
+    pesos = prioridades["classes"]
+    cargos = prioridades["cargos"]
+    candidatas = [cargos[str(role.id)] for role in getattr(membro, "roles", ()) if str(role.id) in cargos]
+    candidatas = [c for c in candidatas if c in pesos]
+    if candidatas:
+        return max(candidatas, key=lambda c: pesos[c])
+    classe = prioridades["tipos"].get(tipo, prioridades["padrao"])
+    return classe if classe in pesos else prioridades["padrao"]
+
+
+class FilaProvisionamento:
+    """
+    Executa fábricas de coroutine com concorrência limitada, na ordem do WFQ
+    Cada pedido recebe a etiqueta inicio = max(V, fim_da_classe); fim = inicio + 1/peso;
+    é servido o menor fim. V é o início do último pedido servido
+    """
+
+    def __init__(self, config=None):
+        self._heap = []
+        self._seq = itertools.count()
+        self._tempo_virtual = 0.0
+        self._fim_classe = {}
+        self._acordar = asyncio.Event()
+        self._trabalhadores = []
+        self.configurar(config)
+        self.servidos = {}
+        self.espera_total = {}
+
+    def configurar(self, config=None):
+        """Pesos valem na hora; a concorrência só muda no próximo iniciar()"""
+        prioridades = dict(PRIORIDADES_PADRAO, **(config or {}))
+        self.pesos = prioridades["classes"]
+        self.concorrencia = prioridades["concorrencia"]
+
+    def iniciar(self):
+        """Inicia os trabalhadores (no loop do bot)"""
+        if not self._trabalhadores:
+            self._trabalhadores = [asyncio.create_task(self._trabalhar()) for _ in range(self.concorrencia)]
+
+    def parar(self):
+        for tarefa in self._trabalhadores:
+            tarefa.cancel()
+        self._trabalhadores = []
+
+    async def executar(self, classe, fabrica):
+        """
+        Enfileira e aguarda a execução
+        Args:
+            classe: Classe de prioridade (ver classificar)
+            fabrica: Função sem argumentos que retorna a coroutine a executar
+        """
+        if not self._trabalhadores:
+            # Fila não iniciada (ex.: antes do setup_hook): executa direto
+            return await fabrica()
+
+        peso = self.pesos.get(classe, 1)
+        inicio = max(self._tempo_virtual, self._fim_classe.get(classe, 0.0))
+        fim = inicio + 1 / peso
+        self._fim_classe[classe] = fim
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (fim, next(self._seq), inicio, classe, fabrica, futuro, time.monotonic()))
+        self._acordar.set()
+        return await futuro
+
+    async def _trabalhar(self):
+        while True:
+            while not self._heap:
+                self._acordar.clear()
+                await self._acordar.wait()
+            _, _, inicio, classe, fabrica, futuro, enfileirado = heapq.heappop(self._heap)
+            self._tempo_virtual = max(self._tempo_virtual, inicio)
+            if futuro.cancelled():
+                continue
+            self.servidos[classe] = self.servidos.get(classe, 0) + 1
+            self.espera_total[classe] = self.espera_total.get(classe, 0.0) + time.monotonic() - enfileirado
+            try:
+                futuro.set_result(await fabrica())
+            except Exception as e:
+                if not futuro.cancelled():
+                    futuro.set_exception(e)
+
+    def estatisticas(self):
+        na_fila = {}
+        for *_, classe, _, _, _ in self._heap:
+            na_fila[classe] = na_fila.get(classe, 0) + 1
+        return {
+            "na_fila": na_fila,
+            "servidos": dict(self.servidos),
+            "espera_media_ms": {
+                classe: round(self.espera_total[classe] / total * 1000)
+                for classe, total in self.servidos.items() if total
+            },
+        }
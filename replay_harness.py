@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Gravação e Reprodução - Captura eventos do gateway, interações e respostas REST reais
+num arquivo compacto (JSON Lines + gzip, segredos redigidos) e reproduz a sessão contra
+um stub local para comparar latência e número de chamadas REST entre versões
+
+Uso:
+    Gravar: "gravacao": "gravacoes/sessao.jsonl.gz" no config.json (ou BOT_GRAVACAO);
+            cada cliente grava em sessao-<tenant>-<data-hora>.jsonl.gz
+    python replay_harness.py reproduzir sessao.jsonl.gz --bot final --velocidade 10 --saida atual.json
+    python replay_harness.py comparar base.json atual.json
+"""
+
+import argparse
+import asyncio
+import gzip
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import discord
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+from async_logging import contexto_atual
+
+logger = logging.getLogger(__name__)
+
+VERSAO_FORMATO = 1
+
+# Campos que nunca vão para o arquivo
+CAMPOS_SECRETOS = {"token", "access_token", "refresh_token", "session_id", "email", "phone", "password", "ip"}
+
+# Linhas acumuladas antes de comprimir e gravar
+LINHAS_POR_BLOCO = 256
+
+# Variantes reproduzíveis: nome -> (módulo, classe)
+VARIANTES = {
+    "final": ("bot_final", "FenixBotFinal"),
+    "completo": ("bot", "FenixBot"),
+}
+
+# Regressão tolerada pelo comparar (fração)
+TOLERANCIA_LATENCIA = 0.2
+
+_INTERACAO_URL = re.compile(r"/interactions/(\d+)/")
+
+
+def redigir(valor):
+    """Cópia do payload sem os campos secretos"""
+    if isinstance(valor, dict):
+        return {k: ("<redigido>" if k in CAMPOS_SECRETOS else redigir(v)) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [redigir(v) for v in valor]
+    return valor
+
+
+def _status_erro(erro):
+    return {"status": erro.status, "code": erro.code, "message": erro.text}
+
+
+def caminho_sessao(caminho, rotulo=None):
+    """
+    Arquivo único por cliente e sessão: sessao.jsonl.gz -> sessao-<rotulo>-<data-hora>.jsonl.gz
+    (um restart ou outro tenant nunca sobrescreve uma gravação anterior)
+    """
+    diretorio, nome = os.path.split(caminho)
+    base, ponto, extensao = nome.partition(".")
+    partes = [base] + ([rotulo] if rotulo else []) + [time.strftime("%Y%m%d-%H%M%S")]
+    candidato = os.path.join(diretorio, "-".join(partes) + ponto + extensao)
+    sequencia = 1
+    while os.path.exists(candidato):
+        sequencia += 1
+        candidato = os.path.join(diretorio, "-".join(partes + [str(sequencia)]) + ponto + extensao)
+    return candidato
+
+
+# ===========================
+# Gravação
+# ===========================
+class GravadorSessao:
+    """Instalado no bot antes de conectar; grava em blocos comprimidos"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._inicio = time.monotonic()
+        self._linhas = []
+        self.gravadas = 0
+        self._bot = None
+        self._request_original = None
+        self._adaptador = None
+        self._request_adaptador = None
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._arquivo = gzip.open(caminho, "wt", encoding="utf-8")
+
+    def _gravar(self, registro):
+        registro["t"] = round(time.monotonic() - self._inicio, 4)
+        self._linhas.append(json.dumps(registro, separators=(",", ":"), ensure_ascii=False, default=str))
+        self.gravadas += 1
+        if len(self._linhas) >= LINHAS_POR_BLOCO:
+            self.descarregar()
+
+    def descarregar(self):
+        if self._linhas:
+            self._arquivo.write("\n".join(self._linhas) + "\n")
+            self._linhas = []
+
+    def instalar(self, bot):
+        """
+        Ativa on_socket_raw_receive e envolve os dois caminhos REST (HTTPClient e webhooks/interações)
+        Chamado no __init__ do bot, dentro da task do tenant: o adaptador de webhooks é uma
+        ContextVar, então o adaptador gravado vale só para as tasks deste cliente
+        """
+        self._gravar({"cabecalho": {
+            "versao": VERSAO_FORMATO,
+            "bot": type(bot).__name__,
+            "config": redigir({k: v for k, v in bot.config.items() if k != "gravacao"}),
+        }})
+        bot._enable_debug_events = True
+        bot.add_listener(self._ao_receber, "on_socket_raw_receive")
+        self._bot = bot
+        self._request_original = bot.http.request
+        bot.http.request = self._envolver(self._request_original)
+        # Parte do adaptador atual do cliente (pode já desviar para o proxy REST)
+        self._request_adaptador = async_context.get().request
+        self._adaptador = AsyncWebhookAdapter()
+        self._adaptador.request = self._envolver(self._request_adaptador)
+        async_context.set(self._adaptador)
+        logger.info(f"Gravando sessão em {self.caminho}")
+
+    async def _ao_receber(self, mensagem):
+        dados = json.loads(mensagem) if isinstance(mensagem, str) else mensagem
+        if dados.get("op") == 0:
+            self._gravar({"ev": dados["t"], "d": redigir(dados["d"])})
+
+    def _envolver(self, original):
+        async def request(route, *args, **kwargs):
+            if self._arquivo.closed:
+                # Task antiga ainda com o adaptador deste cliente: segue sem gravar
+                return await original(route, *args, **kwargs)
+            inicio = time.monotonic()
+            registro = {"m": route.method, "p": route.path}
+            try:
+                resposta = await original(route, *args, **kwargs)
+                registro["r"] = redigir(resposta)
+                return resposta
+            except discord.HTTPException as e:
+                registro["erro"] = _status_erro(e)
+                raise
+            finally:
+                registro["ms"] = round((time.monotonic() - inicio) * 1000, 1)
+                self._gravar({"rest": registro})
+
+        return request
+
+    def fechar(self):
+        """Desfaz os wrappers (o bot de um restart começa limpo) e fecha o arquivo"""
+        if self._arquivo.closed:
+            return
+        if self._bot is not None:
+            self._bot.http.request = self._request_original
+            self._bot.remove_listener(self._ao_receber, "on_socket_raw_receive")
+        if self._adaptador is not None:
+            # A ContextVar só pode ser reposta no contexto do tenant; aqui o adaptador volta ao original
+            self._adaptador.request = self._request_adaptador
+        self.descarregar()
+        self._arquivo.close()
+        logger.info(f"Sessão gravada: {self.gravadas} registro(s) em {self.caminho}")
+
+
+def iniciar_gravacao(bot, caminho):
+    """Instala o gravador se houver caminho configurado (None caso contrário)"""
+    if not caminho:
+        return None
+    gravador = GravadorSessao(caminho_sessao(caminho, contexto_atual().get("tenant")))
+    gravador.instalar(bot)
+    return gravador
+
+
+def ler_sessao(caminho):
+    """(cabeçalho, [registros]) do arquivo gravado"""
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        registros = [json.loads(linha) for linha in f if linha.strip()]
+    if not registros or "cabecalho" not in registros[0]:
+        raise ValueError(f"{caminho} não é uma gravação válida")
+    return registros[0]["cabecalho"], registros[1:]
+
+
+# ===========================
+# Reprodução
+# ===========================
+class StubRest:
+    """
+    Responde cada rota com as respostas gravadas, na ordem (a última se repete quando acabam)
+    Conta as chamadas por rota e o tempo até a primeira resposta de cada interação
+    """
+
+    def __init__(self, registros, simular_latencia=False):
+        self._respostas = {}
+        for registro in registros:
+            if "rest" in registro:
+                rest = registro["rest"]
+                self._respostas.setdefault((rest["m"], rest["p"]), []).append(rest)
+        self._posicao = {}
+        self.simular_latencia = simular_latencia
+        self.chamadas = {}
+        self.sem_gravacao = 0
+        self.interacoes_pendentes = {}
+        self.latencias_interacao = []
+
+    async def request(self, route, *args, **kwargs):
+        chave = (route.method, route.path)
+        rota = f"{route.method} {route.path}"
+        self.chamadas[rota] = self.chamadas.get(rota, 0) + 1
+
+        encontrado = _INTERACAO_URL.search(route.url)
+        if encontrado and route.path.endswith("/callback"):
+            inicio = self.interacoes_pendentes.pop(encontrado.group(1), None)
+            if inicio is not None:
+                self.latencias_interacao.append((time.monotonic() - inicio) * 1000)
+
+        gravadas = self._respostas.get(chave)
+        if not gravadas:
+            self.sem_gravacao += 1
+            return {}
+        posicao = self._posicao.get(chave, 0)
+        self._posicao[chave] = posicao + 1
+        gravada = gravadas[min(posicao, len(gravadas) - 1)]
+        if self.simular_latencia:
+            await asyncio.sleep(gravada.get("ms", 0) / 1000)
+        if "erro" in gravada:
+            erro = gravada["erro"]
+            classe = {403: discord.Forbidden, 404: discord.NotFound}.get(erro["status"], discord.HTTPException)
+            resposta = SimpleNamespace(status=erro["status"], reason="")
+            raise classe(resposta, {"code": erro["code"], "message": erro["message"]})
+        return gravada.get("r")
+
+
+class _GatewayFalso:
+    """O suficiente de DiscordWebSocket para presença e fechamento"""
+    open = False
+
+    async def change_presence(self, **kwargs):
+        return None
+
+    async def request_chunks(self, *args, **kwargs):
+        return None
+
+
+def _carregar_classe(variante):
+    modulo, classe = VARIANTES[variante]
+    try:
+        return getattr(importlib.import_module(modulo), classe)
+    except ImportError:
+        # No repositório os arquivos ainda têm o sufixo " (1)"
+        caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{modulo} (1).py")
+        spec = importlib.util.spec_from_file_location(modulo, caminho)
+        carregado = importlib.util.module_from_spec(spec)
+        sys.modules[modulo] = carregado
+        spec.loader.exec_module(carregado)
+        return getattr(carregado, classe)
+
+
+def _percentil(valores, q):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return round(ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))], 2)
+
+
+async def reproduzir(caminho, variante="final", velocidade=1.0, simular_latencia=False, espera_final=2.0):
+    """
+    Reproduz a gravação num diretório temporário (config gravada, banco e arquivos novos)
+    Args:
+        velocidade: 1 = tempo real, 10 = 10x mais rápido, 0 = sem esperas
+    Returns:
+        dict com chamadas REST por rota e latência até a primeira resposta das interações
+    """
+    cabecalho, registros = ler_sessao(caminho)
+    classe = _carregar_classe(variante)
+    stub = StubRest(registros, simular_latencia)
+    eventos = [r for r in registros if "ev" in r]
+
+    # A reprodução nunca grava a si mesma
+    os.environ.pop("BOT_GRAVACAO", None)
+    diretorio_original = os.getcwd()
+    diretorio = tempfile.mkdtemp(prefix="replay_")
+    adaptador = async_context.get()
+    request_original = adaptador.request
+    os.chdir(diretorio)
+    try:
+        with open("config.json", "w", encoding="utf-8") as f:
+            json.dump(cabecalho["config"], f)
+
+        bot = classe()
+        bot.http.request = stub.request
+        adaptador.request = stub.request
+        bot.ws = _GatewayFalso()
+        bot._connection.guild_ready_timeout = 0.05
+        await bot._async_setup_hook()
+
+        inicio = time.monotonic()
+        anterior = 0.0
+        configurado = False
+        erros_parser = 0
+        erro_setup = None
+        for evento in eventos:
+            if velocidade and evento["t"] > anterior:
+                await asyncio.sleep((evento["t"] - anterior) / velocidade)
+            anterior = evento["t"]
+            parser = bot._connection.parsers.get(evento["ev"])
+            if parser is None:
+                continue
+            if evento["ev"] == "INTERACTION_CREATE":
+                stub.interacoes_pendentes[evento["d"]["id"]] = time.monotonic()
+            try:
+                parser(evento["d"])
+            except Exception as e:
+                erros_parser += 1
+                logger.error(f"Erro ao reproduzir {evento['ev']}: {e}")
+            if evento["ev"] == "READY" and not configurado:
+                # setup_hook depois do READY: application_id conhecido para o tree.sync
+                configurado = True
+                try:
+                    await bot.setup_hook()
+                except Exception as e:
+                    erro_setup = f"{type(e).__name__}: {e}"
+                    logger.error(f"setup_hook falhou na reprodução: {erro_setup}")
+            await asyncio.sleep(0)
+
+        await asyncio.sleep(espera_final)
+        duracao = time.monotonic() - inicio
+        await bot.close()
+    finally:
+        adaptador.request = request_original
+        os.chdir(diretorio_original)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    return {
+        "bot": classe.__name__,
+        "gravado_com": cabecalho["bot"],
+        "velocidade": velocidade,
+        "eventos": len(eventos),
+        "duracao_s": round(duracao, 2),
+        "rest_total": sum(stub.chamadas.values()),
+        "rest_por_rota": dict(sorted(stub.chamadas.items())),
+        "rest_sem_gravacao": stub.sem_gravacao,
+        "erros_parser": erros_parser,
+        "erro_setup": erro_setup,
+        "interacoes": {
+            "respondidas": len(stub.latencias_interacao),
+            "sem_resposta": len(stub.interacoes_pendentes),
+            "p50_ms": _percentil(stub.latencias_interacao, 0.5),
+            "p95_ms": _percentil(stub.latencias_interacao, 0.95),
+            "max_ms": _percentil(stub.latencias_interacao, 1.0),
+        },
+    }
+
+
+def comparar(base, atual, tolerancia=TOLERANCIA_LATENCIA):
+    """
+    Compara dois resultados de reproduzir()
+    Returns:
+        Lista de regressões (vazia se a versão atual não piorou)
+    """
+    regressoes = []
+    for chave in ("p50_ms", "p95_ms"):
+        antes, depois = base["interacoes"][chave], atual["interacoes"][chave]
+        if antes and depois and depois > antes * (1 + tolerancia):
+            regressoes.append(f"latência {chave}: {antes} -> {depois}")
+    if atual["rest_total"] > base["rest_total"]:
+        regressoes.append(f"chamadas REST: {base['rest_total']} -> {atual['rest_total']}")
+    for rota in sorted(set(base["rest_por_rota"]) | set(atual["rest_por_rota"])):
+        antes, depois = base["rest_por_rota"].get(rota, 0), atual["rest_por_rota"].get(rota, 0)
+        if depois > antes:
+            regressoes.append(f"{rota}: {antes} -> {depois} chamada(s)")
+    if atual["interacoes"]["sem_resposta"] > base["interacoes"]["sem_resposta"]:
+        regressoes.append(f"interações sem resposta: {base['interacoes']['sem_resposta']} -> "
+                          f"{atual['interacoes']['sem_resposta']}")
+    return regressoes
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Reprodução de sessões gravadas do bot")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    rep = sub.add_parser("reproduzir")
+    rep.add_argument("gravacao")
+    rep.add_argument("--bot", choices=sorted(VARIANTES), default="final")
+    rep.add_argument("--velocidade", type=float, default=1.0)
+    rep.add_argument("--latencia", action="store_true", help="repete a latência REST gravada")
+    rep.add_argument("--saida")
+
+    comp = sub.add_parser("comparar")
+    comp.add_argument("base")
+    comp.add_argument("atual")
+    comp.add_argument("--tolerancia", type=float, default=TOLERANCIA_LATENCIA)
+
+    args = parser.parse_args()
+    if args.comando == "reproduzir":
+        resultado = asyncio.run(reproduzir(args.gravacao, args.bot, args.velocidade, args.latencia))
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                f.write(texto)
+        print(texto)
+        return
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.atual, encoding="utf-8") as f:
+        atual = json.load(f)
+    regressoes = comparar(base, atual, args.tolerancia)
+    for regressao in regressoes:
+        print(f"❌ {regressao}")
+    if regressoes:
+        sys.exit(1)
+    print("✅ Sem regressões")
+
+
+if __name__ == "__main__":
+    main()
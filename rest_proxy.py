@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Proxy REST Local - Todos os processos do bot enviam as chamadas REST por aqui
+Um único estado de rate limit (buckets e limite global), um pool de conexões
+com a API do Discord e métricas por rota
+
+Uso:
+    python rest_proxy.py              # sobe o proxy em 127.0.0.1:8787
+Nos bots: "proxy_rest": "http://127.0.0.1:8787" no config.json (ou BOT_PROXY_REST)
+O proxy vale por cliente: vários bots no mesmo processo podem usar proxies diferentes (ou nenhum)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+
+import aiohttp
+import discord
+from aiohttp import web
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+logger = logging.getLogger(__name__)
+
+API_DISCORD = "https://discord.com"
+VERSAO_API = "v10"
+PORTA_PADRAO = 8787
+
+# Conexões simultâneas com a API (compartilhadas por todos os processos)
+LIMITE_CONEXOES = 50
+
+# Quantas vezes o proxy repete um 429 antes de devolvê-lo ao bot
+TENTATIVAS_429 = 3
+
+# Cabeçalhos repassados em cada sentido
+CABECALHOS_ENTRADA = ("Authorization", "Content-Type", "User-Agent", "X-Audit-Log-Reason")
+CABECALHOS_IGNORADOS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+# Rotas e baldes guardados no máximo (rotas novas além disso somam em "outras")
+LIMITE_ROTAS = 1000
+LIMITE_BALDES = 5000
+
+# Balde sem uso há mais que isso (e fora de espera) pode ser descartado
+BALDE_OCIOSO_S = 600
+
+_SNOWFLAKE = re.compile(r"/\d{15,21}")
+# Token de webhook/interação vem logo após o ID: nunca vai para métricas ou chaves
+_TOKEN = re.compile(r"/(webhooks|interactions)/:id/[^/]+")
+_MAIOR = re.compile(r"^/api/v\d+/(channels|guilds|webhooks)/(\d{15,21})")
+
+
+def _redirecionar(original, base):
+    """Envolve um request do discord.py trocando a base da URL da rota pela do proxy"""
+    async def request(route, *args, **kwargs):
+        if route.url.startswith(discord.http.Route.BASE):
+            route.url = base + route.url[len(discord.http.Route.BASE):]
+        return await original(route, *args, **kwargs)
+
+    return request
+
+
+def usar_proxy(bot, url):
+    """
+    Aponta as chamadas REST deste cliente para o proxy (Route.BASE global fica intacto)
+    Chamado no __init__ do bot, dentro da task do tenant: o adaptador de webhooks/interações
+    é uma ContextVar, então o desvio vale só para as tasks deste cliente
+    """
+    if not url:
+        return False
+    base = f"{url.rstrip('/')}/api/{VERSAO_API}"
+    bot.http.request = _redirecionar(bot.http.request, base)
+    adaptador = AsyncWebhookAdapter()
+    adaptador.request = _redirecionar(async_context.get().request, base)
+    async_context.set(adaptador)
+    logger.info(f"Chamadas REST passando pelo proxy {url}")
+    return True
+
+
+def normalizar_rota(metodo, caminho):
+    """Rota para métricas e descoberta de bucket: IDs viram :id e tokens viram :token"""
+    caminho = _TOKEN.sub(r"/\1/:id/:token", _SNOWFLAKE.sub("/:id", caminho))
+    return f"{metodo} {caminho}"
+
+
+def parametro_maior(caminho):
+    encontrado = _MAIOR.match(caminho)
+    return encontrado.group(2) if encontrado else ""
+
+
+class BaldeRest:
+    """Estado de um bucket do Discord (atualizado pelos cabeçalhos X-RateLimit-*)"""
+    __slots__ = ("lock", "restantes", "reinicia_em", "usado_em")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.restantes = 1
+        self.reinicia_em = 0.0
+        self.usado_em = time.monotonic()
+
+    def ocioso(self, agora):
+        return not self.lock.locked() and self.reinicia_em <= agora and agora - self.usado_em > BALDE_OCIOSO_S
+
+    def atualizar(self, cabecalhos, agora):
+        restantes = cabecalhos.get("X-RateLimit-Remaining")
+        reset_after = cabecalhos.get("X-RateLimit-Reset-After")
+        if restantes is not None:
+            self.restantes = int(restantes)
+        if reset_after is not None:
+            self.reinicia_em = agora + float(reset_after)
+
+
+class MetricaRota:
+    __slots__ = ("requisicoes", "respostas_429", "esperas", "tempo_espera", "tempo_total", "erros")
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.respostas_429 = 0
+        self.esperas = 0
+        self.tempo_espera = 0.0
+        self.tempo_total = 0.0
+        self.erros = 0
+
+    def como_dict(self):
+        return {
+            "requisicoes": self.requisicoes,
+            "respostas_429": self.respostas_429,
+            "esperas": self.esperas,
+            "espera_total_ms": round(self.tempo_espera * 1000),
+            "latencia_media_ms": round(self.tempo_total / self.requisicoes * 1000) if self.requisicoes else None,
+            "erros": self.erros,
+        }
+
+
+class ProxyRest:
+    """
+    Repassa /api/... para a API do Discord respeitando buckets compartilhados
+    Buckets são separados por token (processos com tokens diferentes não se afetam)
+    """
+
+    def __init__(self, destino=API_DISCORD, limite_conexoes=LIMITE_CONEXOES):
+        self.destino = destino.rstrip("/")
+        self.limite_conexoes = limite_conexoes
+        self._sessao = None
+        self._hashes = {}        # (token, rota) -> hash do bucket informado pelo Discord
+        self._baldes = {}        # (token, bucket, parametro maior) -> BaldeRest
+        self._global_ate = {}    # token -> instante até o qual o limite global bloqueia
+        self._metricas = {}
+
+    async def iniciar(self):
+        conector = aiohttp.TCPConnector(limit=self.limite_conexoes, keepalive_timeout=60)
+        self._sessao = aiohttp.ClientSession(connector=conector, auto_decompress=True)
+
+    async def parar(self):
+        if self._sessao is not None:
+            await self._sessao.close()
+            self._sessao = None
+
+    def _balde(self, token, rota, maior):
+        bucket = self._hashes.get((token, rota), rota)
+        chave = (token, bucket, maior)
+        balde = self._baldes.get(chave)
+        if balde is None:
+            if len(self._baldes) >= LIMITE_BALDES:
+                self._limpar()
+            balde = self._baldes[chave] = BaldeRest()
+        balde.usado_em = time.monotonic()
+        return balde
+
+    def _limpar(self):
+        """Descarta baldes ociosos e os hashes que só apontavam para eles"""
+        agora = time.monotonic()
+        self._baldes = {chave: balde for chave, balde in self._baldes.items() if not balde.ocioso(agora)}
+        vivos = {(token, bucket) for token, bucket, _ in self._baldes}
+        self._hashes = {chave: bucket for chave, bucket in self._hashes.items() if (chave[0], bucket) in vivos}
+        self._global_ate = {token: ate for token, ate in self._global_ate.items() if ate > agora}
+
+    def _metrica(self, rota):
+        metrica = self._metricas.get(rota)
+        if metrica is None:
+            if len(self._metricas) >= LIMITE_ROTAS:
+                rota = "outras"
+            metrica = self._metricas.setdefault(rota, MetricaRota())
+        return metrica
+
+    def _aprender_bucket(self, token, rota, maior, cabecalhos, balde):
+        """Rotas diferentes com o mesmo hash passam a dividir o mesmo balde"""
+        bucket = cabecalhos.get("X-RateLimit-Bucket")
+        if not bucket or self._hashes.get((token, rota)) == bucket:
+            return
+        self._hashes[(token, rota)] = bucket
+        self._baldes.setdefault((token, bucket, maior), balde)
+
+    async def _esperar(self, token, balde, metrica):
+        esperou = 0.0
+        while True:
+            agora = time.monotonic()
+            global_ate = self._global_ate.get(token, 0)
+            if global_ate > agora:
+                espera = global_ate - agora
+            elif balde.restantes <= 0 and balde.reinicia_em > agora:
+                espera = balde.reinicia_em - agora
+            else:
+                break
+            esperou += espera
+            await asyncio.sleep(espera)
+        if esperou:
+            metrica.esperas += 1
+            metrica.tempo_espera += esperou
+
+    async def repassar(self, request):
+        token = hashlib.sha256(request.headers.get("Authorization", "").encode()).hexdigest()[:16]
+        rota = normalizar_rota(request.method, request.path)
+        maior = parametro_maior(request.path)
+        metrica = self._metrica(rota)
+        corpo = await request.read()
+        cabecalhos = {nome: request.headers[nome] for nome in CABECALHOS_ENTRADA if nome in request.headers}
+        url = f"{self.destino}{request.path_qs}"
+
+        balde = self._balde(token, rota, maior)
+        # Um pedido por vez por balde: o cabeçalho da resposta anterior decide o próximo
+        async with balde.lock:
+            for tentativa in range(TENTATIVAS_429 + 1):
+                await self._esperar(token, balde, metrica)
+                inicio = time.monotonic()
+                try:
+                    async with self._sessao.request(request.method, url, data=corpo or None,
+                                                    headers=cabecalhos) as resposta:
+                        dados = await resposta.read()
+                        agora = time.monotonic()
+                        metrica.requisicoes += 1
+                        metrica.tempo_total += agora - inicio
+                        balde.atualizar(resposta.headers, agora)
+                        self._aprender_bucket(token, rota, maior, resposta.headers, balde)
+
+                        if resposta.status == 429:
+                            metrica.respostas_429 += 1
+                            retry_after = float(resposta.headers.get("Retry-After", 1))
+                            if resposta.headers.get("X-RateLimit-Global"):
+                                self._global_ate[token] = agora + retry_after
+                                logger.warning(f"Limite global atingido, pausando {retry_after:.2f}s")
+                            else:
+                                balde.restantes = 0
+                                balde.reinicia_em = max(balde.reinicia_em, agora + retry_after)
+                            if tentativa < TENTATIVAS_429:
+                                continue
+
+                        saida = {k: v for k, v in resposta.headers.items()
+                                 if k.lower() not in CABECALHOS_IGNORADOS}
+                        return web.Response(status=resposta.status, body=dados, headers=saida)
+                except aiohttp.ClientError as e:
+                    metrica.erros += 1
+                    logger.error(f"Erro ao repassar {rota}: {e}")
+                    return web.json_response({"message": "Falha no proxy REST", "code": 0}, status=502)
+
+    async def metricas(self, request):
+        return web.json_response(self.estatisticas())
+
+    def estatisticas(self):
+        agora = time.monotonic()
+        return {
+            "rotas": {rota: m.como_dict() for rota, m in self._metricas.items()},
+            "baldes": len(self._baldes),
+            "baldes_esgotados": sum(1 for b in self._baldes.values() if b.restantes <= 0 and b.reinicia_em > agora),
+            "pausa_global": any(ate > agora for ate in self._global_ate.values()),
+        }
+
+    def aplicacao(self):
+        app = web.Application(client_max_size=25 * 1024 * 1024)
+        app.router.add_get("/metricas", self.metricas)
+        app.router.add_route("*", "/api/{caminho:.*}", self.repassar)
+        app.on_startup.append(lambda _: self.iniciar())
+        app.on_cleanup.append(lambda _: self.parar())
+        return app
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    porta = int(os.getenv("PROXY_REST_PORTA", PORTA_PADRAO))
+    web.run_app(ProxyRest().aplicacao(), host="127.0.0.1", port=porta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Agendador Central - Heap de timers persistido em disco
+Um único task acorda no próximo prazo; usado para lembretes e auto-fechamento por inatividade
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+
+from async_logging import definir_contexto
+from ticket_index import salvar_json_atomico
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo entre gravações do arquivo de timers
+INTERVALO_SALVAR = 5
+
+# Espera máxima entre verificações (protege contra saltos do relógio)
+ESPERA_MAXIMA = 3600
+
+
+class Agendador:
+    """
+    Heap de (prazo, seq, chave) com cancelamento preguiçoso
+    O dicionário de prazos é a fonte da verdade; entradas velhas do heap são
+    descartadas quando chegam ao topo
+    """
+
+    def __init__(self, arquivo="agendador.json"):
+        self.arquivo = arquivo
+        self._prazos = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._acordar = None
+        self._task = None
+        self._salvamento = None
+        self._executando = set()
+        self.disparados = 0
+
+    def agendar(self, chave, quando):
+        """Agenda (ou reagenda) a chave para o timestamp `quando` (epoch)"""
+        self._prazos[chave] = quando
+        heapq.heappush(self._heap, (quando, next(self._seq), chave))
+        if len(self._heap) > 2 * len(self._prazos) + 64:
+            self._compactar()
+        if self._acordar is not None and self._heap[0][2] == chave:
+            self._acordar.set()
+        self._agendar_salvamento()
+
+    def cancelar(self, chave):
+        if self._prazos.pop(chave, None) is not None:
+            self._agendar_salvamento()
+
+    def prazo(self, chave):
+        return self._prazos.get(chave)
+
+    def _compactar(self):
+        """Reconstrói o heap só com os prazos válidos"""
+        self._heap = [(q, next(self._seq), c) for c, q in self._prazos.items()]
+        heapq.heapify(self._heap)
+
+    def carregar(self):
+        """Carrega timers pendentes (sobrevivem a restarts do BotManager)"""
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                self._prazos = {(tipo, alvo): quando for tipo, alvo, quando in dados}
+                self._compactar()
+                logger.info(f"Agendador carregado: {len(self._prazos)} timer(s) pendente(s)")
+        except Exception as e:
+            logger.error(f"Erro ao carregar agendador: {e}")
+
+    def salvar(self):
+        try:
+            dados = [[tipo, alvo, quando] for (tipo, alvo), quando in self._prazos.items()]
+            salvar_json_atomico(self.arquivo, dados)
+        except Exception as e:
+            logger.error(f"Erro ao salvar agendador: {e}")
+
+    def _agendar_salvamento(self):
+        """Agrupa várias alterações em uma única gravação"""
+        if self._task is None or self._salvamento is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._salvamento = loop.call_later(INTERVALO_SALVAR, self._salvar_agrupado)
+
+    def _salvar_agrupado(self):
+        self._salvamento = None
+        self.salvar()
+
+    def iniciar(self, callback):
+        """
+        Inicia o task único do agendador
+        Args:
+            callback: coroutine function(tipo, alvo) chamada quando um timer vence
+        """
+        self._acordar = asyncio.Event()
+        self._task = asyncio.create_task(self._executar(callback))
+
+    async def parar(self):
+        """Para o task e grava os timers pendentes"""
+        if self._salvamento is not None:
+            self._salvamento.cancel()
+            self._salvamento = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.salvar()
+
+    async def _executar(self, callback):
+        while True:
+            agora = time.time()
+            while self._heap and self._heap[0][0] <= agora:
+                quando, _, chave = heapq.heappop(self._heap)
+                if self._prazos.get(chave) != quando:
+                    continue  # entrada cancelada ou reagendada
+                del self._prazos[chave]
+                self.disparados += 1
+                self._agendar_salvamento()
+                task = asyncio.create_task(self._disparar(callback, chave))
+                self._executando.add(task)
+                task.add_done_callback(self._executando.discard)
+
+            espera = min(self._heap[0][0] - agora, ESPERA_MAXIMA) if self._heap else ESPERA_MAXIMA
+            self._acordar.clear()
+            try:
+                await asyncio.wait_for(self._acordar.wait(), timeout=max(espera, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _disparar(self, callback, chave):
+        try:
+            await callback(*chave)
+        except Exception as e:
+            logger.error(f"Erro ao executar timer {chave}: {e}")
+
+    def estatisticas(self):
+        return {
+            "pendentes": len(self._prazos),
+            "entradas_heap": len(self._heap),
+            "disparados": self.disparados,
+        }
+
+
+class MonitorInatividade:
+    """Lembretes "você ainda está aí?" e auto-fechamento de tickets parados"""
+
+    # Só reagenda se o prazo andar mais que isso (evita churn a cada mensagem)
+    GRANULARIDADE = 60
+
+    def __init__(self, bot, agendador):
+        self.bot = bot
+        self.agendador = agendador
+
+    def _prazos(self):
+        """Lê a configuração a cada uso: (segundos até lembrete, segundos até fechar)"""
+        config = self.bot.config.get("auto_fechamento") or {}
+        if not config.get("fechar_horas"):
+            return None
+        fechar = config["fechar_horas"] * 3600
+        lembrete = config.get("lembrete_horas")
+        return (lembrete * 3600 if lembrete else None), fechar
+
+    def atividade(self, channel_id, agora=None):
+        """Reinicia os timers do ticket após uma mensagem"""
+        prazos = self._prazos()
+        if prazos is None:
+            return
+        agora = time.time() if agora is None else agora
+        lembrete, fechar = prazos
+
+        atual = self.agendador.prazo(("fechar", channel_id))
+        if atual is not None and agora + fechar - atual < self.GRANULARIDADE:
+            return
+        self.agendador.agendar(("fechar", channel_id), agora + fechar)
+        if lembrete and lembrete < fechar:
+            self.agendador.agendar(("lembrete", channel_id), agora + lembrete)
+
+    def cancelar(self, channel_id):
+        self.agendador.cancelar(("lembrete", channel_id))
+        self.agendador.cancelar(("fechar", channel_id))
+
+    async def ao_mensagem(self, message):
+        """Listener de on_message: só canais de ticket contam"""
+        if message.guild is None or self.bot.indice_tickets.dono(message.channel.id) is None:
+            return
+        # Mensagens do próprio bot só iniciam timers, nunca os adiam
+        if message.author.bot and self.agendador.prazo(("fechar", message.channel.id)) is not None:
+            return
+        self.atividade(message.channel.id)
+
+    def garantir_timers(self):
+        """Tickets abertos sem timer (criados antes do recurso ou offline) ganham um agora"""
+        if self._prazos() is None:
+            return
+        for channel_id in self.bot.indice_tickets.canais():
+            if self.agendador.prazo(("fechar", channel_id)) is None:
+                self.atividade(channel_id)
+
+    async def disparar(self, tipo, channel_id):
+        """Callback do agendador"""
+        canal = self.bot.get_channel(channel_id)
+        dono = self.bot.indice_tickets.dono(channel_id)
+        if canal is None or dono is None:
+            return
+        # Roda em task própria: o contexto de log não vaza para outros timers
+        definir_contexto(guild_id=canal.guild.id, ticket_id=channel_id)
+
+        if tipo == "lembrete":
+            prazo_fechar = self.agendador.prazo(("fechar", channel_id)) or time.time()
+            horas = max(0, int((prazo_fechar - time.time()) // 3600))
+            await canal.send(
+                f"👋 <@{dono}> Você ainda está aí? Este ticket será fechado por inatividade "
+                f"em cerca de {horas}h se não houver nova mensagem."
+            )
+        elif tipo == "fechar":
+            logger.info(f"Fechando ticket {canal.name} por inatividade")
+            await self.bot.fechar_ticket(canal, self.bot.user, motivo="inatividade")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Distribuição de Atendimento - Atribui cada ticket novo ao membro da equipe menos carregado
+Heap por servidor de (carga, seq, staff) com invalidação preguiçosa; a equipe entra e sai
+do plantão com /plantao e os tickets de quem sai são redistribuídos
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+
+import discord
+
+from ticket_index import salvar_json_atomico
+
+logger = logging.getLogger(__name__)
+
+
+class DistribuidorAtendimento:
+    """
+    Carga = tickets abertos atribuídos. O dicionário de cargas é a fonte da verdade;
+    entradas do heap com carga antiga (ou de quem saiu do plantão) são descartadas no topo
+    """
+
+    def __init__(self, registro, arquivo="plantao.json"):
+        self.registro = registro
+        self.arquivo = arquivo
+        self._heaps = {}            # guild_id -> [(carga, seq, staff_id)]
+        self._seq = itertools.count()
+        self._disponiveis = {}      # guild_id -> {staff_id}
+        self._carga = {}            # (guild_id, staff_id) -> tickets atribuídos
+        self._tickets = {}          # (guild_id, staff_id) -> {channel_id}
+        self._responsavel = {}      # channel_id -> (guild_id, staff_id)
+        self._pendentes = {}        # guild_id -> [channel_id] sem ninguém de plantão
+        self.reatribuicoes = 0
+
+    # ---------- heap ----------
+
+    def _empurrar(self, guild_id, staff_id):
+        heap = self._heaps.setdefault(guild_id, [])
+        heapq.heappush(heap, (self._carga.get((guild_id, staff_id), 0), next(self._seq), staff_id))
+        if len(heap) > 2 * len(self._disponiveis.get(guild_id, ())) + 64:
+            self._compactar(guild_id)
+
+    def _compactar(self, guild_id):
+        self._heaps[guild_id] = [
+            (self._carga.get((guild_id, s), 0), next(self._seq), s) for s in self._disponiveis.get(guild_id, ())
+        ]
+        heapq.heapify(self._heaps[guild_id])
+
+    def _menos_carregado(self, guild_id):
+        """Topo válido do heap (O(log n) amortizado) ou None se ninguém estiver de plantão"""
+        heap = self._heaps.get(guild_id, [])
+        disponiveis = self._disponiveis.get(guild_id, set())
+        while heap:
+            carga, _, staff_id = heap[0]
+            if staff_id in disponiveis and carga == self._carga.get((guild_id, staff_id), 0):
+                return staff_id
+            heapq.heappop(heap)
+        return None
+
+    # ---------- atribuição ----------
+
+    def atribuir(self, guild_id, channel_id):
+        """
+        Atribui o ticket ao membro de plantão com menos tickets
+        Returns:
+            ID do responsável, ou None (o ticket fica pendente até alguém entrar no plantão)
+        """
+        staff_id = self._menos_carregado(guild_id)
+        if staff_id is None:
+            self._pendentes.setdefault(guild_id, []).append(channel_id)
+            # Sem isso o registro seguiria apontando para quem saiu (e um restart o devolveria)
+            self.registro.atribuir(channel_id, None)
+            return None
+        chave = (guild_id, staff_id)
+        self._carga[chave] = self._carga.get(chave, 0) + 1
+        self._tickets.setdefault(chave, set()).add(channel_id)
+        self._responsavel[channel_id] = chave
+        self._empurrar(guild_id, staff_id)
+        self.registro.atribuir(channel_id, staff_id)
+        return staff_id
+
+    def liberar(self, channel_id):
+        """Ticket fechado: diminui a carga do responsável"""
+        for pendentes in self._pendentes.values():
+            if channel_id in pendentes:
+                pendentes.remove(channel_id)
+                break
+        chave = self._responsavel.pop(channel_id, None)
+        if chave is None:
+            return
+        self.registro.atribuir(channel_id, None)
+        self._carga[chave] -= 1
+        self._tickets[chave].discard(channel_id)
+        if chave[1] in self._disponiveis.get(chave[0], ()):
+            self._empurrar(*chave)
+
+    def responsavel(self, channel_id):
+        chave = self._responsavel.get(channel_id)
+        return chave[1] if chave else None
+
+    # ---------- plantão ----------
+
+    def entrar(self, guild_id, staff_id):
+        """
+        Coloca o membro no plantão e distribui os tickets pendentes
+        Returns:
+            [(channel_id, staff_id)] dos pendentes atribuídos agora
+        """
+        self._disponiveis.setdefault(guild_id, set()).add(staff_id)
+        self._empurrar(guild_id, staff_id)
+        self.salvar()
+        pendentes, self._pendentes[guild_id] = self._pendentes.get(guild_id, []), []
+        return [(channel_id, self.atribuir(guild_id, channel_id)) for channel_id in pendentes]
+
+    def sair(self, guild_id, staff_id):
+        """
+        Tira o membro do plantão e redistribui os tickets dele (O(log n) cada)
+        Returns:
+            [(channel_id, novo_responsavel_ou_None)]
+        """
+        self._disponiveis.get(guild_id, set()).discard(staff_id)
+        self.salvar()
+        chave = (guild_id, staff_id)
+        movidos = []
+        for channel_id in list(self._tickets.get(chave, ())):
+            self._responsavel.pop(channel_id, None)
+            self._tickets[chave].discard(channel_id)
+            self._carga[chave] -= 1
+            movidos.append((channel_id, self.atribuir(guild_id, channel_id)))
+        self.reatribuicoes += len(movidos)
+        return movidos
+
+    def de_plantao(self, guild_id, staff_id):
+        return staff_id in self._disponiveis.get(guild_id, ())
+
+    def carga(self, guild_id, staff_id):
+        return self._carga.get((guild_id, staff_id), 0)
+
+    # ---------- persistência ----------
+
+    def salvar(self):
+        try:
+            dados = {str(g): sorted(staff) for g, staff in self._disponiveis.items() if staff}
+            salvar_json_atomico(self.arquivo, dados)
+        except Exception as e:
+            logger.error(f"Erro ao salvar plantão: {e}")
+
+    def carregar(self):
+        """Carrega o plantão do arquivo e as atribuições do registro"""
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    self._disponiveis = {int(g): set(staff) for g, staff in json.load(f).items()}
+            for guild_id, channel_id, staff_id in self.registro.carregar_atribuicoes():
+                if not self.de_plantao(guild_id, staff_id):
+                    # Responsável saiu do plantão (ou o estado ficou para trás): volta a pendente
+                    self._pendentes.setdefault(guild_id, []).append(channel_id)
+                    self.registro.atribuir(channel_id, None)
+                    continue
+                chave = (guild_id, staff_id)
+                self._carga[chave] = self._carga.get(chave, 0) + 1
+                self._tickets.setdefault(chave, set()).add(channel_id)
+                self._responsavel[channel_id] = chave
+            for guild_id in self._disponiveis:
+                self._compactar(guild_id)
+            logger.info(f"Plantão carregado: {sum(map(len, self._disponiveis.values()))} membro(s), "
+                        f"{len(self._responsavel)} ticket(s) atribuído(s), "
+                        f"{sum(map(len, self._pendentes.values()))} pendente(s)")
+        except Exception as e:
+            logger.error(f"Erro ao carregar plantão: {e}")
+
+    def reconciliar(self, abertos):
+        """
+        Após reconstruir o índice: solta atribuições de tickets fechados offline e
+        atribui os abertos que estão sem responsável
+        Args:
+            abertos: {channel_id: guild_id} dos tickets abertos
+        Returns:
+            [(channel_id, staff_id)] atribuídos agora
+        """
+        for channel_id in [c for c in self._responsavel if c not in abertos]:
+            self.liberar(channel_id)
+        pendentes = {c for canais in self._pendentes.values() for c in canais}
+        atribuidos = []
+        for channel_id, guild_id in abertos.items():
+            if channel_id not in self._responsavel and channel_id not in pendentes:
+                atribuidos.append((channel_id, self.atribuir(guild_id, channel_id)))
+        return atribuidos
+
+    def estatisticas(self):
+        return {
+            "de_plantao": sum(map(len, self._disponiveis.values())),
+            "atribuidos": len(self._responsavel),
+            "pendentes": sum(map(len, self._pendentes.values())),
+            "reatribuicoes": self.reatribuicoes,
+            "carga_maxima": max(self._carga.values(), default=0),
+        }
+
+
+def eh_staff(bot, membro):
+    """Membro com o cargo_staff configurado (ou gerenciar canais, se não houver cargo)"""
+    cargo = bot.config.get("cargo_staff")
+    if cargo:
+        return any(role.id == cargo for role in getattr(membro, "roles", ()))
+    return membro.guild_permissions.manage_channels
+
+
+async def avisar_atribuicoes(origem, atribuicoes, reatribuido=False):
+    """
+    Menciona o responsável em cada canal recém-atribuído
+    Args:
+        origem: Guild ou bot (qualquer um com get_channel)
+    """
+    for channel_id, staff_id in atribuicoes:
+        canal = origem.get_channel(channel_id)
+        if canal is None or staff_id is None:
+            continue
+        texto = "🔄 Ticket reatribuído para" if reatribuido else "📌 Responsável pelo atendimento:"
+        try:
+            await canal.send(f"{texto} <@{staff_id}>")
+        except discord.HTTPException as e:
+            logger.error(f"Erro ao avisar atribuição em {canal.name}: {e}")
+
+
+def criar_comando_plantao(bot):
+    """Cria o slash command /plantao (entra/sai da fila de atendimento)"""
+
+    @discord.app_commands.command(name="plantao", description="Entra ou sai do plantão de atendimento de tickets")
+    async def plantao(interaction: discord.Interaction):
+        if not eh_staff(bot, interaction.user):
+            return await interaction.response.send_message("🚫 Apenas a equipe pode entrar no plantão.", ephemeral=True)
+
+        atendimento = bot.atendimento
+        guild = interaction.guild
+        if atendimento.de_plantao(guild.id, interaction.user.id):
+            movidos = atendimento.sair(guild.id, interaction.user.id)
+            await interaction.response.send_message(
+                f"💤 Você saiu do plantão. {len(movidos)} ticket(s) redistribuído(s).", ephemeral=True
+            )
+            await avisar_atribuicoes(guild, movidos, reatribuido=True)
+        else:
+            atribuidos = atendimento.entrar(guild.id, interaction.user.id)
+            await interaction.response.send_message(
+                f"✅ Você entrou no plantão. Tickets atribuídos a você: "
+                f"**{atendimento.carga(guild.id, interaction.user.id)}**", ephemeral=True
+            )
+            await avisar_atribuicoes(guild, atribuidos)
+
+    return plantao
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Reconciliação de Inicialização - Uma passada sobre as categorias de ticket após (re)iniciar
+Confere canais contra o registro e o contador, registra as views persistentes, recupera
+tickets criados pouco antes de um crash e reenvia logs de fechamento que ficaram para trás
+"""
+
+import asyncio
+import logging
+import time
+
+from staff_assignment import avisar_atribuicoes
+from ticket_index import numero_do_canal
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "reconciliacao" no config.json)
+RECONCILIACAO_PADRAO = {
+    "prazo_s": 60,              # tempo máximo da etapa inteira
+    "concorrencia": 4,          # reparos REST simultâneos
+    "max_reparos": 200,         # canais recuperados por inicialização
+    "janela_logs_h": 24,        # só reenvia logs de tickets fechados nesse período
+    "max_logs": 50,
+}
+
+
+class ReconciliacaoInicial:
+    """
+    Etapa idempotente chamada no on_ready; as views são registradas só na primeira vez
+    Ganchos opcionais do bot: views_persistentes(), recuperar_ticket(canal), reenviar_log(ticket)
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._views_registradas = False
+        self.execucoes = 0
+        self.ultima = {}
+
+    def _opcoes(self):
+        return dict(RECONCILIACAO_PADRAO, **(self.bot.config.get("reconciliacao") or {}))
+
+    async def executar(self):
+        opcoes = self._opcoes()
+        inicio = time.monotonic()
+        resultado = {"views": 0, "novos": 0, "recuperados": 0, "contador": None, "logs_reenviados": 0,
+                     "concluida": False}
+        try:
+            async with asyncio.timeout(opcoes["prazo_s"]):
+                await self._executar(opcoes, resultado)
+            resultado["concluida"] = True
+        except TimeoutError:
+            logger.warning(f"Reconciliação interrompida após {opcoes['prazo_s']}s; o restante fica para o próximo início")
+        except Exception as e:
+            logger.error(f"Erro na reconciliação de inicialização: {e}")
+        resultado["duracao_s"] = round(time.monotonic() - inicio, 2)
+        self.execucoes += 1
+        self.ultima = resultado
+        logger.info(f"Reconciliação de inicialização: {resultado}")
+        return resultado
+
+    async def _executar(self, opcoes, resultado):
+        bot = self.bot
+
+        # 1. Views persistentes: botões de mensagens antigas voltam a funcionar
+        if not self._views_registradas and hasattr(bot, "views_persistentes"):
+            for view in bot.views_persistentes():
+                bot.add_view(view)
+                resultado["views"] += 1
+            self._views_registradas = True
+
+        # 2. Uma passada pelas categorias: índice e registro batem com os canais reais
+        novos = bot.indice_tickets.reconstruir(bot)
+        resultado["novos"] = len(novos)
+        canais = bot.indice_tickets.canais()
+        abertos = {c: canal.guild.id for c in canais if (canal := bot.get_channel(c))}
+
+        # 3. Estado derivado (timers, análise, atribuições) a partir do índice já corrigido
+        if hasattr(bot, "inatividade"):
+            bot.inatividade.garantir_timers()
+        if hasattr(bot, "analise"):
+            bot.analise.reconciliar(canais)
+        await avisar_atribuicoes(bot, bot.atendimento.reconciliar(abertos))
+
+        # 4. Contador nunca fica atrás do maior número já usado
+        resultado["contador"] = await self._avancar_contador(abertos)
+
+        semaforo = asyncio.Semaphore(opcoes["concorrencia"])
+
+        # 5. Tickets sem estado (criados logo antes do crash) ganham o painel de novo
+        if hasattr(bot, "recuperar_ticket"):
+            async def recuperar(canal):
+                async with semaforo:
+                    try:
+                        await bot.recuperar_ticket(canal)
+                        resultado["recuperados"] += 1
+                    except Exception as e:
+                        logger.error(f"Erro ao recuperar ticket {canal.name}: {e}")
+
+            # Só canais vazios: tickets antigos reindexados já têm a mensagem de boas-vindas
+            alvos = [canal for c in novos if (canal := bot.get_channel(c)) and canal.last_message_id is None]
+            alvos = alvos[:opcoes["max_reparos"]]
+            await asyncio.gather(*(recuperar(canal) for canal in alvos))
+
+        # 6. Logs de fechamento que não chegaram a ser enviados
+        if hasattr(bot, "reenviar_log") and bot.config.get("canal_logs"):
+            desde = time.time() - opcoes["janela_logs_h"] * 3600
+            pendentes = await bot.registro.logs_pendentes(desde, opcoes["max_logs"])
+
+            async def reenviar(ticket):
+                async with semaforo:
+                    try:
+                        if await bot.reenviar_log(ticket):
+                            resultado["logs_reenviados"] += 1
+                    except Exception as e:
+                        logger.error(f"Erro ao reenviar log do ticket {ticket['channel_id']}: {e}")
+
+            await asyncio.gather(*(reenviar(ticket) for ticket in pendentes))
+
+    async def _avancar_contador(self, abertos):
+        bot = self.bot
+        maior = await bot.registro.maior_numero() or 0
+        for channel_id in abertos:
+            numero = numero_do_canal(bot.get_channel(channel_id).name)
+            if numero is not None:
+                maior = max(maior, numero)
+        if bot.config.get("ticket_counter", 1) <= maior:
+            logger.warning(f"Contador de tickets atrasado ({bot.config.get('ticket_counter')}); avançando para {maior + 1}")
+            bot.config["ticket_counter"] = maior + 1
+            bot.save_config()
+        return bot.config.get("ticket_counter")
+
+    def estatisticas(self):
+        return dict(self.ultima, execucoes=self.execucoes)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Snapshot de Status - O loop do bot publica o status em intervalo fixo
+O Flask (outra thread) só lê o último snapshot imutável: /status responde com ETag/304
+e o stream SSE empurra cada versão nova sem nenhum custo extra para o bot
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de publicação do snapshot (segundos)
+INTERVALO_PUBLICACAO = 5
+
+# Comentário SSE enviado a cada N segundos sem versão nova (mantém proxies/conexões vivos)
+INTERVALO_HEARTBEAT = 15
+
+# Campos que mudam a cada publicação sem nada ter acontecido: vão no corpo, mas fora do ETag
+# (senão toda publicação seria uma versão nova e o 304/SSE não serviriam para nada)
+CAMPOS_VOLATEIS = ("timestamp", "uptime", "saude.pulso_s", "saude.atraso_loop_ms", "fechamentos.mais_antigo_s")
+
+
+def _sem_volateis(dados, campos=CAMPOS_VOLATEIS):
+    """Cópia sem os campos voláteis (também dentro de cada tenant do modo multi-tenant)"""
+    conteudo = dict(dados)
+    if isinstance(conteudo.get("tenants"), dict):
+        conteudo["tenants"] = {nome: _sem_volateis(tenant, campos) if isinstance(tenant, dict) else tenant
+                               for nome, tenant in conteudo["tenants"].items()}
+    for campo in campos:
+        *pais, chave = campo.split(".")
+        alvo = conteudo
+        for pai in pais:
+            if not isinstance(alvo.get(pai), dict):
+                break
+            alvo[pai] = alvo = dict(alvo[pai])
+        else:
+            alvo.pop(chave, None)
+    return conteudo
+
+
+class _Versao:
+    """Snapshot imutável: dados, corpo JSON já serializado e ETag"""
+    __slots__ = ("numero", "dados", "corpo", "etag")
+
+    def __init__(self, numero, dados, corpo, etag):
+        self.numero = numero
+        self.dados = dados
+        self.corpo = corpo
+        self.etag = etag
+
+
+class SnapshotStatus:
+    """
+    Guarda a última versão publicada; publicar() roda no loop do bot e atual()/aguardar()
+    nas threads do Flask. A troca é uma única atribuição sob a condição
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._versao = None
+        self.clientes_sse = 0
+
+    def publicar(self, dados):
+        """Serializa uma única vez; publica só se o conteúdo mudou"""
+        dados = dict(dados, timestamp=datetime.now().isoformat())
+        corpo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+        conteudo = _sem_volateis(dados)
+        etag = hashlib.sha1(json.dumps(conteudo, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        with self._condicao:
+            if self._versao is not None and self._versao.etag == etag:
+                return False
+            numero = self._versao.numero + 1 if self._versao else 1
+            self._versao = _Versao(numero, dados, corpo, etag)
+            self._condicao.notify_all()
+        return True
+
+    def atual(self):
+        """Última versão publicada (ou None antes da primeira publicação)"""
+        return self._versao
+
+    def aguardar(self, numero, timeout):
+        """Bloqueia (thread do Flask) até existir versão mais nova que `numero`"""
+        with self._condicao:
+            self._condicao.wait_for(
+                lambda: self._versao is not None and self._versao.numero > numero, timeout=timeout
+            )
+            return self._versao
+
+    def eventos(self):
+        """Gerador do stream SSE (uma thread do Flask por cliente conectado)"""
+        with self._condicao:
+            self.clientes_sse += 1
+        try:
+            numero = 0
+            yield "retry: 5000\n\n"
+            while True:
+                versao = self.aguardar(numero, INTERVALO_HEARTBEAT)
+                if versao is None or versao.numero == numero:
+                    yield ": ping\n\n"
+                    continue
+                numero = versao.numero
+                yield f"id: {numero}\nevent: status\ndata: {versao.corpo.decode('utf-8')}\n\n"
+        finally:
+            with self._condicao:
+                self.clientes_sse -= 1
+
+
+async def publicar_status(snapshot, coletar, intervalo=INTERVALO_PUBLICACAO):
+    """Task do loop do bot: coleta o status (coroutine, no próprio loop) e publica"""
+    while True:
+        try:
+            snapshot.publicar(await coletar())
+        except Exception as e:
+            logger.error(f"Erro ao publicar status: {e}")
+        await asyncio.sleep(intervalo)
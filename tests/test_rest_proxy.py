@@ -0,0 +1,140 @@
+"""Proxy REST contra uma API falsa local (antes: python rest_proxy.py --autoteste)"""
+
+import asyncio
+import json
+import time
+
+import aiohttp
+import discord
+from aiohttp import web
+from discord.webhook.async_ import async_context
+
+from rest_proxy import ProxyRest, normalizar_rota, usar_proxy
+
+TOKEN_INTERACAO = "aW50ZXJhY3Rpb246MTIzNDU2Nzg5MDEyMzQ1Njc4OnNlZ3JlZG8"
+
+
+def _api_falsa(limite=2, janela=0.5):
+    """API mínima que aplica um bucket por canal e responde 429 a quem estourar"""
+    estado = {"429": 0, "atendidas": 0}
+    baldes = {}
+
+    async def mensagens(request):
+        agora = time.monotonic()
+        canal = request.match_info["canal"]
+        restantes, reinicia = baldes.get(canal, (limite, agora + janela))
+        if agora >= reinicia:
+            restantes, reinicia = limite, agora + janela
+        if restantes <= 0:
+            estado["429"] += 1
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": reinicia - agora, "global": False},
+                status=429, headers={"Retry-After": f"{reinicia - agora:.3f}", "X-RateLimit-Bucket": "msg"}
+            )
+        restantes -= 1
+        baldes[canal] = (restantes, reinicia)
+        estado["atendidas"] += 1
+        return web.json_response({"id": "1", "content": (await request.json())["content"]}, headers={
+            "X-RateLimit-Limit": str(limite),
+            "X-RateLimit-Remaining": str(restantes),
+            "X-RateLimit-Reset-After": f"{reinicia - agora:.3f}",
+            "X-RateLimit-Bucket": "msg",
+        })
+
+    async def callback(request):
+        estado["atendidas"] += 1
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/api/v10/channels/{canal}/messages", mensagens)
+    app.router.add_post("/api/v10/interactions/{id}/{token}/callback", callback)
+    return app, estado
+
+
+async def _subir(app):
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    porta = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{porta}"
+
+
+def test_normaliza_ids_e_tokens():
+    assert normalizar_rota("POST", f"/api/v10/interactions/123456789012345678/{TOKEN_INTERACAO}/callback") == \
+        "POST /api/v10/interactions/:id/:token/callback"
+    assert normalizar_rota("PATCH", f"/api/v10/webhooks/123456789012345678/{TOKEN_INTERACAO}/messages/@original") == \
+        "PATCH /api/v10/webhooks/:id/:token/messages/@original"
+    assert normalizar_rota("GET", "/api/v10/channels/123456789012345678/messages") == \
+        "GET /api/v10/channels/:id/messages"
+
+
+def test_proxy_vale_por_cliente_no_mesmo_processo():
+    class Chamadas:
+        def __init__(self):
+            self.urls = []
+
+        async def request(self, route, *args, **kwargs):
+            self.urls.append(route.url)
+
+    class BotFalso:
+        def __init__(self):
+            self.http = Chamadas()
+
+    async def tenant(url):
+        # Cada tenant roda na própria task, como no multi-tenant
+        webhooks = Chamadas()
+        async_context.set(webhooks)
+        bot = BotFalso()
+        usar_proxy(bot, url)
+        await asyncio.sleep(0)
+        await bot.http.request(discord.http.Route("GET", "/users/@me"))
+        await async_context.get().request(discord.http.Route("POST", "/webhooks/{id}/{token}", id=1, token="t"), None)
+        return bot.http.urls + webhooks.urls
+
+    async def cenario():
+        return await asyncio.gather(tenant("http://127.0.0.1:8787/"), tenant(None))
+
+    com_proxy, sem_proxy = asyncio.run(cenario())
+    assert com_proxy == ["http://127.0.0.1:8787/api/v10/users/@me", "http://127.0.0.1:8787/api/v10/webhooks/1/t"]
+    assert sem_proxy == ["https://discord.com/api/v10/users/@me", "https://discord.com/api/v10/webhooks/1/t"]
+    assert discord.http.Route.BASE == "https://discord.com/api/v10"
+
+
+def test_processos_compartilham_bucket_sem_429_nem_token_nas_metricas():
+    mensagens_por_processo, processos = 6, 3
+
+    async def cenario():
+        api, estado = _api_falsa()
+        runner_api, url_api = await _subir(api)
+        proxy = ProxyRest(destino=url_api)
+        runner_proxy, url_proxy = await _subir(proxy.aplicacao())
+
+        async def processo(n):
+            # Sessões separadas simulam processos diferentes do bot
+            async with aiohttp.ClientSession(headers={"Authorization": "Bot teste"}) as sessao:
+                for i in range(mensagens_por_processo):
+                    async with sessao.post(f"{url_proxy}/api/v10/channels/123456789012345678/messages",
+                                           json={"content": f"msg {i}"}) as resposta:
+                        assert resposta.status == 200, resposta.status
+                async with sessao.post(f"{url_proxy}/api/v10/interactions/12345678901234567{n}/"
+                                       f"{TOKEN_INTERACAO}{n}/callback", json={"type": 5}) as resposta:
+                    assert resposta.status == 204
+
+        try:
+            await asyncio.gather(*(processo(n) for n in range(processos)))
+            async with aiohttp.ClientSession() as sessao:
+                async with sessao.get(f"{url_proxy}/metricas") as resposta:
+                    metricas = await resposta.json()
+        finally:
+            await runner_proxy.cleanup()
+            await runner_api.cleanup()
+        return estado, metricas, proxy
+
+    estado, metricas, proxy = asyncio.run(cenario())
+    assert estado["429"] == 0, "o proxy deixou passar requisições acima do bucket"
+    assert estado["atendidas"] == (mensagens_por_processo + 1) * processos
+    assert TOKEN_INTERACAO not in json.dumps(metricas)
+    assert metricas["rotas"]["POST /api/v10/interactions/:id/:token/callback"]["requisicoes"] == processos
+    # Um balde por interação seria crescimento sem limite
+    assert not any(TOKEN_INTERACAO in str(chave) for chave in list(proxy._baldes) + list(proxy._hashes))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Limitador de Interações - Token bucket por usuário e por servidor
+Barra cliques repetidos nos painéis antes de alocar modais ou criar canais
+"""
+
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Valores padrão (sobrescritos por "limite_interacoes" no config.json)
+LIMITES_PADRAO = {
+    "usuario": {"capacidade": 5, "por_minuto": 6},
+    "guild": {"capacidade": 60, "por_minuto": 120},
+    "ociosidade_segundos": 600,
+    "maximo_baldes": 10000,
+}
+
+
+class Balde:
+    """Token bucket com recarga preguiçosa (calculada só quando consultado)"""
+    __slots__ = ("tokens", "atualizado")
+
+    def __init__(self, capacidade, agora):
+        self.tokens = float(capacidade)
+        self.atualizado = agora
+
+    def recarregar(self, capacidade, taxa, agora):
+        self.tokens = min(capacidade, self.tokens + (agora - self.atualizado) * taxa)
+        self.atualizado = agora
+
+
+class LimitadorInteracoes:
+    """Baldes por usuário e por servidor com remoção dos baldes ociosos"""
+
+    def __init__(self, config=None):
+        limites = dict(LIMITES_PADRAO, **(config or {}))
+        for escopo in ("usuario", "guild"):
+            limites[escopo] = dict(LIMITES_PADRAO[escopo], **limites[escopo])
+        self.cap_usuario = limites["usuario"]["capacidade"]
+        self.taxa_usuario = limites["usuario"]["por_minuto"] / 60
+        self.cap_guild = limites["guild"]["capacidade"]
+        self.taxa_guild = limites["guild"]["por_minuto"] / 60
+        self.ociosidade = limites["ociosidade_segundos"]
+        self.maximo_baldes = limites["maximo_baldes"]
+
+        # OrderedDict em ordem de uso: o primeiro item é sempre o mais ocioso
+        self._usuarios = OrderedDict()
+        self._guilds = OrderedDict()
+        self.contadores = {
+            "permitidas": 0,
+            "rejeitadas_usuario": 0,
+            "rejeitadas_guild": 0,
+            "baldes_removidos": 0,
+        }
+
+    def _balde(self, baldes, chave, capacidade, taxa, agora):
+        balde = baldes.get(chave)
+        if balde is None:
+            balde = baldes[chave] = Balde(capacidade, agora)
+        else:
+            balde.recarregar(capacidade, taxa, agora)
+            baldes.move_to_end(chave)
+        return balde
+
+    def _despejar(self, baldes, agora):
+        """Remove baldes ociosos (ou excedentes) do início da fila, O(1) amortizado"""
+        while baldes:
+            chave, balde = next(iter(baldes.items()))
+            if agora - balde.atualizado < self.ociosidade and len(baldes) <= self.maximo_baldes:
+                break
+            del baldes[chave]
+            self.contadores["baldes_removidos"] += 1
+
+    def permitir(self, guild_id, user_id, agora=None):
+        """Consome um token do usuário e do servidor; False se qualquer um estiver vazio"""
+        agora = time.monotonic() if agora is None else agora
+        self._despejar(self._usuarios, agora)
+        self._despejar(self._guilds, agora)
+
+        balde_usuario = self._balde(self._usuarios, user_id, self.cap_usuario, self.taxa_usuario, agora)
+        if balde_usuario.tokens < 1:
+            self.contadores["rejeitadas_usuario"] += 1
+            return False
+
+        if guild_id is not None:
+            balde_guild = self._balde(self._guilds, guild_id, self.cap_guild, self.taxa_guild, agora)
+            if balde_guild.tokens < 1:
+                self.contadores["rejeitadas_guild"] += 1
+                return False
+            balde_guild.tokens -= 1
+
+        balde_usuario.tokens -= 1
+        self.contadores["permitidas"] += 1
+        return True
+
+    def estatisticas(self):
+        return dict(
+            self.contadores,
+            baldes_usuarios=len(self._usuarios),
+            baldes_guilds=len(self._guilds),
+        )
+
+
+async def verificar_limite(interaction):
+    """Checa o limitador do bot e responde ao usuário quando a interação é barrada"""
+    limitador = getattr(interaction.client, "limitador", None)
+    if limitador is None:
+        return True
+
+    guild_id = interaction.guild.id if interaction.guild else None
+    if limitador.permitir(guild_id, interaction.user.id):
+        return True
+
+    logger.debug(f"Interação limitada: usuário {interaction.user.id} no servidor {guild_id}")
+    if not interaction.response.is_done():
+        await interaction.response.send_message(
+            "⏳ Muitas interações em pouco tempo. Aguarde alguns segundos e tente novamente.",
+            ephemeral=True
+        )
+    return False
+
+
+class VerificaLimite:
+    """Mixin para View/Modal: aplica o limitador antes de qualquer callback"""
+
+    async def interaction_check(self, interaction):
+        return await verificar_limite(interaction)
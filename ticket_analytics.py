@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Análise de Tickets - Agregados atualizados a cada evento (abertura, 1ª resposta da equipe, fechamento)
+Contadores por hora e por dia, por servidor e tipo, + sketches de quantis mescláveis para tempo
+de resposta e de fechamento
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone
+
+import discord
+
+from staff_assignment import eh_staff
+from ticket_index import salvar_json_atomico
+
+logger = logging.getLogger(__name__)
+
+# Erro relativo máximo dos quantis (2%)
+PRECISAO_SKETCH = 0.02
+
+# Retenção dos rollups
+HORAS_RETIDAS = 48
+DIAS_RETIDOS = 90
+
+# Intervalo mínimo entre gravações do arquivo
+INTERVALO_SALVAR = 5
+
+CONTADORES = ("abertos", "respondidos", "fechados")
+
+
+class SketchQuantis:
+    """
+    Histograma com buckets logarítmicos (estilo DDSketch): quantis com erro relativo
+    limitado, memória proporcional à faixa de valores e mescla por soma de buckets
+    """
+
+    def __init__(self, precisao=PRECISAO_SKETCH):
+        self.precisao = precisao
+        self.gamma = (1 + precisao) / (1 - precisao)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.total = 0
+        self.soma = 0.0
+
+    def adicionar(self, valor):
+        self.total += 1
+        self.soma += valor
+        if valor <= 0:
+            self.zeros += 1
+            return
+        indice = math.ceil(math.log(valor) / self._log_gamma)
+        self.buckets[indice] = self.buckets.get(indice, 0) + 1
+
+    def mesclar(self, outro):
+        for indice, quantidade in outro.buckets.items():
+            self.buckets[indice] = self.buckets.get(indice, 0) + quantidade
+        self.zeros += outro.zeros
+        self.total += outro.total
+        self.soma += outro.soma
+        return self
+
+    def quantil(self, q):
+        if not self.total:
+            return None
+        alvo = q * (self.total - 1)
+        acumulado = self.zeros
+        if alvo < acumulado:
+            return 0.0
+        for indice in sorted(self.buckets):
+            acumulado += self.buckets[indice]
+            if alvo < acumulado:
+                return 2 * self.gamma ** indice / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def como_dict(self):
+        return {"b": {str(i): n for i, n in self.buckets.items()}, "z": self.zeros, "t": self.total, "s": self.soma}
+
+    @classmethod
+    def de_dict(cls, dados):
+        sketch = cls()
+        sketch.buckets = {int(i): n for i, n in dados.get("b", {}).items()}
+        sketch.zeros = dados.get("z", 0)
+        sketch.total = dados.get("t", 0)
+        sketch.soma = dados.get("s", 0.0)
+        return sketch
+
+
+class _Rollup:
+    """Contadores + sketches de um tipo de ticket numa janela (hora ou dia)"""
+    __slots__ = ("contadores", "resposta", "fechamento")
+
+    def __init__(self):
+        self.contadores = dict.fromkeys(CONTADORES, 0)
+        self.resposta = SketchQuantis()
+        self.fechamento = SketchQuantis()
+
+    def mesclar(self, outro):
+        for chave in CONTADORES:
+            self.contadores[chave] += outro.contadores[chave]
+        self.resposta.mesclar(outro.resposta)
+        self.fechamento.mesclar(outro.fechamento)
+        return self
+
+    def como_dict(self):
+        return {"c": self.contadores, "r": self.resposta.como_dict(), "f": self.fechamento.como_dict()}
+
+    @classmethod
+    def de_dict(cls, dados):
+        rollup = cls()
+        rollup.contadores.update(dados.get("c", {}))
+        rollup.resposta = SketchQuantis.de_dict(dados.get("r", {}))
+        rollup.fechamento = SketchQuantis.de_dict(dados.get("f", {}))
+        return rollup
+
+
+def _chave_hora(instante):
+    return datetime.fromtimestamp(instante, timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def _chave_dia(instante):
+    return datetime.fromtimestamp(instante, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _aberto_em(channel_id):
+    """O canal do ticket nasce na abertura: o snowflake dá o horário sem guardar estado"""
+    return discord.utils.snowflake_time(channel_id).timestamp()
+
+
+def _chave_tipo(guild_id, tipo):
+    return f"{guild_id}:{tipo}"
+
+
+class AnaliseTickets:
+    """Agregados de volume, 1ª resposta da equipe e tempo até o fechamento, por servidor e tipo"""
+
+    def __init__(self, arquivo="analise.json"):
+        self.arquivo = arquivo
+        # "guild_id:tipo" (arquivos antigos: só "tipo", contados apenas no resumo geral)
+        self._horas = {}        # "AAAA-MM-DDTHH" -> {"guild_id:tipo": _Rollup}
+        self._dias = {}         # "AAAA-MM-DD" -> {"guild_id:tipo": _Rollup}
+        self._respondidos = set()
+        self._salvamento = None
+        self.ultimo_resumo = {}
+
+    # ---------- eventos ----------
+
+    def _rollups(self, guild_id, tipo, instante):
+        chave = _chave_tipo(guild_id, tipo)
+        hora = self._horas.setdefault(_chave_hora(instante), {}).setdefault(chave, _Rollup())
+        dia = self._dias.setdefault(_chave_dia(instante), {}).setdefault(chave, _Rollup())
+        return hora, dia
+
+    def ao_abrir(self, guild_id, tipo, channel_id, agora=None):
+        agora = time.time() if agora is None else agora
+        for rollup in self._rollups(guild_id, tipo, agora):
+            rollup.contadores["abertos"] += 1
+        self._alterado()
+
+    def ao_responder(self, guild_id, tipo, channel_id, agora=None):
+        """Primeira mensagem da equipe no ticket (as seguintes são ignoradas)"""
+        if channel_id in self._respondidos:
+            return
+        agora = time.time() if agora is None else agora
+        self._respondidos.add(channel_id)
+        espera = max(0.0, agora - _aberto_em(channel_id))
+        for rollup in self._rollups(guild_id, tipo, agora):
+            rollup.contadores["respondidos"] += 1
+            rollup.resposta.adicionar(espera)
+        self._alterado()
+
+    def ao_fechar(self, guild_id, tipo, channel_id, agora=None):
+        agora = time.time() if agora is None else agora
+        self._respondidos.discard(channel_id)
+        duracao = max(0.0, agora - _aberto_em(channel_id))
+        for rollup in self._rollups(guild_id, tipo, agora):
+            rollup.contadores["fechados"] += 1
+            rollup.fechamento.adicionar(duracao)
+        self._alterado()
+
+    def criar_listener(self, bot):
+        """Listener de on_message: mensagem de um membro da equipe (não o dono) = 1ª resposta"""
+        async def ao_mensagem(message):
+            if message.guild is None or message.author.bot or message.channel.id in self._respondidos:
+                return
+            tipo = bot.indice_tickets.tipo(message.channel.id)
+            if tipo is None or message.author.id == bot.indice_tickets.dono(message.channel.id):
+                return
+            # Amigo ou outro cliente adicionado ao canal não para o relógio da 1ª resposta
+            if not isinstance(message.author, discord.Member) or not eh_staff(bot, message.author):
+                return
+            self.ao_responder(message.guild.id, tipo, message.channel.id, message.created_at.timestamp())
+
+        return ao_mensagem
+
+    # ---------- consulta ----------
+
+    def resumo(self, guild_id=None, agora=None):
+        """
+        Últimas 24h (rollups por hora), 7 e 30 dias (por dia) por tipo de ticket
+        Args:
+            guild_id: Só um servidor (/stats); None soma todos (status do operador, fica em cache)
+        """
+        agora = time.time() if agora is None else agora
+        janelas = {
+            "24h": self._mesclar(self._horas, {_chave_hora(agora - h * 3600) for h in range(24)}, guild_id),
+            "7d": self._mesclar(self._dias, {_chave_dia(agora - d * 86400) for d in range(7)}, guild_id),
+            "30d": self._mesclar(self._dias, {_chave_dia(agora - d * 86400) for d in range(30)}, guild_id),
+        }
+        resumo = {
+            janela: {tipo: _descrever(rollup) for tipo, rollup in por_tipo.items()}
+            for janela, por_tipo in janelas.items()
+        }
+        if guild_id is None:
+            self.ultimo_resumo = resumo
+        return resumo
+
+    def _mesclar(self, rollups, chaves, guild_id=None):
+        por_tipo = {}
+        for chave in chaves:
+            for chave_tipo, rollup in rollups.get(chave, {}).items():
+                guild, _, tipo = chave_tipo.rpartition(":")
+                if guild_id is not None and guild != str(guild_id):
+                    continue
+                por_tipo.setdefault(tipo, _Rollup()).mesclar(rollup)
+        return por_tipo
+
+    # ---------- persistência ----------
+
+    def _alterado(self):
+        """Agrupa várias alterações numa única gravação (e atualiza o resumo em cache)"""
+        if self._salvamento is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._salvamento = loop.call_later(INTERVALO_SALVAR, self._salvar_agrupado)
+
+    def _salvar_agrupado(self):
+        self._salvamento = None
+        self.resumo()
+        self.salvar()
+
+    def _podar(self):
+        agora = time.time()
+        limite_hora = _chave_hora(agora - HORAS_RETIDAS * 3600)
+        limite_dia = _chave_dia(agora - DIAS_RETIDOS * 86400)
+        self._horas = {k: v for k, v in self._horas.items() if k >= limite_hora}
+        self._dias = {k: v for k, v in self._dias.items() if k >= limite_dia}
+
+    def salvar(self):
+        try:
+            self._podar()
+            dados = {
+                "horas": {k: {t: r.como_dict() for t, r in v.items()} for k, v in self._horas.items()},
+                "dias": {k: {t: r.como_dict() for t, r in v.items()} for k, v in self._dias.items()},
+                "respondidos": sorted(self._respondidos),
+            }
+            salvar_json_atomico(self.arquivo, dados)
+        except Exception as e:
+            logger.error(f"Erro ao salvar análise de tickets: {e}")
+
+    def carregar(self):
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    dados = json.load(f)
+                self._horas = {k: {t: _Rollup.de_dict(r) for t, r in v.items()} for k, v in dados.get("horas", {}).items()}
+                self._dias = {k: {t: _Rollup.de_dict(r) for t, r in v.items()} for k, v in dados.get("dias", {}).items()}
+                self._respondidos = set(dados.get("respondidos", []))
+                logger.info(f"Análise de tickets carregada: {len(self._dias)} dia(s)")
+        except Exception as e:
+            logger.error(f"Erro ao carregar análise de tickets: {e}")
+        self.resumo()
+
+    def parar(self):
+        if self._salvamento is not None:
+            self._salvamento.cancel()
+            self._salvamento = None
+        self.salvar()
+
+    def reconciliar(self, abertos):
+        """Descarta marcas de 1ª resposta de tickets que não estão mais abertos"""
+        self._respondidos &= set(abertos)
+
+
+def _descrever(rollup):
+    def minutos(segundos):
+        return round(segundos / 60, 1) if segundos is not None else None
+
+    return dict(
+        rollup.contadores,
+        resposta_p50_min=minutos(rollup.resposta.quantil(0.5)),
+        resposta_p90_min=minutos(rollup.resposta.quantil(0.9)),
+        fechamento_p50_h=round(rollup.fechamento.quantil(0.5) / 3600, 1) if rollup.fechamento.total else None,
+        fechamento_p90_h=round(rollup.fechamento.quantil(0.9) / 3600, 1) if rollup.fechamento.total else None,
+    )
+
+
+def criar_comando_stats(bot):
+    """Cria o slash command /stats (lê só os agregados em memória)"""
+
+    @discord.app_commands.command(name="stats", description="Volume e tempos de resposta dos tickets")
+    @discord.app_commands.default_permissions(manage_channels=True)
+    async def stats(interaction: discord.Interaction):
+        resumo = bot.analise.resumo(interaction.guild_id)
+        embed = discord.Embed(title="📊 Estatísticas de Tickets", color=0x9966FF)
+        for janela, titulo in (("24h", "Últimas 24h"), ("7d", "Últimos 7 dias"), ("30d", "Últimos 30 dias")):
+            linhas = []
+            for tipo, dados in sorted(resumo[janela].items()):
+                linhas.append(
+                    f"**{tipo}**: {dados['abertos']} abertos • {dados['fechados']} fechados\n"
+                    f"1ª resposta p50/p90: {_fmt(dados['resposta_p50_min'], 'min')} / {_fmt(dados['resposta_p90_min'], 'min')}\n"
+                    f"Fechamento p50/p90: {_fmt(dados['fechamento_p50_h'], 'h')} / {_fmt(dados['fechamento_p90_h'], 'h')}"
+                )
+            embed.add_field(name=titulo, value="\n".join(linhas) or "Sem tickets", inline=False)
+        embed.set_footer(text="Fênix Bots • Tickets")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    return stats
+
+
+def _fmt(valor, unidade):
+    return f"{valor}{unidade}" if valor is not None else "—"
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Índice de Tickets Abertos - Evita tickets duplicados por usuário
+Mantém em memória o canal aberto de cada (servidor, usuário, tipo); a persistência
+fica no registro SQLite (ticket_registry)
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+
+import discord
+
+from interaction_slo import responder
+from overflow_categories import categorias_relacionadas
+
+logger = logging.getLogger(__name__)
+
+# Prefixo do nome do canal -> tipo de ticket
+TIPOS_TICKET = {
+    "produto": "categoria_produtos",
+    "parceria": "categoria_parcerias",
+}
+
+
+_NUMERO_CANAL = re.compile(r"-(\d+)$")
+
+
+def numero_do_canal(nome):
+    """produto-fulano-42 -> 42 (None se o nome não terminar em número)"""
+    encontrado = _NUMERO_CANAL.search(nome)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def categorias_base(config, guild):
+    """Categorias de ticket configuradas que existem no servidor: {tipo: categoria}"""
+    categorias = {}
+    for tipo, chave_config in TIPOS_TICKET.items():
+        categoria = guild.get_channel(config.get(chave_config) or 0)
+        if isinstance(categoria, discord.CategoryChannel):
+            categorias[tipo] = categoria
+    return categorias
+
+
+def salvar_json_atomico(caminho, dados):
+    """
+    Grava JSON em arquivo temporário e troca de uma vez (sem arquivo corrompido em crash)
+    O temporário tem nome único: gravações simultâneas do mesmo arquivo não se atropelam
+    """
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(caminho) or ".",
+                                     prefix=f".{os.path.basename(caminho)}.", suffix=".tmp", delete=False) as f:
+        temporario = f.name
+        try:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+        except BaseException:
+            f.close()
+            os.remove(temporario)
+            raise
+    try:
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.remove(temporario)
+        raise
+
+
+class IndiceTickets:
+    """Índice (guild, usuário, tipo) -> canal do ticket aberto"""
+
+    def __init__(self, registro, analise=None):
+        self.registro = registro
+        self.analise = analise
+        self._abertos = {}
+        self._por_canal = {}
+        self._reservas = set()
+        self.duplicados_rejeitados = 0
+
+    def buscar(self, guild_id, user_id, tipo):
+        """Retorna o ID do canal aberto ou None (O(1), sem chamadas à API)"""
+        return self._abertos.get((guild_id, user_id, tipo))
+
+    def dono(self, channel_id):
+        """Retorna o ID do dono do ticket aberto no canal (ou None)"""
+        chave = self._por_canal.get(channel_id)
+        return chave[1] if chave else None
+
+    def tipo(self, channel_id):
+        """Retorna o tipo do ticket aberto no canal (ou None)"""
+        chave = self._por_canal.get(channel_id)
+        return chave[2] if chave else None
+
+    def canais(self):
+        """IDs de todos os canais com ticket aberto"""
+        return list(self._por_canal)
+
+    def bloqueado(self, guild_id, user_id, tipo):
+        """True se o usuário já tem ticket desse tipo aberto ou em criação (conta a rejeição)"""
+        chave = (guild_id, user_id, tipo)
+        if chave in self._abertos or chave in self._reservas:
+            self.duplicados_rejeitados += 1
+            return True
+        return False
+
+    def reservar(self, guild_id, user_id, tipo):
+        """
+        Reserva a criação de um ticket antes de qualquer chamada REST
+        Returns:
+            True se o usuário pode abrir o ticket, False se já existe um aberto ou em criação
+        """
+        if self.bloqueado(guild_id, user_id, tipo):
+            return False
+        self._reservas.add((guild_id, user_id, tipo))
+        return True
+
+    def liberar_reserva(self, guild_id, user_id, tipo):
+        """Desfaz uma reserva que não virou ticket (erro na criação)"""
+        self._reservas.discard((guild_id, user_id, tipo))
+
+    def registrar(self, guild_id, user_id, tipo, channel_id, numero=None, respostas=None):
+        """Registra o canal criado (a gravação no SQLite é enfileirada, sem bloquear o loop)"""
+        chave = (guild_id, user_id, tipo)
+        self._reservas.discard(chave)
+        self._abertos[chave] = channel_id
+        self._por_canal[channel_id] = chave
+        self.registro.abrir(guild_id, channel_id, user_id, tipo, numero=numero, respostas=respostas)
+        if self.analise is not None:
+            self.analise.ao_abrir(guild_id, tipo, channel_id)
+
+    def remover_canal(self, channel_id, fechado_por=None):
+        """Remove o ticket de um canal fechado/deletado"""
+        chave = self._por_canal.pop(channel_id, None)
+        if chave is None:
+            return False
+        self._abertos.pop(chave, None)
+        self.registro.fechar(channel_id, fechado_por)
+        if self.analise is not None:
+            self.analise.ao_fechar(chave[0], chave[2], channel_id)
+        return True
+
+    def carregar(self):
+        """Carrega os tickets abertos do registro"""
+        try:
+            for guild_id, user_id, tipo, channel_id in self.registro.carregar_abertos():
+                chave = (guild_id, user_id, tipo)
+                self._abertos[chave] = channel_id
+                self._por_canal[channel_id] = chave
+            logger.info(f"Índice de tickets carregado: {len(self._abertos)} aberto(s)")
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice de tickets: {e}")
+
+    def reconstruir(self, bot):
+        """
+        Reconcilia o índice com os canais reais após um restart
+        Remove entradas de canais que não existem mais e adiciona canais de ticket
+        encontrados nas categorias configuradas e de transbordo (dono = overwrite de membro do canal)
+        Returns:
+            IDs dos canais que não estavam no índice (sem estado salvo)
+        """
+        encontrados = {}
+        for guild in bot.guilds:
+            for tipo, base in categorias_base(bot.config, guild).items():
+                # Inclui as categorias de transbordo ("Produtos 2"...)
+                for categoria in categorias_relacionadas(guild, base):
+                    for canal in categoria.text_channels:
+                        if not canal.name.startswith(f"{tipo}-"):
+                            continue
+                        dono = _dono_do_canal(canal, bot.user.id if bot.user else None)
+                        if dono is not None:
+                            encontrados[(guild.id, dono, tipo)] = canal.id
+
+        # Mantém entradas cujo canal ainda existe (inclusive fora das categorias)
+        for chave, channel_id in self._abertos.items():
+            if chave not in encontrados and bot.get_channel(channel_id) is not None:
+                encontrados[chave] = channel_id
+
+        removidos = {c for k, c in self._abertos.items() if encontrados.get(k) != c}
+        adicionados = {k: c for k, c in encontrados.items() if self._abertos.get(k) != c}
+        for channel_id in removidos:
+            self.registro.fechar(channel_id)
+        for (guild_id, user_id, tipo), channel_id in adicionados.items():
+            canal = bot.get_channel(channel_id)
+            self.registro.abrir(guild_id, channel_id, user_id, tipo, numero=numero_do_canal(canal.name),
+                                aberto_em=canal.created_at.timestamp())
+
+        self._abertos = encontrados
+        self._por_canal = {c: k for k, c in encontrados.items()}
+        logger.info(f"Índice de tickets reconstruído: {len(encontrados)} aberto(s), "
+                    f"+{len(adicionados)} / -{len(removidos)}")
+        return list(adicionados.values())
+
+    def estatisticas(self):
+        return {
+            "abertos": len(self._abertos),
+            "em_criacao": len(self._reservas),
+            "duplicados_rejeitados": self.duplicados_rejeitados,
+        }
+
+
+def _dono_do_canal(canal, bot_id):
+    """Descobre o dono do ticket pelo overwrite de membro do canal"""
+    for alvo in canal.overwrites:
+        # Membro fora do cache vem como discord.Object do tipo User
+        membro = isinstance(alvo, discord.Member) or (isinstance(alvo, discord.Object) and alvo.type is discord.User)
+        if membro and alvo.id != bot_id:
+            return alvo.id
+    return None
+
+
+async def responder_duplicado(interaction, channel_id):
+    """Responde na hora com o link do ticket já aberto"""
+    if channel_id:
+        mensagem = f"⚠️ Você já tem um ticket aberto: <#{channel_id}>"
+    else:
+        mensagem = "⏳ Seu ticket já está sendo criado, aguarde um instante."
+
+    # Pelo lock da interação: não disputa com o defer automático
+    await responder(interaction, mensagem, ephemeral=True)
+
+
+async def barrar_duplicado(indice, interaction, tipo, reservar=False):
+    """
+    Verifica o índice no topo de um callback de botão/modal
+    Args:
+        reservar: Também reserva a criação (usado no envio do modal)
+    Returns:
+        True se o pedido era duplicado e já foi respondido
+    """
+    guild_id, user_id = interaction.guild.id, interaction.user.id
+    if reservar:
+        livre = indice.reservar(guild_id, user_id, tipo)
+    else:
+        livre = not indice.bloqueado(guild_id, user_id, tipo)
+    if livre:
+        return False
+    await responder_duplicado(interaction, indice.buscar(guild_id, user_id, tipo))
+    return True
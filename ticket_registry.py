@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Registro de Tickets - Banco SQLite (modo WAL) com consultas indexadas
+Guarda abertura, fechamento, responsável, tipo, respostas do modal, canal e dono de cada ticket
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    numero INTEGER,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL UNIQUE,
+    owner_id INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'aberto',
+    aberto_em REAL NOT NULL,
+    fechado_em REAL,
+    fechado_por INTEGER,
+    respostas TEXT,
+    transcript TEXT,
+    log_enviado INTEGER NOT NULL DEFAULT 0,
+    responsavel_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_dono ON tickets (guild_id, owner_id, tipo, status);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status, aberto_em);
+CREATE INDEX IF NOT EXISTS idx_tickets_tipo ON tickets (tipo, aberto_em);
+"""
+
+COLUNAS = ("id", "numero", "guild_id", "channel_id", "owner_id", "tipo", "status", "aberto_em",
+           "fechado_em", "fechado_por", "respostas", "transcript", "log_enviado", "responsavel_id")
+
+# Colunas adicionadas depois da primeira versão do banco: (nome, definição)
+MIGRACOES = (("responsavel_id", "INTEGER"),)
+
+
+class RegistroTickets:
+    """
+    Toda operação roda numa única thread dedicada dona da conexão SQLite
+    Escritas são enfileiradas (não bloqueiam o loop); leituras são aguardadas com await
+    """
+
+    def __init__(self, caminho="tickets.db"):
+        self.caminho = caminho
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registro-tickets")
+        self._conexao = None
+        self._executor.submit(self._conectar).result()
+
+    def _conectar(self):
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._conexao.executescript(ESQUEMA)
+        existentes = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(tickets)")}
+        for coluna, definicao in MIGRACOES:
+            if coluna not in existentes:
+                self._conexao.execute(f"ALTER TABLE tickets ADD COLUMN {coluna} {definicao}")
+        self._conexao.commit()
+        logger.info(f"Registro de tickets aberto em {self.caminho}")
+
+    def _escrever(self, sql, parametros):
+        """Enfileira uma escrita; erros vão para o log"""
+        def executar():
+            self._conexao.execute(sql, parametros)
+            self._conexao.commit()
+
+        futuro = self._executor.submit(executar)
+        futuro.add_done_callback(_registrar_erro)
+        return futuro
+
+    async def _ler(self, sql, parametros=()):
+        def executar():
+            return self._conexao.execute(sql, parametros).fetchall()
+
+        return await asyncio.wrap_future(self._executor.submit(executar))
+
+    # ---------- escrita ----------
+
+    def abrir(self, guild_id, channel_id, owner_id, tipo, numero=None, respostas=None, aberto_em=None):
+        """Registra a abertura; se o canal já existir no registro (reconciliação), reabre"""
+        return self._escrever(
+            "INSERT INTO tickets (numero, guild_id, channel_id, owner_id, tipo, aberto_em, respostas) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET status = 'aberto', fechado_em = NULL, fechado_por = NULL",
+            (numero, guild_id, channel_id, owner_id, tipo, aberto_em or time.time(),
+             json.dumps(respostas, ensure_ascii=False) if respostas else None)
+        )
+
+    def fechar(self, channel_id, fechado_por=None, fechado_em=None):
+        """Marca como fechado; a primeira chamada vence (guarda quem fechou)"""
+        return self._escrever(
+            "UPDATE tickets SET status = 'fechado', fechado_em = ?, fechado_por = ? "
+            "WHERE channel_id = ? AND status = 'aberto'",
+            (fechado_em or time.time(), fechado_por, channel_id)
+        )
+
+    def marcar_log(self, channel_id, transcript=None):
+        return self._escrever(
+            "UPDATE tickets SET log_enviado = 1, transcript = COALESCE(?, transcript) WHERE channel_id = ?",
+            (transcript, channel_id)
+        )
+
+    def atribuir(self, channel_id, responsavel_id):
+        return self._escrever(
+            "UPDATE tickets SET responsavel_id = ? WHERE channel_id = ?",
+            (responsavel_id, channel_id)
+        )
+
+    # ---------- leitura ----------
+
+    def carregar_abertos(self):
+        """Leitura síncrona usada só na inicialização: [(guild_id, owner_id, tipo, channel_id)]"""
+        def executar():
+            return self._conexao.execute(
+                "SELECT guild_id, owner_id, tipo, channel_id FROM tickets WHERE status = 'aberto'"
+            ).fetchall()
+
+        return self._executor.submit(executar).result()
+
+    def carregar_atribuicoes(self):
+        """Leitura síncrona usada só na inicialização: [(guild_id, channel_id, responsavel_id)]"""
+        def executar():
+            return self._conexao.execute(
+                "SELECT guild_id, channel_id, responsavel_id FROM tickets "
+                "WHERE status = 'aberto' AND responsavel_id IS NOT NULL"
+            ).fetchall()
+
+        return self._executor.submit(executar).result()
+
+    async def buscar(self, channel_id):
+        linhas = await self._ler(f"SELECT {', '.join(COLUNAS)} FROM tickets WHERE channel_id = ?", (channel_id,))
+        return _como_dict(linhas[0]) if linhas else None
+
+    async def listar(self, guild_id=None, owner_id=None, tipo=None, status=None, aberto_antes=None, limite=100):
+        """Consulta por dono, status, tipo e idade usando os índices"""
+        filtros, parametros = [], []
+        for coluna, valor in (("guild_id", guild_id), ("owner_id", owner_id), ("tipo", tipo), ("status", status)):
+            if valor is not None:
+                filtros.append(f"{coluna} = ?")
+                parametros.append(valor)
+        if aberto_antes is not None:
+            filtros.append("aberto_em < ?")
+            parametros.append(aberto_antes)
+        onde = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        linhas = await self._ler(
+            f"SELECT {', '.join(COLUNAS)} FROM tickets {onde} ORDER BY aberto_em DESC LIMIT ?",
+            (*parametros, limite)
+        )
+        return [_como_dict(linha) for linha in linhas]
+
+    async def maior_numero(self):
+        """Maior número de ticket já registrado (None se não houver)"""
+        linhas = await self._ler("SELECT MAX(numero) FROM tickets")
+        return linhas[0][0]
+
+    async def logs_pendentes(self, fechado_desde, limite=50):
+        """Tickets fechados a partir de `fechado_desde` cujo log não foi enviado"""
+        linhas = await self._ler(
+            f"SELECT {', '.join(COLUNAS)} FROM tickets "
+            "WHERE status = 'fechado' AND log_enviado = 0 AND fechado_em >= ? ORDER BY fechado_em LIMIT ?",
+            (fechado_desde, limite)
+        )
+        return [_como_dict(linha) for linha in linhas]
+
+    async def resumo(self):
+        """Contagem por tipo e status (aguarda a thread do SQLite sem bloquear o loop)"""
+        resumo = {}
+        for tipo, status, total in await self._ler("SELECT tipo, status, COUNT(*) FROM tickets GROUP BY tipo, status"):
+            resumo.setdefault(tipo, {})[status] = total
+        return resumo
+
+    def fechar_conexao(self):
+        def executar():
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
+
+        self._executor.submit(executar).result()
+        self._executor.shutdown(wait=True)
+
+
+def _como_dict(linha):
+    ticket = dict(zip(COLUNAS, linha))
+    if ticket["respostas"]:
+        ticket["respostas"] = json.loads(ticket["respostas"])
+    return ticket
+
+
+def _registrar_erro(futuro):
+    erro = futuro.exception()
+    if erro is not None:
+        logger.error(f"Erro ao gravar no registro de tickets: {erro}")